@@ -1,26 +1,87 @@
 import os
 import sys
+import argparse
+import arv_index
+import data_cache
 import scrub_new_list
 import make_outreach_ready
+import stage_metrics
 
-def run_the_system():
-    print("STEP 1: SCRUBBING DATA...")
-    # This takes 1st.xlsx -> ready_for_kind_emails.csv
-    scrub_new_list.attack()
+CHECKPOINT_FILE = "ready_for_kind_emails.csv"
+OUTPUT_FILE = "outreach_ready.csv"
 
-    if os.path.exists("ready_for_kind_emails.csv"):
-        print("STEP 2: FORMATTING OUTREACH...")
-        
-        # We call the process_file function directly from the imported module
-        # explicitly defining input and output paths
-        make_outreach_ready.process_file(
-            input_path="ready_for_kind_emails.csv",
-            output_path="outreach_ready.csv"
+def code_hash(*modules):
+    """Changing the code of a stage invalidates its cached result too."""
+    return [data_cache.file_hash(m.__file__) for m in modules]
+
+def run_the_system(checkpoint=False, force=False, repair_model="flat"):
+    if not os.path.exists(scrub_new_list.INPUT_FILE):
+        print(f"ERROR: Could not find '{scrub_new_list.INPUT_FILE}'.")
+        return
+
+    # Each stage is fingerprinted by its inputs + parameters + code; unchanged stages are reused
+    scrub_key = data_cache.fingerprint(
+        "scrub", data_cache.source_hash(scrub_new_list.INPUT_FILE),
+        scrub_new_list.REPAIR_MODEL, scrub_new_list.DEFAULT_BATHS, scrub_new_list.ARV_MODEL,
+        arv_index.source_key(scrub_new_list.ARV_SOURCE) if scrub_new_list.ARV_MODEL == "comps" else None,
+        code_hash(scrub_new_list, scrub_new_list.property_calc, scrub_new_list.arv_index),
+    )
+    outreach_key = data_cache.fingerprint(
+        "outreach", scrub_key, repair_model,
+        code_hash(make_outreach_ready, make_outreach_ready.property_calc),
+    )
+
+    with stage_metrics.stage("pipeline", force=force, repair_model=repair_model) as metrics:
+        print("STEP 1: SCRUBBING DATA...")
+        # This takes 1st.xlsx -> gold deals (kept in memory, no CSV round-trip)
+        gold, skipped = data_cache.run_stage(
+            "scrub", scrub_key, lambda: scrub_new_list.attack(output_file=None), force=force
         )
-        
-        print("\nSUCCESS: 'outreach_ready.csv' is ready for your 6,935 Kind Credits.")
-    else:
-        print("ERROR: Could not find 'ready_for_kind_emails.csv'. Did the scrub fail?")
+        if skipped:
+            print(f"Unchanged since last run, reusing {len(gold)} scrubbed deals.")
+        metrics['scrub_cached'] = skipped
+
+        if gold is None:
+            print("ERROR: The scrub failed, nothing to format.")
+            return
+
+        if checkpoint:
+            gold.to_csv(CHECKPOINT_FILE, index=False)
+            print(f"Checkpoint written: {CHECKPOINT_FILE}")
+
+        print("STEP 2: FORMATTING OUTREACH...")
+        with stage_metrics.stage("outreach") as outreach_metrics:
+            stage_metrics.rows_in(len(gold))
+            out, skipped = data_cache.run_stage(
+                "outreach", outreach_key,
+                lambda: make_outreach_ready.build_outreach(gold, repair_model=repair_model), force=force
+            )
+            if skipped:
+                print(f"Unchanged since last run, reusing {len(out)} drafted messages.")
+            outreach_metrics['cached'] = skipped
+            stage_metrics.rows_out(len(out))
+            with stage_metrics.step("write"):
+                make_outreach_ready.write_outreach(out, OUTPUT_FILE)
+        stage_metrics.rows_out(len(out))
+
+    print(f"\nSUCCESS: '{OUTPUT_FILE}' is ready for your 6,935 Kind Credits.")
+
+def main():
+    parser = argparse.ArgumentParser(description="1st.xlsx -> scrub (1980/1500) -> outreach_ready.csv")
+    parser.add_argument("--checkpoint", action="store_true", help=f"Also write the scrub result to {CHECKPOINT_FILE}.")
+    parser.add_argument("--force", action="store_true", help="Re-run every stage even if its inputs are unchanged.")
+    parser.add_argument("--repair-model", choices=["flat", "detailed"], default="flat",
+                        help="Repair model for leads without an offer column (see make_outreach_ready).")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Also write cProfile/tracemalloc hot spots to {stage_metrics.PROFILE_FILE}.")
+    parser.add_argument("--metrics", nargs="?", const=stage_metrics.METRICS_FILE, default=None, metavar="PATH",
+                        help=f"Append per-stage timings, row counts and peak memory to PATH "
+                             f"(default: {stage_metrics.METRICS_FILE}; or set ${stage_metrics.METRICS_ENV}).")
+    args = parser.parse_args()
+    stage_metrics.enable_metrics(args.metrics)
+    make_outreach_ready.configure_logging()
+    stage_metrics.enable_profile(args.profile)
+    run_the_system(checkpoint=args.checkpoint, force=args.force, repair_model=args.repair_model)
 
 if __name__ == "__main__":
-    run_the_system()
+    main()
@@ -1,9 +1,67 @@
 import os
-from openai import OpenAI
+import argparse
+import asyncio
+import csv
+import hashlib
+import random
+import sqlite3
+import threading
+import time
+import property_calc
 
-# 1. Initialize the Client
-# Ensure your OPENAI_API_KEY is set in your environment variables
-client = OpenAI()
+# openai (and pandas, in batch mode) are imported on first use, so importing this module is
+# cheap and works without an API key
+_client = None
+
+MODEL = "gpt-4o-mini" # Using the 2026 standard for fast reasoning
+TEMPERATURE = 0.3
+SYSTEM_PROMPT = "You are a professional real estate specialist."
+
+# --- BATCH MODE DEFAULTS ---
+BATCH_CONCURRENCY = 8         # requests in flight at once
+BATCH_RPM = 500               # requests per minute
+BATCH_TPM = 200_000           # tokens per minute (prompt estimate + completion allowance)
+BATCH_MAX_RETRIES = 6
+BACKOFF_BASE = 1.0            # seconds, doubled per attempt
+BACKOFF_CAP = 60.0
+EST_COMPLETION_TOKENS = 400   # budgeted per request by the token limiter
+
+# Leads CSV column names (first match wins, case-insensitive)
+BATCH_COLUMNS = {
+    "id": ["id", "lead_id", "acct", "account"],
+    "arv": ["arv", "est value", "tot_mkt_val", "market value", "value"],
+    "repairs": ["repairs", "estimated repairs", "repair estimate"],
+    "year_built": ["year_built", "year built", "effective year built", "yr_blt"],
+    "sqft": ["sqft", "building sqft", "bld_ar", "square_feet"],
+    "ownership_years": ["ownership_years", "ownership years", "years owned"],
+    "mao": ["mao", "mao (your offer)", "offer"],
+    "risk_tier": ["risk_tier", "tier"],
+}
+BATCH_OUTPUT_COLS = ["lead_id", "mao", "justification"]
+
+# --- RESPONSE CACHE ---
+# The prompt only depends on six numbers, so across a campaign many leads send the same text.
+# Responses are kept in SQLite keyed by a hash of model + temperature + normalized prompt;
+# entries expire after CACHE_TTL_DAYS and the least recently used go first past CACHE_MAX_ENTRIES.
+CACHE_DB = "narrator_cache.sqlite"
+CACHE_TTL_DAYS = 30
+CACHE_MAX_ENTRIES = 50_000
+
+# Bucketing mode: inputs are rounded to these bands before the prompt is built, so similar
+# leads share one justification (the year goes to its decade)
+BUCKET_BANDS = {"arv": 10_000, "repairs": 5_000, "sqft": 250, "ownership_years": 5, "mao": 5_000}
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key        TEXT PRIMARY KEY,
+    model      TEXT NOT NULL,
+    response   TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    used_at    REAL NOT NULL,
+    hits       INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_responses_used ON responses (used_at);
+"""
 
 def calculate_expert_mao(arv, repairs, risk_tier):
     """
@@ -12,29 +70,45 @@ def calculate_expert_mao(arv, repairs, risk_tier):
     Tier 2: Stable Market (70% Rule)
     Tier 3: Risky/Warzone (60% Rule)
     """
-    multipliers = {1: 0.80, 2: 0.70, 3: 0.60}
-    target_margin = multipliers.get(risk_tier, 0.70)
+    target_margin = property_calc.RISK_TIER_MARGINS.get(risk_tier, property_calc.TARGET_MARGIN)
     
     # The 'Appraiser's Buffer': 15% contingency for hidden repair costs
-    adjusted_repairs = repairs * 1.15
+    adjusted_repairs = repairs * property_calc.REPAIR_CONTINGENCY
     
     # We set a standard wholesale fee of $10,000 for the prototype
-    wholesale_fee = 10000
+    wholesale_fee = property_calc.WHOLESALE_FEE
     
     mao = (arv * target_margin) - adjusted_repairs - wholesale_fee
     return mao
 
-def ai_offer_analyst(arv, repairs, year_built, sqft, ownership_years, mao):
-    prompt = f"""
+def _shown(value, money=None):
+    """A prompt value: 'Unknown' when blank or NaN, whole floats without '.0', money as $1,234."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return "Unknown"
+    if isinstance(value, float):
+        if value != value:
+            return "Unknown"
+        if money is None and value.is_integer():
+            return str(int(value))
+    if money is not None:
+        try:
+            return f"${float(value):,.{money}f}"
+        except (TypeError, ValueError):
+            return str(value)
+    return str(value)
+
+def build_prompt(arv, repairs, year_built, sqft, ownership_years, mao):
+    year_built, sqft, ownership_years = _shown(year_built), _shown(sqft), _shown(ownership_years)
+    return f"""
 You are a Senior Residential Appraiser and Investment Analyst. 
 Speak with clinical objectivity and professional authority.
 
 This is a FIRST-PASS offer justification.
 
 Inputs:
-- After Repair Value (ARV): ${arv:,.0f}
-- Calculated Max Offer: ${mao:,.2f}
-- Estimated Repairs: ${repairs:,.0f} (plus 15% contingency)
+- After Repair Value (ARV): {_shown(arv, money=0)}
+- Calculated Max Offer: {_shown(mao, money=2)}
+- Estimated Repairs: {_shown(repairs, money=0)} (plus 15% contingency)
 - Year Built: {year_built}
 - Square Footage: {sqft}
 - Ownership Years: {ownership_years}
@@ -46,41 +120,402 @@ Instructions:
 4. End with: "This analysis is generated via The Royce Protocol. Professional inspection required."
 """
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini", # Using the 2026 standard for fast reasoning
-        messages=[{"role": "system", "content": "You are a professional real estate specialist."},
+def bucket_inputs(arv, repairs, year_built, sqft, ownership_years, mao):
+    """The prompt inputs rounded to BUCKET_BANDS (non-numeric values such as 'Unknown' pass through)."""
+    def band(value, size):
+        try:
+            return int(round(float(value) / size) * size)
+        except (TypeError, ValueError):
+            return value
+
+    try:
+        year_built = int(float(year_built)) // 10 * 10
+    except (TypeError, ValueError):
+        pass
+    return (band(arv, BUCKET_BANDS["arv"]), band(repairs, BUCKET_BANDS["repairs"]), year_built,
+            band(sqft, BUCKET_BANDS["sqft"]), band(ownership_years, BUCKET_BANDS["ownership_years"]),
+            band(mao, BUCKET_BANDS["mao"]))
+
+def cache_key(prompt, model=MODEL, temperature=TEMPERATURE, system_prompt=SYSTEM_PROMPT):
+    """sha256 of model, temperature and the whitespace-normalized system + user prompt."""
+    text = " ".join(system_prompt.split()) + "\n" + " ".join(prompt.split())
+    return hashlib.sha256(f"{model}\n{float(temperature):.3f}\n{text}".encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """Persistent prompt -> response store with TTL and LRU eviction. Safe to share across threads."""
+
+    def __init__(self, path=CACHE_DB, ttl_days=CACHE_TTL_DAYS, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl_days * 86400 if ttl_days else None
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evicted": 0}
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(CACHE_SCHEMA)
+        self.evict()
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl and now - row[1] > self.ttl):
+                self.stats["misses"] += 1
+                return None
+            self.conn.execute("UPDATE responses SET used_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.stats["hits"] += 1
+            return row[0]
+
+    def put(self, key, response, model=MODEL):
+        now = time.time()
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO responses (key, model, response, created_at, used_at) "
+                              "VALUES (?, ?, ?, ?, ?)", (key, model, response, now, now))
+            self.conn.commit()
+            self.stats["stores"] += 1
+        if self.max_entries and self.stats["stores"] % 100 == 0:
+            self.evict()
+
+    def evict(self):
+        """Drops expired entries, then the least recently used past max_entries."""
+        with self.lock:
+            removed = 0
+            if self.ttl:
+                removed += self.conn.execute("DELETE FROM responses WHERE created_at < ?",
+                                             (time.time() - self.ttl,)).rowcount
+            if self.max_entries:
+                removed += self.conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+                    "ORDER BY used_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,)).rowcount
+            self.conn.commit()
+            self.stats["evicted"] += removed
+            return removed
+
+    def count(self):
+        """Responses currently stored."""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def summary(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        rate = self.stats["hits"] / lookups if lookups else 0.0
+        return (f"Cache {self.path}: {self.stats['hits']} hits, {self.stats['misses']} misses "
+                f"({rate:.0%} hit rate), {self.stats['evicted']} evicted, {self.count()} stored.")
+
+    def close(self):
+        self.conn.close()
+
+_cache = None
+
+def get_cache():
+    """The shared response cache (CACHE_DB), opened on first use."""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
+
+def get_client():
+    """The shared OpenAI client, created on first use (needs OPENAI_API_KEY in the environment)."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI()
+    return _client
+
+def ai_offer_analyst(arv, repairs, year_built, sqft, ownership_years, mao, cache=True, bucket=False):
+    """
+    The justification for one offer. cache=True uses the shared response cache (or pass a
+    ResponseCache, or False to always call the API); bucket=True rounds the inputs first.
+    """
+    inputs = (arv, repairs, year_built, sqft, ownership_years, mao)
+    prompt = build_prompt(*(bucket_inputs(*inputs) if bucket else inputs))
+    if cache is True:
+        cache = get_cache()
+    elif cache is False:
+        cache = None
+    key = cache_key(prompt)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    response = get_client().chat.completions.create(
+        model=MODEL,
+        messages=[{"role": "system", "content": SYSTEM_PROMPT},
                   {"role": "user", "content": prompt}],
-        temperature=0.3
+        temperature=TEMPERATURE
+    )
+
+    text = response.choices[0].message.content
+    if cache is not None:
+        cache.put(key, text)
+    return text
+
+# --- BATCH MODE: many leads, bounded concurrency, rate limits, retries, resumable output ---
+
+class RateLimiter:
+    """Token-bucket limiter on requests/minute and tokens/minute, shared by all workers."""
+
+    def __init__(self, requests_per_min, tokens_per_min):
+        self.rpm = float(requests_per_min)
+        self.tpm = float(tokens_per_min)
+        self.requests = self.rpm
+        self.tokens = self.tpm
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated
+        self.updated = now
+        self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60.0)
+        self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60.0)
+
+    async def acquire(self, tokens):
+        tokens = min(float(tokens), self.tpm)
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.requests >= 1 and self.tokens >= tokens:
+                    self.requests -= 1
+                    self.tokens -= tokens
+                    return
+                wait = max((1 - self.requests) * 60.0 / self.rpm,
+                           (tokens - self.tokens) * 60.0 / self.tpm)
+                await asyncio.sleep(max(wait, 0.01))
+
+def estimate_tokens(prompt):
+    """Rough prompt size (~4 chars per token) plus the completion allowance."""
+    return (len(SYSTEM_PROMPT) + len(prompt)) // 4 + EST_COMPLETION_TOKENS
+
+def is_retryable(error):
+    """429s, 5xx, timeouts and dropped connections are worth another try."""
+    import openai
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return status == 429 or (status is not None and status >= 500)
+
+def backoff_delay(attempt, error=None):
+    """Exponential backoff with jitter; a server-sent Retry-After wins if it is longer."""
+    delay = min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)) * random.uniform(0.5, 1.0)
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            delay = max(delay, float(response.headers.get("retry-after", 0)))
+        except (TypeError, ValueError):
+            pass
+    return delay
+
+async def narrate_with_retries(aclient, limiter, prompt, max_retries=BATCH_MAX_RETRIES):
+    tokens = estimate_tokens(prompt)
+    for attempt in range(max_retries + 1):
+        await limiter.acquire(tokens)
+        try:
+            response = await aclient.chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "system", "content": SYSTEM_PROMPT},
+                          {"role": "user", "content": prompt}],
+                temperature=TEMPERATURE
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            await asyncio.sleep(backoff_delay(attempt, e))
+
+def load_batch_leads(input_path):
+    """Reads the leads CSV into a list of dicts with the BATCH_COLUMNS keys."""
+    import pandas as pd
+    from make_outreach_ready import pick_col
+
+    df = pd.read_csv(input_path)
+    cols = {key: pick_col(df.columns, names) for key, names in BATCH_COLUMNS.items()}
+    missing = [key for key in ("arv", "repairs", "year_built", "sqft") if not cols[key]]
+    if missing:
+        raise ValueError(f"Leads file is missing columns: {', '.join(missing)}")
+
+    leads = []
+    for i, row in enumerate(df.to_dict("records")):
+        arv = float(row[cols["arv"]])
+        repairs = float(row[cols["repairs"]])
+        if cols["mao"]:
+            mao = float(row[cols["mao"]])
+        else:
+            tier = int(row[cols["risk_tier"]]) if cols["risk_tier"] else 2
+            mao = calculate_expert_mao(arv, repairs, tier)
+        leads.append({
+            "lead_id": str(row[cols["id"]]) if cols["id"] else str(i),
+            "arv": arv,
+            "repairs": repairs,
+            "year_built": row[cols["year_built"]],
+            "sqft": row[cols["sqft"]],
+            "ownership_years": row[cols["ownership_years"]] if cols["ownership_years"] else "Unknown",
+            "mao": mao,
+        })
+    return leads
+
+def finished_lead_ids(output_path):
+    """Lead ids already written by an earlier (possibly crashed) run."""
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, newline="", encoding="utf-8") as f:
+        return {row["lead_id"] for row in csv.DictReader(f)}
+
+async def run_batch(input_path, output_path, concurrency=BATCH_CONCURRENCY, rpm=BATCH_RPM,
+                    tpm=BATCH_TPM, max_retries=BATCH_MAX_RETRIES, base_url=None, cache=None, bucket=False):
+    """
+    Narrates every lead in input_path with at most `concurrency` requests in flight.
+    Each result is appended to output_path as soon as it arrives, so a crashed run
+    resumes where it stopped. Failed leads are left out and retried on the next run.
+    Leads with the same prompt share one request; with a ResponseCache, prompts answered
+    by an earlier run are not sent at all.
+    """
+    leads = load_batch_leads(input_path)
+    done = finished_lead_ids(output_path)
+    todo = [lead for lead in leads if lead["lead_id"] not in done]
+    print(f"{len(leads)} leads, {len(done)} already narrated, {len(todo)} to go.")
+    if not todo:
+        return {"ok": 0, "failed": 0}
+
+    import openai
+    aclient = openai.AsyncOpenAI(
+        base_url=base_url,
+        api_key=os.environ.get("OPENAI_API_KEY") or ("stub" if base_url else None),
+        max_retries=0,  # retries/backoff are handled here so the rate limiter sees them
     )
+    limiter = RateLimiter(rpm, tpm)
+    queue = asyncio.Queue()
+    for lead in todo:
+        queue.put_nowait(lead)
+    stats = {"ok": 0, "failed": 0, "requests": 0}
+    in_flight = {}  # cache key -> Future of the one request sending that prompt
+    start = time.perf_counter()
+
+    async def narrate(prompt):
+        key = cache_key(prompt)
+        if key in in_flight:
+            return await asyncio.shield(in_flight[key])
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            return cached
+        future = asyncio.get_running_loop().create_future()
+        in_flight[key] = future
+        try:
+            stats["requests"] += 1
+            text = await narrate_with_retries(aclient, limiter, prompt, max_retries)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved: leads waiting on it get the error, no "never retrieved" warning
+            raise
+        finally:
+            del in_flight[key]
+        future.set_result(text)
+        if cache is not None:
+            cache.put(key, text)
+        return text
+
+    new_file = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+    with open(output_path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=BATCH_OUTPUT_COLS)
+        if new_file:
+            writer.writeheader()
 
-    return response.choices[0].message.content
+        async def worker():
+            while True:
+                try:
+                    lead = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                inputs = (lead["arv"], lead["repairs"], lead["year_built"],
+                          lead["sqft"], lead["ownership_years"], lead["mao"])
+                prompt = build_prompt(*(bucket_inputs(*inputs) if bucket else inputs))
+                try:
+                    text = await narrate(prompt)
+                except Exception as e:
+                    stats["failed"] += 1
+                    print(f"FAILED lead {lead['lead_id']}: {e}")
+                    continue
+                mao = round(lead["mao"], 2) if lead["mao"] == lead["mao"] else ""  # NaN: blank ARV/repairs
+                writer.writerow({"lead_id": lead["lead_id"], "mao": mao, "justification": text})
+                f.flush()
+                stats["ok"] += 1
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    await aclient.close()
+    secs = time.perf_counter() - start
+    print(f"Narrated {stats['ok']} leads in {secs:.1f}s ({stats['ok'] / secs if secs else 0:.1f}/s) "
+          f"with {stats['requests']} API requests. {stats['failed']} failed (re-run to retry them).")
+    if cache is not None:
+        print(cache.summary())
+    return stats
+
+def ask(value, prompt, cast):
+    """A command-line value, or the answer to an interactive prompt when it was not given."""
+    return value if value is not None else cast(input(prompt))
 
 def main():
+    parser = argparse.ArgumentParser(description="The Royce Protocol: AI offer justifications.")
+    parser.add_argument("--batch", metavar="LEADS_CSV", help="Narrate every lead in a CSV instead of prompting.")
+    parser.add_argument("--output", "-o", default="narrations.csv", help="Batch output CSV (appended to, resumable).")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="Max requests in flight.")
+    parser.add_argument("--rpm", type=float, default=BATCH_RPM, help="Request-per-minute limit.")
+    parser.add_argument("--tpm", type=float, default=BATCH_TPM, help="Token-per-minute limit.")
+    parser.add_argument("--max-retries", type=int, default=BATCH_MAX_RETRIES, help="Retries on 429/5xx per lead.")
+    parser.add_argument("--base-url", default=None, help="Chat-completions endpoint (e.g. a local stub server).")
+    parser.add_argument("--cache", default=CACHE_DB, help="Response cache file (SQLite).")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API; don't read or write the cache.")
+    parser.add_argument("--cache-ttl-days", type=float, default=CACHE_TTL_DAYS, help="Cached responses expire after this (0 = never).")
+    parser.add_argument("--cache-max-entries", type=int, default=CACHE_MAX_ENTRIES, help="LRU cap on cached responses (0 = no cap).")
+    parser.add_argument("--bucket", action="store_true",
+                        help="Round inputs (year to decade, ARV/repairs/sqft/MAO to bands) so similar leads share one justification.")
+    single = parser.add_argument_group("single offer (prompted for when left out)")
+    single.add_argument("--arv", type=float)
+    single.add_argument("--repairs", type=float)
+    single.add_argument("--year-built", type=int)
+    single.add_argument("--sqft", type=int)
+    single.add_argument("--ownership-years", type=int)
+    single.add_argument("--tier", type=int, choices=[1, 2, 3], help="1: Hot/Premium | 2: Standard | 3: High Risk")
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else ResponseCache(args.cache, args.cache_ttl_days, args.cache_max_entries)
+
+    if args.batch:
+        asyncio.run(run_batch(args.batch, args.output, concurrency=args.concurrency, rpm=args.rpm,
+                              tpm=args.tpm, max_retries=args.max_retries, base_url=args.base_url,
+                              cache=cache, bucket=args.bucket))
+        return
+
     print("--- THE ROYCE PROTOCOL v1.0 ---")
     
-    # Inputs
-    arv = float(input("Enter ARV: "))
-    repairs = float(input("Enter Estimated Repairs: "))
-    year_built = int(input("Enter Year Built: "))
-    sqft = int(input("Enter Square Footage: "))
-    ownership_years = int(input("Years of Ownership: "))
+    # Inputs (prompted only for values not given on the command line)
+    arv = ask(args.arv, "Enter ARV: ", float)
+    repairs = ask(args.repairs, "Enter Estimated Repairs: ", float)
+    year_built = ask(args.year_built, "Enter Year Built: ", int)
+    sqft = ask(args.sqft, "Enter Square Footage: ", int)
+    ownership_years = ask(args.ownership_years, "Years of Ownership: ", int)
     
-    print("\nSelect Risk Tier:")
-    print("1: Hot/Premium | 2: Standard | 3: High Risk")
-    risk_tier = int(input("Tier: "))
+    if args.tier is None:
+        print("\nSelect Risk Tier:")
+        print("1: Hot/Premium | 2: Standard | 3: High Risk")
+    risk_tier = ask(args.tier, "Tier: ", int)
 
     # Calculation
     mao = calculate_expert_mao(arv, repairs, risk_tier)
 
     # AI Reasoning
     print("\nGenerating Expert Justification...\n")
-    justification = ai_offer_analyst(arv, repairs, year_built, sqft, ownership_years, mao)
+    justification = ai_offer_analyst(arv, repairs, year_built, sqft, ownership_years, mao,
+                                     cache=False if cache is None else cache, bucket=args.bucket)
 
     # Output
     print("="*40)
     print(f"FINAL MAO: ${mao:,.2f}")
     print("="*40)
     print(justification)
+    if cache is not None:
+        print(cache.summary())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
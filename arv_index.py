@@ -0,0 +1,297 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+
+import data_cache
+import hcad_stream
+
+# --- THE COMPS ARV INDEX ---
+# Assessed value (tot_mkt_val / Est Value) is not what a house sells for after the rehab.
+# This index estimates ARV from comparable accounts instead: residential accounts in the same
+# zip with a similar size and age. It is built once from the county file and saved to disk.
+#
+#   comps:  accounts sorted by (zip, log sqft). A lead's candidates are the COMP_WINDOW nearest
+#           by sqft on each side within its zip, re-ranked by sqft + year distance. The
+#           ARV_QUANTILE of the K_COMPS nearest $/sqft times the lead's sqft is the ARV.
+#   bands:  per (zip, sqft band) and per zip $/sqft at the same quantile, used when a zip
+#           has fewer than MIN_COMPS comps. County-wide is the last resort.
+#
+# The quantile sits above the median because a renovated house prices like the better
+# houses around it. HCAD publishes no sale prices, so comps are valued at tot_mkt_val.
+# Lookups are numpy over blocks of leads, with no per-lead Python.
+ARV_INDEX = "arv_index.npz"
+INDEX_VERSION = 1
+DEFAULT_SOURCE = "real_acct.txt"
+
+K_COMPS = 10
+COMP_WINDOW = 20          # candidates per side, before re-ranking on year
+MIN_COMPS = 5
+ARV_QUANTILE = 0.75
+YEAR_WEIGHT = 1 / 40      # 40 years apart weighs like double / half the sqft (1.0 in log sqft)
+LOOKUP_BLOCK = 100_000
+SQFT_BANDS = [0, 1000, 1500, 2000, 2500, 3000, 4000, np.inf]
+
+# Which accounts count as comps
+COMP_CLASS_PREFIX = 'A'   # residential state classes
+COMP_SQFT = (400, 10_000)
+COMP_MIN_VALUE = 20_000
+
+METHODS = np.array(['none', 'comps', 'zip_band', 'zip', 'county'])
+
+
+def _zip5(values):
+    return pd.Series(values).astype(str).str.strip().str[:5]
+
+
+def _numbers(values):
+    """Floats from numeric or vendor-formatted text ('2,000', '$250,000')."""
+    values = pd.Series(values)
+    if not pd.api.types.is_numeric_dtype(values):
+        values = values.astype(str).str.replace(r"[,$\s]", "", regex=True)
+    return pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+
+
+def _band(sqft):
+    return np.searchsorted(SQFT_BANDS, np.asarray(sqft, dtype=float), side='right') - 1
+
+
+def _params():
+    """Everything the index depends on besides the source (JSON round-tripped, as stored)."""
+    return json.loads(json.dumps([K_COMPS, COMP_WINDOW, MIN_COMPS, ARV_QUANTILE, YEAR_WEIGHT, SQFT_BANDS[1:-1],
+                                  COMP_CLASS_PREFIX, COMP_SQFT, COMP_MIN_VALUE]))
+
+
+def _comps(chunk):
+    """Chunk -> comp rows (zip, log sqft, year, $/sqft)."""
+    sqft = chunk['bld_ar'].astype(float)
+    value = chunk['tot_mkt_val'].astype(float)
+    keep = (chunk['state_class'].str.startswith(COMP_CLASS_PREFIX, na=False)
+            & sqft.between(*COMP_SQFT) & (value >= COMP_MIN_VALUE) & chunk['yr_blt'].notna())
+    return pd.DataFrame({
+        'zip': _zip5(chunk.loc[keep, 'site_addr_3']).to_numpy(),
+        'log_sqft': np.log(sqft[keep].to_numpy()),
+        'year': chunk.loc[keep, 'yr_blt'].to_numpy(dtype=float),
+        'ppsf': (value[keep] / sqft[keep]).to_numpy(),
+    })
+
+
+def build_index(source=DEFAULT_SOURCE, path=ARV_INDEX, sep=None):
+    """Streams `source` once and writes the comps index to `path`. Returns the number of comps."""
+    sep = sep or data_cache.default_sep(source)
+    print(f"Building ARV comps index from {source} (one-time)...")
+    parts = [_comps(chunk) for chunk in hcad_stream.iter_hcad_chunks(source, sep=sep)]
+    comps = pd.concat(parts, ignore_index=True)
+    comps = comps[comps['zip'].str.fullmatch(r'\d{5}')]
+
+    codes = comps['zip'].to_numpy(dtype='U5')
+    zips = np.unique(codes)
+    zip_id = np.searchsorted(zips, codes)
+    order = np.lexsort((comps['log_sqft'].to_numpy(), zip_id))
+    zip_id = zip_id[order]
+    log_sqft = comps['log_sqft'].to_numpy()[order]
+    starts = np.searchsorted(zip_id, np.arange(len(zips)), side='left')
+    ends = np.searchsorted(zip_id, np.arange(len(zips)), side='right')
+
+    # Fallback $/sqft per (zip, band), per zip and county-wide
+    ppsf = comps['ppsf'].to_numpy()[order]
+    bands = _band(np.exp(log_sqft))
+    band_stats = pd.Series(ppsf).groupby([zip_id, bands]).quantile(ARV_QUANTILE)
+    band_counts = pd.Series(ppsf).groupby([zip_id, bands]).size()
+    band_table = np.full((len(zips), len(SQFT_BANDS) - 1), np.nan)
+    reliable = band_counts.to_numpy() >= MIN_COMPS
+    band_table[band_stats.index.get_level_values(0)[reliable],
+               band_stats.index.get_level_values(1)[reliable]] = band_stats.to_numpy()[reliable]
+    zip_table = pd.Series(ppsf).groupby(zip_id).quantile(ARV_QUANTILE).reindex(range(len(zips))).to_numpy()
+
+    st = os.stat(source)
+    meta = {
+        'version': INDEX_VERSION, 'source': os.path.abspath(source), 'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns, 'sha1': data_cache.source_hash(source), 'comps': int(len(ppsf)),
+        'params': _params(),
+    }
+    tmp = path + '.tmp.npz'
+    np.savez(tmp, zips=zips, key=zip_id * 100.0 + log_sqft, log_sqft=log_sqft,
+             year=comps['year'].to_numpy()[order], ppsf=ppsf, starts=starts, ends=ends,
+             band_table=band_table, zip_table=zip_table,
+             county=np.array([np.quantile(ppsf, ARV_QUANTILE) if len(ppsf) else np.nan]),
+             meta=np.array(json.dumps(meta)))
+    os.replace(tmp, path)
+    return len(ppsf)
+
+
+def _index_meta(path):
+    try:
+        with np.load(path) as data:
+            return json.loads(str(data['meta']))
+    except (OSError, KeyError, ValueError):
+        return {}
+
+
+def index_is_fresh(source, path=ARV_INDEX):
+    """True if `path` was built (by this version and these parameters) from the current `source`."""
+    if not os.path.exists(path):
+        return False
+    meta = _index_meta(path)
+    if meta.get('version') != INDEX_VERSION or meta.get('source') != os.path.abspath(source):
+        return False
+    if meta.get('params') != _params():
+        return False
+    st = os.stat(source)
+    if meta.get('size') != st.st_size:
+        return False
+    if meta.get('mtime_ns') == st.st_mtime_ns:
+        return True
+    return meta.get('sha1') == data_cache.source_hash(source)
+
+
+def load_index(source=DEFAULT_SOURCE, path=ARV_INDEX):
+    """The index as a dict of arrays, (re)built first if missing or `source` has changed."""
+    if os.path.exists(source) and not index_is_fresh(source, path):
+        build_index(source, path)
+    elif not os.path.exists(path):
+        raise FileNotFoundError(source)
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def _lookup_block(index, zip_id, log_sqft, year):
+    """Comps $/sqft and comp count for one block of leads (zip_id -1 = unknown zip)."""
+    n = len(zip_id)
+    known = zip_id >= 0
+    safe_zip = np.where(known, zip_id, 0)
+    pos = np.searchsorted(index['key'], safe_zip * 100.0 + np.nan_to_num(log_sqft))
+    idx = pos[:, None] + np.arange(-COMP_WINDOW, COMP_WINDOW)[None, :]
+    valid = ((idx >= index['starts'][safe_zip][:, None]) & (idx < index['ends'][safe_zip][:, None])
+             & known[:, None] & ~np.isnan(log_sqft)[:, None])
+    idx = np.clip(idx, 0, max(len(index['key']) - 1, 0))
+
+    dist = np.abs(index['log_sqft'][idx] - log_sqft[:, None])
+    year_gap = np.abs(index['year'][idx] - year[:, None]) * YEAR_WEIGHT
+    dist = dist + np.where(np.isnan(year_gap), 0.0, year_gap)
+    dist[~valid] = np.inf
+
+    k = min(K_COMPS, dist.shape[1])
+    nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+    rows = np.arange(n)[:, None]
+    chosen = valid[rows, nearest]
+    values = np.where(chosen, index['ppsf'][idx[rows, nearest]], np.nan)
+    count = chosen.sum(axis=1)
+
+    # Row-wise quantile over the comps found (NaNs sort last), as np.quantile interpolates it
+    values.sort(axis=1)
+    pos = ARV_QUANTILE * np.maximum(count - 1, 0)
+    lo = np.floor(pos).astype(np.intp)
+    hi = np.minimum(lo + 1, np.maximum(count - 1, 0))
+    low, high = values[np.arange(n), lo], values[np.arange(n), hi]
+    ppsf = low + (high - low) * (pos - lo)
+    ppsf[count < MIN_COMPS] = np.nan
+    return ppsf, count
+
+
+def estimate(index, zips, sqft, year=None):
+    """
+    ARV for every lead: DataFrame of arv, ppsf, comps (number used) and method
+    ('comps', 'zip_band', 'zip', 'county', or 'none' when the lead has no usable sqft).
+    """
+    sqft = _numbers(sqft)
+    n = len(sqft)
+    year = np.full(n, np.nan) if year is None else _numbers(year)
+    codes = _zip5(zips).to_numpy()
+    zip_id = pd.Index(index['zips']).get_indexer(codes)
+    log_sqft = np.log(np.where(sqft > 0, sqft, np.nan))
+
+    ppsf = np.full(n, np.nan)
+    comps = np.zeros(n, dtype=np.int32)
+    for start in range(0, n, LOOKUP_BLOCK):
+        block = slice(start, start + LOOKUP_BLOCK)
+        ppsf[block], comps[block] = _lookup_block(index, zip_id[block], log_sqft[block], year[block])
+    method = np.where(np.isnan(ppsf), 0, 1)
+
+    # Thin zips fall back to the precomputed band / zip / county $/sqft
+    known = zip_id >= 0
+    band = np.clip(_band(sqft), 0, len(SQFT_BANDS) - 2)
+    fallbacks = [
+        (2, np.where(known, index['band_table'][np.where(known, zip_id, 0), band], np.nan)),
+        (3, np.where(known, index['zip_table'][np.where(known, zip_id, 0)], np.nan)),
+        (4, np.full(n, index['county'][0])),
+    ]
+    for code, values in fallbacks:
+        fill = np.isnan(ppsf) & ~np.isnan(values)
+        ppsf[fill] = values[fill]
+        method[fill] = code
+    usable = ~np.isnan(log_sqft)
+    ppsf[~usable] = np.nan
+    method[~usable] = 0
+
+    return pd.DataFrame({
+        'arv': np.round(ppsf * sqft, -2),
+        'ppsf': np.round(ppsf, 2),
+        'comps': np.where(method == 1, comps, 0),
+        'method': METHODS[method],
+    })
+
+
+def arv_for(df, zip_col, sqft_col, year_col=None, fallback_col=None, source=DEFAULT_SOURCE, index=None):
+    """Comps ARV per row of `df`; rows the index cannot price keep `fallback_col` (assessed value)."""
+    index = index if index is not None else load_index(source)
+    est = estimate(index, df[zip_col], df[sqft_col], df[year_col] if year_col else None)
+    arv = pd.Series(est['arv'].to_numpy(), index=df.index)
+    if fallback_col:
+        arv = arv.fillna(pd.Series(_numbers(df[fallback_col]), index=df.index))
+    return arv
+
+
+def source_key(source=DEFAULT_SOURCE):
+    """Content hash of the comps source (for stage fingerprints), or None if it is missing."""
+    return data_cache.source_hash(source) if os.path.exists(source) else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comps-based ARV: build the index or price a lead list.")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="County file the comps come from.")
+    parser.add_argument("--index", default=ARV_INDEX, help="Saved comps index.")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index even if the source is unchanged.")
+    parser.add_argument("--input", "-i", help="Lead list (CSV) to price; adds ARV, ARV_PPSF, ARV_Comps, ARV_Method.")
+    parser.add_argument("--output", "-o", default="leads_with_arv.csv")
+    parser.add_argument("--zip-col", default="site_addr_3")
+    parser.add_argument("--sqft-col", default="bld_ar")
+    parser.add_argument("--year-col", default="yr_blt", help="Empty string to match on sqft only.")
+    parser.add_argument("--bench", type=int, metavar="N", help="Time ARV lookups for N leads drawn from the county.")
+    args = parser.parse_args()
+
+    if args.rebuild and os.path.exists(args.source):
+        build_index(args.source, args.index)
+    index = load_index(args.source, args.index)
+    print(f"Index {args.index}: {len(index['ppsf']):,} comps in {len(index['zips']):,} zips.")
+
+    if args.input:
+        leads = pd.read_csv(args.input, dtype=str)
+        start = time.perf_counter()
+        est = estimate(index, leads[args.zip_col], leads[args.sqft_col],
+                       leads[args.year_col] if args.year_col else None)
+        seconds = time.perf_counter() - start
+        leads['ARV'] = est['arv'].to_numpy()
+        leads['ARV_PPSF'] = est['ppsf'].to_numpy()
+        leads['ARV_Comps'] = est['comps'].to_numpy()
+        leads['ARV_Method'] = est['method'].to_numpy()
+        leads.to_csv(args.output, index=False)
+        print(f"Priced {len(leads):,} leads in {seconds:.2f}s: {est['method'].value_counts().to_dict()}")
+        print(f"SUCCESS: {args.output}")
+
+    if args.bench:
+        rng = np.random.default_rng(0)
+        pick = rng.integers(0, len(index['ppsf']), args.bench)
+        zips = index['zips'][np.searchsorted(index['starts'], pick, side='right') - 1]
+        sqft = np.exp(index['log_sqft'][pick]) * rng.uniform(0.8, 1.25, args.bench)
+        start = time.perf_counter()
+        est = estimate(index, zips, sqft, index['year'][pick])
+        seconds = time.perf_counter() - start
+        print(f"{args.bench:,} lookups in {seconds:.2f}s ({args.bench / seconds:,.0f} leads/s): "
+              f"{est['method'].value_counts().to_dict()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+import hcad_stream
+
+# --- COUNTY FRAME: MEMORY PER COLUMN ---
+# Loads the same HCAD columns three ways and prints deep memory per column:
+#   legacy  - pd.read_csv defaults (object strings, float64/int64), how the scripts used to load
+#   typed   - hcad_stream's fixed dtypes (float32 numbers)
+#   compact - hcad_stream.load_county(compact=True): categoricals, downcast ints, Arrow strings
+# then checks both buy boxes select exactly the same accounts on the compact frame.
+COLUMNS = ['acct'] + hcad_stream.HCAD_COLUMNS
+MASKS = {
+    'gold': hcad_stream.gold_digger_mask,
+    'residential': hcad_stream.residential_mask,
+}
+
+
+def load_legacy(path, sep='\t'):
+    header = hcad_stream.read_header(path, sep=sep)
+    return pd.read_csv(path, sep=sep, usecols=[c for c in header if c in COLUMNS], low_memory=False,
+                       quoting=hcad_stream.quoting_for(sep), encoding_errors='replace',
+                       dtype={c: object for c in hcad_stream.TEXT_COLUMNS})
+
+
+def _comparable(col):
+    """Numbers as float64 (NaN for missing), text as object (None for missing)."""
+    if col.name in hcad_stream.NUMERIC_DTYPES:
+        return col.to_numpy(dtype='float64', na_value=np.nan)
+    return col.astype(object).where(col.notna(), None).to_numpy()
+
+
+def same_selection(a, b, mask_fn):
+    """Same accounts in the same order with the same values under mask_fn."""
+    left = a[mask_fn(a)]
+    right = b[mask_fn(b)]
+    if len(left) != len(right):
+        return False
+    for col in left.columns:
+        x, y = _comparable(left[col]), _comparable(right[col])
+        if col in hcad_stream.NUMERIC_DTYPES:
+            if not np.array_equal(x, y, equal_nan=True):
+                return False
+        elif not (x == y).all():
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory per column: legacy vs typed vs compact county frame.")
+    parser.add_argument("input", nargs="?", default="real_acct.txt", help="Tab-delimited real_acct file.")
+    args = parser.parse_args()
+
+    frames = {}
+    for name, load in [
+        ('legacy', lambda: load_legacy(args.input)),
+        ('typed', lambda: hcad_stream.load_county(args.input, COLUMNS, compact=False, use_cache=False)),
+        ('compact', lambda: hcad_stream.load_county(args.input, COLUMNS, compact=True, use_cache=False)),
+    ]:
+        start = time.perf_counter()
+        frames[name] = load()
+        print(f"Loaded {name:<7} in {time.perf_counter() - start:.1f}s")
+
+    report = pd.concat({name: hcad_stream.memory_report(df) for name, df in frames.items()}, axis=1)
+    print(f"\n{len(frames['compact']):,} accounts, {len(COLUMNS)} columns (MB, deep):")
+    print(report.to_string(float_format=lambda v: f"{v:,.1f}"))
+
+    legacy_mb = report.loc['TOTAL', ('legacy', 'MB')]
+    for name in ('typed', 'compact'):
+        print(f"{name}: {legacy_mb / report.loc['TOTAL', (name, 'MB')]:.1f}x smaller than legacy")
+
+    for name, mask_fn in MASKS.items():
+        same = all(same_selection(frames[other], frames['compact'], mask_fn) for other in ('legacy', 'typed'))
+        print(f"{name} buy box: {'OK' if same else 'MISMATCH'} "
+              f"({int(mask_fn(frames['compact']).fillna(False).sum()):,} accounts)")
+
+
+if __name__ == "__main__":
+    main()
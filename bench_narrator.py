@@ -0,0 +1,103 @@
+import argparse
+import asyncio
+import csv
+import os
+import tempfile
+import time
+
+import ai_narrator
+import stub_chat_server
+
+# --- BATCH NARRATOR: END-TO-END CHECK AGAINST THE LOCAL STUB ---
+# Runs ai_narrator.run_batch against stub_chat_server with injected 429s and 500s and checks
+# that every lead is written once, that 429/5xx are retried, and that a crashed run resumes
+# with only the leads it had not finished. Needs openai and pandas; no API key or network.
+DEFAULT_LEADS = 200
+
+
+def write_leads(path, n):
+    """n leads with distinct ARVs (so no two share a prompt); every 10th has blank repairs/ownership."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "arv", "repairs", "year_built", "sqft", "ownership_years", "mao"])
+        for i in range(n):
+            blank = i % 10 == 0
+            writer.writerow([f"L{i:05d}", 150_000 + i * 1_000, "" if blank else 20_000 + i * 10,
+                             1940 + i % 80, 1_000 + i % 2_000, "" if blank else i % 30, 90_000 + i * 500])
+
+
+def written_ids(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row["lead_id"] for row in csv.DictReader(f)]
+
+
+def run_stub(leads_path, output_path, max_retries, **stub):
+    """One batch run against a fresh stub; returns (run_batch stats, stub request counts)."""
+    server = stub_chat_server.serve(port=0, jitter=0.0, retry_after=0, **stub)
+    try:
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+        stats = asyncio.run(ai_narrator.run_batch(leads_path, output_path, concurrency=16, rpm=1_000_000,
+                                                  tpm=1_000_000_000, max_retries=max_retries,
+                                                  base_url=base_url, cache=None))
+    finally:
+        server.shutdown()
+        server.server_close()
+    return stats, dict(server.state.counts)
+
+
+def check(ok, message):
+    if not ok:
+        raise SystemExit(f"CHECK FAILED: {message}")
+
+
+def run(n, latency):
+    ai_narrator.BACKOFF_BASE = 0.01  # the stub's Retry-After is 0; keep retries fast
+    expected = [f"L{i:05d}" for i in range(n)]
+    with tempfile.TemporaryDirectory() as tmp:
+        leads_path = os.path.join(tmp, "leads.csv")
+        write_leads(leads_path, n)
+
+        # 1. Retries: 429s and 500s on ~30% of requests, every lead still narrated
+        start = time.perf_counter()
+        output = os.path.join(tmp, "retries.csv")
+        stats, counts = run_stub(leads_path, output, max_retries=10, latency=latency,
+                                 rate_limit_rate=0.15, error_rate=0.15, seed=1)
+        check(stats["failed"] == 0, f"{stats['failed']} leads failed despite retries")
+        check(sorted(written_ids(output)) == expected, "output is missing leads or has repeats")
+        check(counts["429"] > 0 and counts["500"] > 0, f"stub injected no errors: {counts}")
+        check(counts["requests"] == n + counts["429"] + counts["500"],
+              f"{counts['requests']} requests for {n} leads and {counts['429'] + counts['500']} errors")
+        print(f"retries: {n} leads, {counts['429']} x 429 and {counts['500']} x 500 retried "
+              f"({time.perf_counter() - start:.1f}s)")
+
+        # 2. Resume: a run without retries loses some leads, the next run sends only those
+        output = os.path.join(tmp, "resume.csv")
+        first, _ = run_stub(leads_path, output, max_retries=0, latency=latency, error_rate=0.3, seed=2)
+        check(first["failed"] > 0, "first run lost no leads; nothing to resume")
+        check(len(written_ids(output)) == first["ok"], "first run wrote a different number of leads than it reported")
+        second, counts = run_stub(leads_path, output, max_retries=0, latency=latency)
+        check(counts["requests"] == first["failed"],
+              f"resumed run sent {counts['requests']} requests for {first['failed']} unfinished leads")
+        check(sorted(written_ids(output)) == expected, "resumed output is missing leads or has repeats")
+        print(f"resume: first run {first['ok']} ok / {first['failed']} failed, "
+              f"second run sent {counts['requests']} requests")
+
+        # 3. Blank repairs/ownership render as Unknown, never as "$nan"
+        leads = ai_narrator.load_batch_leads(leads_path)
+        prompts = [ai_narrator.build_prompt(l["arv"], l["repairs"], l["year_built"], l["sqft"],
+                                            l["ownership_years"], l["mao"]) for l in leads]
+        check(not any("nan" in p.lower() for p in prompts), "a prompt shows NaN")
+        check("Estimated Repairs: Unknown" in prompts[0], "blank repairs is not shown as Unknown")
+    print("Narrator batch OK: all leads written once, errors retried, resume skips finished leads.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end check of ai_narrator batch mode on the local stub.")
+    parser.add_argument("--leads", type=int, default=DEFAULT_LEADS, help="Leads in the synthetic list.")
+    parser.add_argument("--latency", type=float, default=0.01, help="Stub seconds per response.")
+    args = parser.parse_args()
+    run(args.leads, args.latency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from make_outreach_ready import (
+    clean_phone, choose_action, make_message,
+    clean_phone_series, choose_action_series, make_messages,
+)
+
+# --- OUTREACH FORMATTING: PARITY + TIMING ---
+# Runs the old per-row .apply path and the vectorized path on the same synthetic list,
+# checks the outputs are identical, and prints the before/after timings.
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+PHONE_SAMPLES = [
+    "713-555-1234", "1 (281) 555-9876", "(832)5550000", "15551234567", "555-1234",
+    "", "  713.555.4321 ", None, np.nan, 7135550000, 17135550000.0, "ext 12",
+]
+NAME_SAMPLES = ["John", "  Mary ", "", "nan", "NaN", "José", "O'Neil"]
+OFFER_SAMPLES = [np.nan, 0.0, 79999.99, 80000.0, 80000.5, 125000.5, 126000.5, 1234567.49, -5000.0, 2.5e6]
+
+
+def synthetic_outreach(n: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Owner_Name": rng.choice(np.array(NAME_SAMPLES, dtype=object), n),
+        "Property_Address": [f"{i} Main St " for i in rng.integers(1, 99999, n)],
+        "Phone_Raw": rng.choice(np.array(PHONE_SAMPLES, dtype=object), n),
+        "Offer_Proxy": np.where(rng.random(n) < 0.5,
+                                rng.choice(OFFER_SAMPLES, n),
+                                rng.uniform(-50_000, 900_000, n)),
+    })
+
+
+def legacy(df: pd.DataFrame) -> pd.DataFrame:
+    out = df.copy()
+    out["Action"] = out["Offer_Proxy"].apply(choose_action)
+    out["Phone"] = out["Phone_Raw"].apply(clean_phone)
+    out["Message_Draft"] = out.apply(make_message, axis=1)
+    return out
+
+
+def vectorized(df: pd.DataFrame) -> pd.DataFrame:
+    out = df.copy()
+    out["Action"] = choose_action_series(out["Offer_Proxy"])
+    out["Phone"] = clean_phone_series(out["Phone_Raw"])
+    out["Message_Draft"] = make_messages(out)
+    return out
+
+
+def run(sizes):
+    cols = ["Action", "Phone", "Message_Draft"]
+    print(f"{'rows':>10} | {'apply (s)':>10} | {'vector (s)':>10} | {'speedup':>7}")
+    for n in sizes:
+        df = synthetic_outreach(n)
+
+        t0 = time.perf_counter()
+        old = legacy(df)
+        t1 = time.perf_counter()
+        new = vectorized(df)
+        t2 = time.perf_counter()
+
+        old_csv = old[cols].to_csv(index=False)
+        new_csv = new[cols].to_csv(index=False)
+        if old_csv != new_csv:
+            bad = (old[cols].astype(str) != new[cols].astype(str)).any(axis=1)
+            print(old[bad].head(5).to_string())
+            print(new[bad].head(5).to_string())
+            raise SystemExit(f"PARITY FAILED at {n:,} rows ({int(bad.sum())} rows differ)")
+
+        print(f"{n:>10,} | {t1 - t0:>10.2f} | {t2 - t1:>10.2f} | {(t1 - t0) / (t2 - t1):>6.1f}x")
+    print("Parity OK: outputs are byte-identical.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parity check + timing for the vectorized outreach formatter.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Row counts to test.")
+    args = parser.parse_args()
+    run(args.sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import synth_data
+
+# --- STAGE BENCHMARK SUITE ---
+# Runs the real entry points (scrub, outreach prep, hcad_mvp, ship_ten) on synthetic inputs from
+# synth_data.py, each in its own process so peak RSS is per stage. Records wall time, throughput
+# and peak RSS, and fails (exit 1) when a stage is slower / bigger than the baseline by more
+# than the threshold.
+#
+#   python bench_stages.py --rows 10000 100000 --save-baseline bench_baseline.json
+#   python bench_stages.py --rows 10000 100000 --baseline bench_baseline.json
+DATA_DIR = ".bench_data"
+DEFAULT_ROWS = [10_000, 100_000]
+DEFAULT_THRESHOLD = 0.20
+# Absolute slack on top of the threshold, so sub-second stages don't flap on timer noise
+NOISE_FLOOR = {'seconds': 0.25, 'peak_rss_mb': 10.0}
+RESULTS_FILE = "bench_results.json"
+VENDOR_WIDTH = 150  # vendor exports carry ~150 columns, of which we use 6
+
+STAGES = ['scrub', 'outreach', 'hcad_mvp', 'ship_ten']
+
+
+def data_dir(rows, seed):
+    return os.path.join(DATA_DIR, f"{rows}_{seed}")
+
+
+def ensure_inputs(rows, seed=0):
+    """Generates each stage's inputs once per (rows, seed); the files are deterministic."""
+    folder = data_dir(rows, seed)
+    os.makedirs(folder, exist_ok=True)
+    inputs = {
+        'real_acct.txt': lambda p: synth_data.write_hcad(p, rows, seed),
+        '1st.xlsx': lambda p: synth_data.write_vendor(p, rows, 'propstream', seed=seed),
+        'vendor.csv': lambda p: synth_data.write_vendor(p, rows, 'batchleads', VENDOR_WIDTH, seed),
+    }
+    for name, make in inputs.items():
+        path = os.path.join(folder, name)
+        if not os.path.exists(path):
+            print(f"Generating {path}...")
+            tmp = os.path.join(folder, 'tmp_' + name)  # keeps the extension the writer looks at
+            make(tmp)
+            os.replace(tmp, path)
+    # hcad_mvp.py reads 'real_acct' (no extension)
+    alias = os.path.join(folder, 'real_acct')
+    if not os.path.exists(alias):
+        try:
+            os.link(os.path.join(folder, 'real_acct.txt'), alias)
+        except OSError:
+            shutil.copyfile(os.path.join(folder, 'real_acct.txt'), alias)
+    return folder
+
+
+def run_stage(stage):
+    """Child side: runs one stage in the current directory. Returns its result dict."""
+    with open(os.devnull, 'w') as quiet:
+        stdout = sys.stdout
+        sys.stdout = quiet
+        try:
+            start = time.perf_counter()
+            if stage == 'scrub':
+                import scrub_new_list
+                out = scrub_new_list.attack('1st.xlsx', 'bench_scrub.csv')
+                ok = out is not None
+            elif stage == 'outreach':
+                import make_outreach_ready
+                make_outreach_ready.process_file('vendor.csv', 'bench_outreach.csv')
+                ok = os.path.exists('bench_outreach.csv')
+            elif stage == 'hcad_mvp':
+                import hcad_mvp
+                hcad_mvp.generate_mvp()
+                ok = os.path.exists('houston_offers_v1.csv')
+            elif stage == 'ship_ten':
+                import ship_ten
+                ship_ten.ship_ten()
+                ok = os.path.exists('houston_10_drafts.csv')
+            else:
+                raise ValueError(f"unknown stage {stage}")
+            seconds = time.perf_counter() - start
+        finally:
+            sys.stdout = stdout
+    return {'ok': ok, 'seconds': seconds, 'peak_rss_mb': peak_rss_mb()}
+
+
+def peak_rss_mb():
+    """This process's peak RSS in MB (None on Windows, which has no resource module)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(stage, rows, seed=0, repeat=1, warm=False):
+    """Best-of-`repeat` child runs of `stage`. Cold by default (columnar cache cleared before each run)."""
+    folder = ensure_inputs(rows, seed)
+    script = os.path.abspath(__file__)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(script),
+                                                                     os.environ.get('PYTHONPATH')])))
+    best = None
+    for i in range(repeat + (1 if warm else 0)):
+        if not warm:
+            shutil.rmtree(os.path.join(folder, '.data_cache'), ignore_errors=True)
+        proc = subprocess.run([sys.executable, script, '--run-stage', stage], cwd=folder, env=env,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise SystemExit(f"Stage {stage} failed at {rows:,} rows:\n{proc.stderr[-2000:]}")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        if not result['ok']:
+            raise SystemExit(f"Stage {stage} produced no output at {rows:,} rows.")
+        if warm and i == 0:
+            continue  # priming run
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    best['rows'] = rows
+    best['rows_per_sec'] = rows / best['seconds'] if best['seconds'] else 0.0
+    return best
+
+
+def compare(results, baseline, threshold):
+    """Regressions (list of messages) of `results` against `baseline` beyond `threshold`."""
+    problems = []
+    for key, res in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric in ('seconds', 'peak_rss_mb'):
+            if res[metric] is None or base.get(metric) is None:
+                continue
+            limit = max(base[metric] * (1 + threshold), base[metric] + NOISE_FLOOR[metric])
+            if res[metric] > limit:
+                problems.append(f"{key}: {metric} {res[metric]:.2f} > {base[metric]:.2f} (+{threshold:.0%})")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each pipeline stage on synthetic data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS,
+                        help="Input sizes (up to the full county, 1600000).")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage; the fastest is kept.")
+    parser.add_argument("--warm", action="store_true", help="Keep the columnar cache between runs (primed first).")
+    parser.add_argument("--baseline", help="Compare against this results file and fail on regressions.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown / memory growth vs the baseline (0.20 = 20%%).")
+    parser.add_argument("--save-baseline", metavar="FILE", help="Also write the results to FILE.")
+    parser.add_argument("--run-stage", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_stage:
+        print(json.dumps(run_stage(args.run_stage)))
+        return
+
+    print(f"{'stage':>9} | {'rows':>10} | {'seconds':>8} | {'rows/s':>11} | {'peak MB':>8}")
+    results = {}
+    for rows in args.rows:
+        for stage in args.stages:
+            res = measure(stage, rows, args.seed, args.repeat, args.warm)
+            results[f"{stage}@{rows}"] = res
+            print(f"{stage:>9} | {rows:>10,} | {res['seconds']:>8.2f} | {res['rows_per_sec']:>11,.0f} | "
+                  f"{'n/a' if res['peak_rss_mb'] is None else format(res['peak_rss_mb'], '.0f'):>8}")
+
+    for path in filter(None, [RESULTS_FILE, args.save_baseline]):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+    print(f"Results saved to {RESULTS_FILE}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(results, json.load(f), args.threshold)
+        if problems:
+            print("REGRESSION:")
+            for p in problems:
+                print(f"  {p}")
+            sys.exit(1)
+        print(f"No regressions vs {args.baseline} (threshold {args.threshold:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
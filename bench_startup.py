@@ -0,0 +1,66 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# --- STARTUP BENCHMARK ---
+# Imports each module in a fresh interpreter (what the pipeline, a worker process or a one-off
+# CLI call pays before doing any work) and reports the import time, which heavy dependencies
+# came along, and anything the import printed or asked for. Importing a module must not do work.
+#
+#   python bench_startup.py
+#   python bench_startup.py --modules property_calc ai_narrator --repeat 10
+MODULES = [
+    'stage_metrics', 'property_calc', 'ai_narrator', 'skip_prep', 'hcad_stream', 'hcad_parallel',
+    'scrub_new_list', 'make_outreach_ready', 'hcad_mvp', 'ship_ten', '1980_1500_pipeline',
+]
+HEAVY = ['numpy', 'pandas', 'pyarrow', 'openpyxl', 'openai']
+DEFAULT_REPEAT = 5
+
+CHILD = """
+import importlib, json, sys, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+seconds = time.perf_counter() - start
+print('\\n' + json.dumps({'seconds': seconds, 'heavy': [m for m in sys.argv[2:] if m in sys.modules]}))
+"""
+
+
+def measure(module, repeat=DEFAULT_REPEAT):
+    """Best-of-`repeat` cold import of `module`: dict of ms, heavy deps loaded, and import-time output."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-c', CHILD, module] + HEAVY, cwd=here, capture_output=True,
+                              text=True, stdin=subprocess.DEVNULL, timeout=120)
+        if proc.returncode != 0:
+            error = (proc.stderr.strip().splitlines() or ['failed'])[-1]
+            return {'ms': None, 'heavy': [], 'output': '', 'error': error}
+        printed, _, last = proc.stdout.rstrip('\n').rpartition('\n')
+        result = json.loads(last)
+        run = {'ms': result['seconds'] * 1000, 'heavy': result['heavy'], 'output': printed.strip(), 'error': None}
+        if best is None or run['ms'] < best['ms']:
+            best = run
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold import time and import side effects per module.")
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per module; the fastest is kept.")
+    args = parser.parse_args()
+
+    bare = measure('json', args.repeat)['ms']
+    print(f"{'module':>20} | {'import ms':>9} | {'loads':<28} | side effects")
+    for module in args.modules:
+        res = measure(module, args.repeat)
+        if res['error']:
+            print(f"{module:>20} | {'FAILED':>9} | {'':<28} | {res['error'][:60]}")
+            continue
+        effects = f"printed {len(res['output'].splitlines())} line(s)" if res['output'] else "none"
+        print(f"{module:>20} | {res['ms'] - bare:>9.0f} | {', '.join(res['heavy']) or '-':<28} | {effects}")
+
+
+if __name__ == "__main__":
+    main()
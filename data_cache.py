@@ -0,0 +1,306 @@
+import hashlib
+import io
+import json
+import os
+import pandas as pd
+
+import hcad_stream
+import xlsx_reader
+
+# --- THE COLUMNAR CACHE ---
+# The first read of a county dump converts it to Parquet under CACHE_DIR (vendor Excel files
+# are streamed by xlsx_reader instead, only the needed columns).
+# Later runs read only the columns they need straight from that file.
+# A cache entry is rebuilt when the source's size changes, or when its mtime changes
+# AND its content hash no longer matches (a plain re-download of the same file is free).
+CACHE_DIR = ".data_cache"
+CACHE_VERSION = 1
+BUILD_CHUNK_ROWS = 250_000
+HASH_BLOCK_BYTES = 8 * 1024 * 1024
+
+_warned_no_parquet = False
+
+
+def parquet_available():
+    """Parquet needs pyarrow; without it every loader falls back to parsing the source."""
+    global _warned_no_parquet
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        if not _warned_no_parquet:
+            print("NOTE: pyarrow not installed, reading sources directly (pip install pyarrow to enable the cache).")
+            _warned_no_parquet = True
+        return False
+
+
+def is_excel(path):
+    return str(path).lower().endswith(('.xlsx', '.xls'))
+
+
+def default_sep(path):
+    """HCAD dumps are tab-delimited; anything named .csv is comma-delimited."""
+    return ',' if str(path).lower().endswith('.csv') else '\t'
+
+
+def file_hash(path):
+    """SHA-1 of the whole file, read in blocks."""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class _HashingFile(io.RawIOBase):
+    """Read-only file that feeds every byte it returns into `digest` (hash while parsing)."""
+
+    def __init__(self, raw, digest):
+        self.raw = raw
+        self.digest = digest
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self.raw.readinto(buffer)
+        if n:
+            self.digest.update(memoryview(buffer)[:n])
+        return n
+
+
+def cache_paths(path):
+    """Parquet + metadata paths for a source, unique per absolute path."""
+    key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:12]
+    stem = f"{os.path.basename(path)}.{key}"
+    return (os.path.join(CACHE_DIR, stem + '.parquet'),
+            os.path.join(CACHE_DIR, stem + '.json'))
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path, meta):
+    tmp = meta_path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, meta_path)
+
+
+def cache_is_fresh(path):
+    """True if the cached copy of `path` still matches the source file."""
+    parquet_path, meta_path = cache_paths(path)
+    meta = _read_meta(meta_path)
+    if not meta or meta.get('version') != CACHE_VERSION or not os.path.exists(parquet_path):
+        return False
+
+    st = os.stat(path)
+    if st.st_size != meta['size']:
+        return False
+    if st.st_mtime_ns == meta['mtime_ns']:
+        return True
+
+    # Touched or re-copied: only rebuild if the bytes actually changed
+    if file_hash(path) != meta['sha1']:
+        return False
+    meta['mtime_ns'] = st.st_mtime_ns
+    _write_meta(meta_path, meta)
+    return True
+
+
+def _text_schema(header):
+    import pyarrow as pa
+    fields = []
+    for col in header:
+        dtype = hcad_stream.NUMERIC_DTYPES.get(col)
+        fields.append(pa.field(col, pa.from_numpy_dtype(dtype) if dtype else pa.string()))
+    return pa.schema(fields)
+
+
+def _build_text_cache(path, out_path, sep):
+    """
+    Parses a delimited county file chunk by chunk into one Parquet file. Returns the file's
+    SHA-1, taken from the same read (the county file is not read a second time to hash it).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    header = hcad_stream.read_header(path, sep=sep)
+    schema = _text_schema(header)
+    text_cols = [c for c in header if c not in hcad_stream.NUMERIC_DTYPES]
+    digest = hashlib.sha1()
+    with open(path, 'rb', buffering=0) as raw, \
+            io.BufferedReader(_HashingFile(raw, digest), HASH_BLOCK_BYTES) as source:
+        reader = pd.read_csv(
+            source,
+            sep=sep,
+            dtype={c: str for c in text_cols},
+            chunksize=BUILD_CHUNK_ROWS,
+            quoting=hcad_stream.quoting_for(sep),
+            encoding_errors='replace',
+        )
+        with pq.ParquetWriter(out_path, schema) as writer:
+            for chunk in reader:
+                chunk = hcad_stream.coerce_types(chunk)
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        while source.read(HASH_BLOCK_BYTES):  # whatever the parser left unread
+            pass
+    return digest.hexdigest()
+
+
+def build_cache(path, sep=None):
+    """(Re)builds the Parquet copy of `path` and records its fingerprint."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    parquet_path, meta_path = cache_paths(path)
+    tmp_path = parquet_path + '.tmp'
+
+    print(f"Building columnar cache for {path} (one-time)...")
+    st = os.stat(path)
+    sha1 = _build_text_cache(path, tmp_path, sep or default_sep(path))
+    os.replace(tmp_path, parquet_path)
+
+    _write_meta(meta_path, {
+        'version': CACHE_VERSION,
+        'source': os.path.abspath(path),
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'sha1': sha1,
+    })
+    return parquet_path
+
+
+def ensure_cache(path, sep=None):
+    """
+    Returns the Parquet path for `path`, building it if missing or stale (None without pyarrow,
+    and for Excel: xlsx_reader already streams just the needed columns, while a cache would have
+    to load every column of the sheet once to build).
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    if is_excel(path) or not parquet_available():
+        return None
+    if cache_is_fresh(path):
+        return cache_paths(path)[0]
+    return build_cache(path, sep=sep)
+
+
+def _cached_columns(parquet_path, columns):
+    import pyarrow.parquet as pq
+    names = pq.ParquetFile(parquet_path).schema_arrow.names
+    if columns is None:
+        return names
+    return [c for c in names if c in columns]
+
+
+def read_table(path, columns=None, sep=None):
+    """Loads `path` (Excel or delimited text) with only `columns`, via the cache when possible."""
+    parquet_path = ensure_cache(path, sep=sep)
+    if parquet_path:
+        return pd.read_parquet(parquet_path, columns=_cached_columns(parquet_path, columns))
+
+    if is_excel(path):
+        return xlsx_reader.read_xlsx_columns(path, columns=columns)
+    sep = sep or default_sep(path)
+    return pd.read_csv(path, sep=sep, usecols=(lambda c: c in columns) if columns else None,
+                       low_memory=False)
+
+
+def iter_table(path, columns=None, chunksize=BUILD_CHUNK_ROWS, sep=None):
+    """read_table in DataFrames of at most `chunksize` rows (memory stays flat for any file size)."""
+    parquet_path = ensure_cache(path, sep=sep)
+    if parquet_path:
+        yield from iter_parquet_chunks(parquet_path, columns, chunksize)
+        return
+
+    if is_excel(path):
+        yield from xlsx_reader.iter_xlsx_columns(path, columns=columns, chunksize=chunksize)
+        return
+    sep = sep or default_sep(path)
+    yield from pd.read_csv(path, sep=sep, usecols=(lambda c: c in columns) if columns else None,
+                           low_memory=False, chunksize=chunksize)
+
+
+def iter_parquet_chunks(parquet_path, columns, chunksize):
+    """Yields DataFrame chunks of `columns` from a cache file built by ensure_cache."""
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(parquet_path)
+    for batch in pf.iter_batches(batch_size=chunksize, columns=_cached_columns(parquet_path, columns)):
+        yield batch.to_pandas()
+
+
+# --- STAGE RESULTS (pipeline skip-if-unchanged) ---
+# A stage result is stored under a fingerprint of everything that produced it: input content
+# hashes, parameters and the source of the code that ran. Same fingerprint = same result.
+STAGE_DIR = os.path.join(CACHE_DIR, "stages")
+
+
+def source_hash(path):
+    """Content hash of a source file, reusing the hash recorded by a fresh cache entry."""
+    if cache_is_fresh(path):
+        return _read_meta(cache_paths(path)[1])['sha1']
+    return file_hash(path)
+
+
+def fingerprint(*parts):
+    """Stable hash of JSON-able parts (hashes, parameters, module names...)."""
+    blob = json.dumps(parts, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha1(blob).hexdigest()
+
+
+def _stage_path(name, key):
+    return os.path.join(STAGE_DIR, f"{name}.{key}.pkl")
+
+
+def load_stage(name, key):
+    """The cached DataFrame for stage `name` at fingerprint `key`, or None."""
+    path = _stage_path(name, key)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_pickle(path)
+    except Exception:
+        return None
+
+
+def save_stage(name, key, df):
+    """Stores a stage result and drops results from older fingerprints of the same stage."""
+    os.makedirs(STAGE_DIR, exist_ok=True)
+    path = _stage_path(name, key)
+    df.to_pickle(path + '.tmp')
+    os.replace(path + '.tmp', path)
+    for old in os.listdir(STAGE_DIR):
+        if old.startswith(name + '.') and old.endswith('.pkl') and os.path.join(STAGE_DIR, old) != path:
+            os.remove(os.path.join(STAGE_DIR, old))
+
+
+def run_stage(name, key, fn, force=False):
+    """Returns (result, skipped): the cached result for `key`, or fn() (cached when not None)."""
+    if not force:
+        cached = load_stage(name, key)
+        if cached is not None:
+            return cached, True
+    result = fn()
+    if result is not None:
+        save_stage(name, key, result)
+    return result, False
+
+
+# --- SCHEMA PROFILES (vendor header layout -> resolved column mapping) ---
+PROFILE_DIR = os.path.join(CACHE_DIR, "profiles")
+
+
+def load_profile(key):
+    """The column mapping saved for header fingerprint `key`, or None."""
+    return _read_meta(os.path.join(PROFILE_DIR, f"{key}.json"))
+
+
+def save_profile(key, profile):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    _write_meta(os.path.join(PROFILE_DIR, f"{key}.json"), profile)
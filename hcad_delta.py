@@ -0,0 +1,197 @@
+import argparse
+import datetime
+import os
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+
+import hcad_mvp
+import hcad_stream
+import stage_metrics
+
+# --- THE DELTA ENGINE ---
+# HCAD re-publishes the whole county every cycle, but only a sliver of accounts change.
+# We keep one hash per account (keyed by acct) in a local SQLite store, diff each new export
+# against it in a single streaming pass, and only price/draft accounts that are new or changed.
+STATE_DB = "hcad_state.sqlite"
+OUTPUT_FILE = "houston_offers_delta.csv"
+REMOVED_FILE = "houston_removed_accounts.csv"
+
+# A change in any of these fields can change the filter, the offer or the message
+HASH_COLUMNS = list(hcad_stream.HCAD_COLUMNS)
+MASKS = {
+    'gold': hcad_stream.gold_digger_mask,
+    'residential': hcad_stream.residential_mask,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    acct     TEXT PRIMARY KEY,
+    row_hash INTEGER NOT NULL,
+    cycle    INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cycles (
+    cycle    INTEGER PRIMARY KEY,
+    source   TEXT,
+    run_at   TEXT,
+    rows     INTEGER,
+    added    INTEGER,
+    changed  INTEGER,
+    removed  INTEGER
+);
+"""
+
+
+def open_store(path=STATE_DB):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def row_hashes(chunk):
+    """One 64-bit hash per row over HASH_COLUMNS (stored as signed, which is what SQLite holds)."""
+    cols = [c for c in HASH_COLUMNS if c in chunk.columns]
+    return pd.util.hash_pandas_object(chunk[cols], index=False).to_numpy().view('int64')
+
+
+def diff_chunk(conn, chunk, cycle):
+    """
+    Classifies a chunk's rows (one per acct) as new/changed/unchanged and upserts their hashes.
+    An acct already stored by this cycle (a repeat from an earlier chunk) is neither.
+    """
+    accts = chunk['acct'].astype(str).to_numpy()
+    hashes = row_hashes(chunk)
+
+    conn.execute("DELETE FROM incoming")
+    conn.executemany("INSERT OR REPLACE INTO incoming (acct) VALUES (?)", ((a,) for a in accts))
+    known = conn.execute(
+        "SELECT a.acct, a.row_hash, a.cycle FROM accounts a JOIN incoming i ON i.acct = a.acct"
+    ).fetchall()
+
+    # Position lookup rather than .map(): a NaN for new accounts would push the hashes through float64
+    known_accts = pd.Index([a for a, _, _ in known])
+    known_hashes = np.array([h for _, h, _ in known], dtype='int64')
+    known_cycles = np.array([c for _, _, c in known], dtype='int64')
+    pos = known_accts.get_indexer(accts)
+    is_new = pos < 0
+    is_changed = np.zeros(len(accts), dtype=bool)
+    old = ~is_new
+    is_changed[old] = (known_hashes[pos[old]] != hashes[old]) & (known_cycles[pos[old]] != cycle)
+
+    conn.executemany(
+        "INSERT INTO accounts (acct, row_hash, cycle) VALUES (?, ?, ?) "
+        "ON CONFLICT(acct) DO UPDATE SET row_hash = excluded.row_hash, cycle = excluded.cycle",
+        zip(accts.tolist(), hashes.tolist(), [cycle] * len(accts)),
+    )
+    return is_new, is_changed
+
+
+def run_delta(path, store=STATE_DB, output_file=OUTPUT_FILE, removed_file=REMOVED_FILE, mask='gold', sep='\t'):
+    """
+    Streams `path`, diffs it against the state store and writes offers for new/changed
+    accounts that pass the buy box, plus the accounts gone from the roll to removed_file.
+    The store and both files are only updated if the whole pass succeeds. Returns a dict of counts.
+    """
+    mask_fn = MASKS[mask]
+    start = time.perf_counter()
+    conn = open_store(store)
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS incoming (acct TEXT PRIMARY KEY)")
+    cycle = (conn.execute("SELECT MAX(cycle) FROM cycles").fetchone()[0] or 0) + 1
+    counts = {'rows': 0, 'added': 0, 'changed': 0, 'removed': 0, 'offers': 0, 'duplicates': 0}
+
+    tmp_output = output_file + '.tmp'
+    tmp_removed = removed_file + '.tmp'
+    wrote_header = False
+    try:
+        columns = hcad_stream.HCAD_COLUMNS + ['acct']
+        # One pass over the export: no columnar cache copy that would never be read again
+        for chunk in hcad_stream.iter_hcad_chunks(path, columns=columns, sep=sep, use_cache=False):
+            counts['rows'] += len(chunk)
+            # The last row of a repeated acct wins, as it does in the store
+            unique = chunk.drop_duplicates('acct', keep='last')
+            counts['duplicates'] += len(chunk) - len(unique)
+            chunk = unique
+            is_new, is_changed = diff_chunk(conn, chunk, cycle)
+            counts['added'] += int(is_new.sum())
+            counts['changed'] += int(is_changed.sum())
+
+            delta = chunk[is_new | is_changed]
+            leads = delta[mask_fn(delta)]
+            if len(leads):
+                offers = hcad_mvp.build_offers(leads)
+                offers.insert(0, 'acct', leads['acct'].to_numpy())
+                offers.insert(1, 'Change', pd.Series(is_new, index=chunk.index)[leads.index]
+                              .map({True: 'NEW', False: 'CHANGED'}).to_numpy())
+                offers.to_csv(tmp_output, mode='a' if wrote_header else 'w', header=not wrote_header, index=False)
+                wrote_header = True
+                counts['offers'] += len(offers)
+
+        # Accounts that were not in this export are gone from the county roll
+        removed = pd.read_sql_query("SELECT acct FROM accounts WHERE cycle < ?", conn, params=(cycle,))
+        removed.to_csv(tmp_removed, index=False)
+        counts['removed'] = len(removed)
+        conn.execute("DELETE FROM accounts WHERE cycle < ?", (cycle,))
+        conn.execute(
+            "INSERT INTO cycles (cycle, source, run_at, rows, added, changed, removed) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (cycle, os.path.abspath(path), datetime.datetime.now().isoformat(timespec='seconds'),
+             counts['rows'], counts['added'], counts['changed'], counts['removed']),
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        for tmp in (tmp_output, tmp_removed):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        raise
+    finally:
+        conn.close()
+
+    os.replace(tmp_removed, removed_file)
+    if wrote_header:
+        os.replace(tmp_output, output_file)
+    else:
+        pd.DataFrame(columns=['acct', 'Change'] + hcad_mvp.OUTPUT_COLS).to_csv(output_file, index=False)
+
+    counts['seconds'] = time.perf_counter() - start
+    return counts
+
+
+def run_delta_with_metrics(path, **kwargs):
+    """run_delta as a metrics stage: rows in, rows dropped as unchanged / outside the buy box, offers out."""
+    with stage_metrics.stage("hcad_delta", input=path, mask=kwargs.get('mask', 'gold')):
+        counts = run_delta(path, **kwargs)
+        stage_metrics.rows_in(counts['rows'])
+        delta = counts['added'] + counts['changed']
+        stage_metrics.dropped('duplicate_acct', counts['duplicates'])
+        stage_metrics.dropped('unchanged', counts['rows'] - counts['duplicates'] - delta)
+        stage_metrics.dropped('buy_box', delta - counts['offers'])
+        stage_metrics.rows_out(counts['offers'])
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Price only the HCAD accounts that changed since the last export.")
+    parser.add_argument("input", nargs="?", default="real_acct.txt", help="New real_acct export (tab-delimited).")
+    parser.add_argument("--store", default=STATE_DB, help="SQLite state store of per-account hashes.")
+    parser.add_argument("--output", "-o", default=OUTPUT_FILE, help="Offers for new/changed accounts.")
+    parser.add_argument("--removed", default=REMOVED_FILE, help="Accounts gone from the roll since the last export.")
+    parser.add_argument("--mask", choices=sorted(MASKS), default="gold", help="Buy box applied to the delta.")
+    parser.add_argument("--metrics", nargs="?", const=stage_metrics.METRICS_FILE, default=None, metavar="PATH",
+                        help=f"Append per-stage timings, row counts and peak memory to PATH "
+                             f"(default: {stage_metrics.METRICS_FILE}; or set ${stage_metrics.METRICS_ENV}).")
+    args = parser.parse_args()
+    stage_metrics.enable_metrics(args.metrics)
+
+    print(f"--- HCAD DELTA: {args.input} vs {args.store} ---")
+    counts = run_delta_with_metrics(args.input, store=args.store, output_file=args.output,
+                                    removed_file=args.removed, mask=args.mask)
+    print(f"Scanned {counts['rows']:,} accounts in {counts['seconds']:.1f}s.")
+    print(f"Added: {counts['added']:,} | Changed: {counts['changed']:,} | Removed: {counts['removed']:,}"
+          + (f" | Duplicate acct rows: {counts['duplicates']:,}" if counts['duplicates'] else ""))
+    print(f"SUCCESS: {counts['offers']:,} new/changed leads priced in {args.output} "
+          f"(removed accounts listed in {args.removed}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import argparse
+import datetime
+import heapq
+import os
+import pickle
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+import hcad_stream
+import property_calc
+import stage_metrics
+
+# --- THE COUNTY JOIN ---
+# real_acct only carries the building basics. Owner names (owners.txt), the last sale date
+# (deeds.txt, which gives ownership length) and bath counts (building_res.txt) live in separate
+# HCAD files keyed by acct, each about as big as real_acct. They are merged with a partitioned
+# hash join on disk:
+#   1. partition: each file is streamed once and every row goes to partition hash(acct) % N,
+#      so all rows of one account, from every file, land in the same partition;
+#   2. join: partitions are joined one at a time (1/N of each file in memory) and each
+#      enriched partition is written sorted by its real_acct line number;
+#   3. merge: the sorted partitions are k-way merged back into real_acct order.
+# Peak memory is one partition however big the county files are. The enriched table is
+# priced with property_calc's detailed model (baths, ownership length) on the way out.
+JOIN_DIR = ".join_tmp"
+PARTITIONS = 32
+CHUNK_ROWS = hcad_stream.CHUNK_ROWS
+DEFAULT_SOURCE = "real_acct.txt"
+ENRICHED_FILE = "hcad_enriched.csv"
+DEFAULT_BATHS = 2.0  # accounts without a building_res row, as in make_outreach_ready
+
+# Bath counts in building_res, and what each one counts for
+BATH_COLUMNS = {'full_bath': 1.0, 'half_bath': 0.5}
+SIDE_FILES = {
+    'owners': {'file': 'owners.txt', 'columns': ['acct', 'ln_num', 'name']},
+    'deeds': {'file': 'deeds.txt', 'columns': ['acct', 'dos']},
+    'building_res': {'file': 'building_res.txt', 'columns': ['acct', 'bld_num'] + list(BATH_COLUMNS)},
+}
+BASE_COLUMNS = ['acct'] + hcad_stream.HCAD_COLUMNS
+ENRICHED_COLUMNS = ['owner_name', 'last_sale_date', 'ownership_years', 'baths', 'repairs', 'lead_score', 'mao']
+# Every partition is written in this order, whichever side files had rows in it, so the rows
+# line up with the single header merge_parts writes
+OUTPUT_COLUMNS = BASE_COLUMNS + ENRICHED_COLUMNS
+SEQ = '_seq'  # real_acct line number, carried through the join to restore file order
+
+
+def _part_path(work_dir, name, part):
+    return os.path.join(work_dir, f"{name}_{part:03d}.pkl")
+
+
+def partition_file(path, name, columns, work_dir, partitions=PARTITIONS, sep='\t', with_seq=False,
+                   chunksize=CHUNK_ROWS):
+    """
+    Streams `path` once and appends each row (only `columns`, as raw text) to the partition of
+    its acct. with_seq=True numbers the rows first. Returns the number of rows read.
+    """
+    header = hcad_stream.read_header(path, sep=sep)
+    usecols = [c for c in header if c in columns]
+    if 'acct' not in usecols:
+        raise ValueError(f"{path} has no acct column")
+
+    reader = pd.read_csv(path, sep=sep, usecols=usecols, dtype=str, keep_default_na=False,
+                         chunksize=chunksize, quoting=hcad_stream.quoting_for(sep), encoding_errors='replace')
+    files = [open(_part_path(work_dir, name, p), 'wb') for p in range(partitions)]
+    rows = 0
+    try:
+        for chunk in reader:
+            chunk = chunk[usecols]
+            chunk['acct'] = chunk['acct'].str.strip()
+            if with_seq:
+                chunk.insert(0, SEQ, np.arange(rows, rows + len(chunk), dtype='int64'))
+            rows += len(chunk)
+            part_of = pd.util.hash_array(chunk['acct'].to_numpy(dtype=object)) % partitions
+            for part, piece in chunk.groupby(part_of, sort=False):
+                pickle.dump(piece, files[part], protocol=pickle.HIGHEST_PROTOCOL)
+    finally:
+        for f in files:
+            f.close()
+    return rows
+
+
+def _load_part(work_dir, name, part):
+    """Every piece written to one partition (None if that file was not partitioned)."""
+    path = _part_path(work_dir, name, part)
+    if not os.path.exists(path):
+        return None
+    pieces = []
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                pieces.append(pickle.load(f))
+            except EOFError:
+                break
+    return pd.concat(pieces, ignore_index=True) if pieces else None
+
+
+# --- ONE ROW PER ACCOUNT FROM EACH SIDE FILE ---
+
+def owner_names(owners):
+    """Primary owner (lowest ln_num) per acct."""
+    if 'ln_num' in owners.columns:
+        owners = owners.assign(_ln=pd.to_numeric(owners['ln_num'], errors='coerce'))
+        owners = owners.sort_values(['acct', '_ln'], kind='stable')
+    first = owners.drop_duplicates('acct')
+    return pd.DataFrame({'acct': first['acct'].to_numpy(), 'owner_name': first['name'].str.strip().to_numpy()})
+
+
+def _parse_dates(text):
+    """HCAD dates come as YYYY-MM-DD or MM/DD/YYYY; anything else is NaT."""
+    dates = pd.to_datetime(text, errors='coerce', format='%Y-%m-%d')
+    missing = dates.isna() & text.ne('')
+    if missing.any():
+        dates[missing] = pd.to_datetime(text[missing], errors='coerce', format='%m/%d/%Y')
+    return dates
+
+
+def last_sales(deeds, as_of):
+    """Latest deed date per acct and the whole years owned since then (as of `as_of`)."""
+    dates = _parse_dates(deeds['dos'])
+    last = dates.groupby(deeds['acct'].to_numpy()).max().dropna()
+    days = (pd.Timestamp(as_of) - last).dt.days.to_numpy()
+    return pd.DataFrame({
+        'acct': last.index.to_numpy(),
+        'last_sale_date': last.dt.strftime('%Y-%m-%d').to_numpy(),
+        'ownership_years': np.floor(np.clip(days, 0, None) / 365.25),
+    })
+
+
+def bath_counts(buildings):
+    """Baths of the main building (lowest bld_num) per acct; NaN when the file has no bath columns."""
+    present = [c for c in BATH_COLUMNS if c in buildings.columns]
+    if 'bld_num' in buildings.columns:
+        buildings = buildings.assign(_bld=pd.to_numeric(buildings['bld_num'], errors='coerce'))
+        buildings = buildings.sort_values(['acct', '_bld'], kind='stable')
+    main = buildings.drop_duplicates('acct')
+    baths = pd.Series(np.nan, index=main.index)
+    if present:
+        counts = {c: pd.to_numeric(main[c], errors='coerce') for c in present}
+        baths = sum(counts[c].fillna(0) * BATH_COLUMNS[c] for c in present)
+        baths = baths.where(pd.concat(counts, axis=1).notna().any(axis=1))
+    return pd.DataFrame({'acct': main['acct'].to_numpy(), 'baths': baths.to_numpy()})
+
+
+SIDE_REDUCERS = {'owners': owner_names, 'deeds': last_sales, 'building_res': bath_counts}
+
+
+def underwrite(enriched):
+    """Detailed repairs, lead score and MAO for enriched rows (ARV proxy: tot_mkt_val)."""
+    numbers = hcad_stream.coerce_types(enriched[['yr_blt', 'bld_ar', 'tot_mkt_val']].copy())
+    baths = enriched['baths'].fillna(DEFAULT_BATHS)
+    result = property_calc.underwrite_batch(numbers['yr_blt'], numbers['bld_ar'], baths,
+                                            enriched['ownership_years'], numbers['tot_mkt_val'])
+    enriched['repairs'] = np.round(result['repairs'], 2)
+    enriched['lead_score'] = result['score']
+    enriched['mao'] = np.round(result['mao'], 2)
+    return enriched
+
+
+def join_partition(work_dir, part, as_of):
+    """Enriched rows of one partition, sorted by real_acct line number."""
+    base = _load_part(work_dir, 'real_acct', part)
+    if base is None:
+        return None
+    for name, reduce_fn in SIDE_REDUCERS.items():
+        side = _load_part(work_dir, name, part)
+        if side is None:
+            continue
+        side = reduce_fn(side, as_of) if name == 'deeds' else reduce_fn(side)
+        base = base.merge(side, on='acct', how='left')
+    base = base.reindex(columns=[SEQ] + OUTPUT_COLUMNS)
+    return underwrite(base).sort_values(SEQ)
+
+
+def single_line(frame):
+    """
+    CR/LF inside text fields become spaces. merge_parts reads the partition CSVs a line at a
+    time, so a quoted owner name or address spanning lines would split its row.
+    """
+    for col in frame.columns[frame.dtypes == object]:
+        values = frame[col]
+        broken = values.astype(str).str.contains(r'[\r\n]', regex=True)
+        if broken.any():
+            frame.loc[broken, col] = values[broken].str.replace(r'\s*[\r\n]+\s*', ' ', regex=True)
+    return frame
+
+
+def merge_parts(paths, output, columns):
+    """
+    k-way merge of partition CSVs (each sorted by their leading SEQ field) into `output`.
+    Every row must be on one line (see single_line).
+    """
+    files = [open(p, newline='') for p in paths]
+    try:
+        with open(output, 'w', newline='') as out:
+            out.write(','.join(columns) + '\n')
+            for line in heapq.merge(*files, key=lambda line: int(line[:line.index(',')])):
+                out.write(line[line.index(',') + 1:])
+    finally:
+        for f in files:
+            f.close()
+
+
+def run_join(source=DEFAULT_SOURCE, output=ENRICHED_FILE, data_dir=None, partitions=PARTITIONS,
+             as_of=None, sep='\t', work_dir=JOIN_DIR, keep_temp=False):
+    """
+    Joins `source` with the owners / deeds / building_res files found in `data_dir` (default:
+    next to `source`) into one enriched CSV, in `source` order. Returns a stats dict.
+    """
+    data_dir = data_dir or os.path.dirname(os.path.abspath(source))
+    as_of = as_of or datetime.date.today()
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+    stats = {'rows': 0, 'side_rows': {}, 'matched': {}}
+    start = time.perf_counter()
+
+    with stage_metrics.stage("hcad_join", partitions=partitions):
+        try:
+            with stage_metrics.step("partition"):
+                stats['rows'] = partition_file(source, 'real_acct', BASE_COLUMNS, work_dir, partitions,
+                                               sep=sep, with_seq=True)
+                for name, spec in SIDE_FILES.items():
+                    path = os.path.join(data_dir, spec['file'])
+                    if not os.path.exists(path):
+                        print(f"WARNING: {path} not found; its columns will be empty.")
+                        continue
+                    stats['side_rows'][name] = partition_file(path, name, spec['columns'], work_dir,
+                                                              partitions, sep=sep)
+            stage_metrics.rows_in(stats['rows'])
+
+            part_paths = []
+            matched = {'owner_name': 0, 'ownership_years': 0, 'baths': 0}
+            with stage_metrics.step("join"):
+                for part in range(partitions):
+                    enriched = join_partition(work_dir, part, as_of)
+                    if enriched is None:
+                        continue
+                    for col in matched:
+                        matched[col] += int(enriched[col].notna().sum())
+                    path = os.path.join(work_dir, f"joined_{part:03d}.csv")
+                    single_line(enriched)[[SEQ] + OUTPUT_COLUMNS].to_csv(path, index=False, header=False)
+                    part_paths.append(path)
+            stats['matched'] = matched
+
+            with stage_metrics.step("merge"):
+                merge_parts(part_paths, output, OUTPUT_COLUMNS)
+            stage_metrics.rows_out(stats['rows'])
+        finally:
+            if not keep_temp:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Join real_acct with HCAD owners, deeds and building_res on acct.")
+    parser.add_argument("source", nargs="?", default=DEFAULT_SOURCE, help="real_acct file (tab-delimited).")
+    parser.add_argument("--data-dir", help="Folder with owners.txt / deeds.txt / building_res.txt (default: next to source).")
+    parser.add_argument("--output", "-o", default=ENRICHED_FILE, help="Enriched lead table (CSV).")
+    parser.add_argument("--partitions", type=int, default=PARTITIONS,
+                        help="On-disk partitions; memory per step is about 1/N of the files.")
+    parser.add_argument("--as-of", type=datetime.date.fromisoformat, help="Date ownership years are counted to (YYYY-MM-DD).")
+    parser.add_argument("--keep-temp", action="store_true", help=f"Keep the partitions in {JOIN_DIR}/.")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Also write cProfile/tracemalloc hot spots to {stage_metrics.PROFILE_FILE}.")
+    parser.add_argument("--metrics", nargs="?", const=stage_metrics.METRICS_FILE, default=None, metavar="PATH",
+                        help=f"Append per-stage timings, row counts and peak memory to PATH "
+                             f"(default: {stage_metrics.METRICS_FILE}; or set ${stage_metrics.METRICS_ENV}).")
+    args = parser.parse_args()
+    stage_metrics.enable_metrics(args.metrics)
+    stage_metrics.enable_profile(args.profile)
+
+    stats = run_join(args.source, args.output, data_dir=args.data_dir, partitions=args.partitions,
+                     as_of=args.as_of, keep_temp=args.keep_temp)
+    print(f"Joined {stats['rows']:,} accounts in {stats['seconds']:.1f}s "
+          f"(side rows: {', '.join(f'{k} {v:,}' for k, v in stats['side_rows'].items()) or 'none'}).")
+    for col, n in stats['matched'].items():
+        print(f"  {col}: {n:,} accounts ({n / stats['rows']:.0%})" if stats['rows'] else f"  {col}: 0")
+    print(f"SUCCESS: enriched leads written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
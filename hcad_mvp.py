@@ -1,29 +1,25 @@
+import argparse
+import os
 import pandas as pd
+import hcad_parallel
+import hcad_stream
+import stage_metrics
 
-def generate_mvp():
-    print("--- HCAD MVP SPRINT: TARGET 10 OUTPUTS ---")
-    
-    # Load a subset to keep it fast and simple
-    # HCAD files are usually tab-delimited (\t)
-    try:
-        df = pd.read_csv('real_acct', sep='\t', nrows=5000, low_memory=False)
-    except:
-        # If it's a CSV or named differently, adjust here
-        df = pd.read_csv('real_acct.csv', nrows=5000)
-
-    # 1. THE FILTER (1980 / 1500)
-    # Mapping HCAD headers (Adjust these if your file uses different names)
-    # Typical: yr_blt, bld_ar, tot_mkt_val, site_addr_1
-    filtered = df[(df['yr_blt'] < 1980) & (df['bld_ar'] > 1500)].head(10).copy()
+OUTPUT_COLS = ['Address', 'Offer', 'Reason', 'Outreach message']
 
+def build_offers(filtered):
+    """Steps 2-4 (offer, reason, outreach message) for rows that passed the filter."""
     results = []
 
     for _, row in filtered.iterrows():
         # DATA EXTRACTION
         addr = f"{row['site_addr_1']} {row['site_addr_2']}".strip()
-        val = row['tot_mkt_val']
-        sqft = row['bld_ar']
+        val = row['arv'] if 'arv' in row.index else row['tot_mkt_val']
+        sqft = int(row['bld_ar'])
         year = int(row['yr_blt'])
+        # owner_name only exists in the joined table (hcad_join.py); real_acct has no owners
+        owner = row.get('owner_name')
+        owner = owner if isinstance(owner, str) and owner.strip() else 'Owner'
 
         # STEP 2: THE OFFER FORMULA
         offer = (val * 0.70) - (sqft * 30) - 10000
@@ -33,11 +29,11 @@ def generate_mvp():
 
         # STEP 4: THE OUTREACH MESSAGE
         if offer > 80000:
-            msg = (f"Hi {row.get('owner_name', 'Owner')}, I’m a local investor looking at your property at {addr}. "
+            msg = (f"Hi {owner}, I’m a local investor looking at your property at {addr}. "
                    f"Based on recent data, I could potentially offer around ${offer:,.0f} as-is. "
                    f"Would you be open to a quick conversation?")
         else:
-            msg = (f"Hi {row.get('owner_name', 'Owner')}, I’m looking at properties in your area. "
+            msg = (f"Hi {owner}, I’m looking at properties in your area. "
                    f"I wanted to ask: what is the current condition of the home at {addr}? "
                    f"Happy to connect if you’re considering selling.")
 
@@ -48,10 +44,87 @@ def generate_mvp():
             'Outreach message': msg
         })
 
-    # OUTPUT: THE CLEAN 4-COLUMN CSV
-    output_df = pd.DataFrame(results)
-    output_df.to_csv("houston_offers_v1.csv", index=False)
-    print(f"SUCCESS: Created houston_offers_v1.csv with {len(output_df)} leads.")
+    return pd.DataFrame(results, columns=OUTPUT_COLS)
+
+def record_scan(stats, kept):
+    """Scan counts for the stage metrics: rows read, rows failing the buy box, rows past the keep limit."""
+    stage_metrics.rows_in(stats['rows'])
+    stage_metrics.dropped('buy_box', stats['rows'] - stats['matched'])
+    stage_metrics.dropped('keep_limit', stats['matched'] - len(kept))
+
+def generate_mvp(workers=1, use_store=False, enriched=None, arv="assessed", rank=False):
+    print("--- HCAD MVP SPRINT: TARGET 10 OUTPUTS ---")
+    
+    with stage_metrics.stage("hcad_mvp", workers=workers, store=use_store, enriched=bool(enriched), arv=arv,
+                             rank=rank):
+        # Stream the WHOLE county file in chunks (only the filter columns are loaded),
+        # split across `workers` processes when asked
+        # HCAD files are usually tab-delimited (\t)
+        # 1. THE FILTER (1980 / 1500) is applied per chunk
+        # Mapping HCAD headers (Adjust these if your file uses different names)
+        # Typical: yr_blt, bld_ar, tot_mkt_val, site_addr_1
+        # --store answers the same buy box from the indexed lead store (loaded once) instead
+        # --enriched scans the joined table from hcad_join.py, so messages greet the owner by name
+        # --rank keeps the 10 best deals of the whole county (hcad_stream.deal_score), not the first 10
+        source = enriched or 'real_acct'
+        score_fn = hcad_stream.deal_score if rank else None
+        with stage_metrics.step("scan"):
+            if enriched:
+                if not os.path.exists(enriched):
+                    raise SystemExit(f"ERROR: {enriched} not found (build it with hcad_join.py).")
+                filtered, stats = hcad_stream.scan_hcad(enriched, hcad_stream.gold_digger_mask, keep=10,
+                                                        columns=hcad_stream.HCAD_COLUMNS + ['owner_name'],
+                                                        sep=',', score_fn=score_fn)
+            elif use_store:
+                import lead_store  # imported on use: spawned --workers re-import this script
+                try:
+                    filtered, stats = lead_store.scan_store('gold', keep=10, source='real_acct', score_fn=score_fn)
+                except FileNotFoundError:
+                    raise SystemExit(f"ERROR: the lead store needs real_acct and neither it nor "
+                                     f"{lead_store.STORE_DB} exists.")
+            else:
+                try:
+                    filtered, stats = hcad_parallel.scan('real_acct', hcad_stream.gold_digger_mask, keep=10,
+                                                         workers=workers, score_fn=score_fn)
+                except FileNotFoundError:
+                    # If it's a CSV or named differently, adjust here
+                    source = 'real_acct.csv'
+                    filtered, stats = hcad_parallel.scan('real_acct.csv', hcad_stream.gold_digger_mask, keep=10,
+                                                         workers=workers, sep=',', score_fn=score_fn)
+        hcad_stream.print_scan_stats(stats)
+        record_scan(stats, filtered)
+
+        # --arv comps prices from nearby comparable accounts instead of the assessed value
+        if arv == "comps":
+            with stage_metrics.step("arv"):
+                import arv_index
+                filtered['arv'] = arv_index.arv_for(filtered, 'site_addr_3', 'bld_ar', 'yr_blt',
+                                                    fallback_col='tot_mkt_val', source=source)
+
+        # OUTPUT: THE CLEAN 4-COLUMN CSV
+        with stage_metrics.step("offers"):
+            output_df = build_offers(filtered)
+        with stage_metrics.step("write"):
+            output_df.to_csv("houston_offers_v1.csv", index=False)
+        stage_metrics.rows_out(len(output_df))
+        print(f"SUCCESS: Created houston_offers_v1.csv with {len(output_df)} leads.")
 
 if __name__ == "__main__":
-    generate_mvp()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="HCAD MVP: 10 offers from the county file.")
+    parser.add_argument("--workers", type=int, default=1, help="Processes to scan the file with.")
+    parser.add_argument("--store", action="store_true", help="Query the indexed lead store instead of scanning.")
+    parser.add_argument("--enriched", nargs="?", const="hcad_enriched.csv", default=None, metavar="CSV",
+                        help="Scan the owners/deeds/building_res join from hcad_join.py instead of real_acct.")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Also write cProfile/tracemalloc hot spots to {stage_metrics.PROFILE_FILE}.")
+    parser.add_argument("--arv", choices=["assessed", "comps"], default="assessed",
+                        help="ARV for the offer: tot_mkt_val, or the comps index (arv_index.py).")
+    parser.add_argument("--rank", action="store_true",
+                        help="Keep the 10 best-scoring deals of the whole county instead of the first 10 found.")
+    parser.add_argument("--metrics", nargs="?", const=stage_metrics.METRICS_FILE, default=None, metavar="PATH",
+                        help=f"Append per-stage timings, row counts and peak memory to PATH "
+                             f"(default: {stage_metrics.METRICS_FILE}; or set ${stage_metrics.METRICS_ENV}).")
+    args = parser.parse_args()
+    stage_metrics.enable_metrics(args.metrics)
+    stage_metrics.enable_profile(args.profile)
+    generate_mvp(workers=args.workers, use_store=args.store, enriched=args.enriched, arv=args.arv, rank=args.rank)
\ No newline at end of file
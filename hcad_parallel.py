@@ -0,0 +1,182 @@
+import argparse
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import hcad_stream
+
+# --- THE MULTI-CORE COUNTY SCAN ---
+# The raw tab file is cut into line-aligned byte ranges, one per task. Each worker process
+# parses its range in blocks, applies the buy-box mask (and optional offer step), and sends
+# back only what it keeps. Results are concatenated in range order, so the output is exactly
+# what the serial scan produces.
+# (Works on the raw text file, so quoted fields must not contain newlines - true for HCAD dumps.)
+BLOCK_BYTES = 32 * 1024 * 1024   # parsed per step inside a worker
+TASKS_PER_WORKER = 4             # more ranges than workers evens out uneven ranges
+BENCH_WORKERS = [1, 2, 4, 8, 16]
+
+
+def split_ranges(path, parts):
+    """Byte ranges [start, end) covering the data lines, each starting at a line boundary."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.readline()  # header
+        data_start = f.tell()
+        bounds = [data_start]
+        step = max(1, (size - data_start) // parts)
+        for i in range(1, parts):
+            target = data_start + i * step
+            if target <= bounds[-1]:
+                continue
+            f.seek(target)
+            f.readline()  # finish the line we landed in
+            pos = f.tell()
+            if pos >= size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+        bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i + 1] > bounds[i]]
+
+
+def _iter_blocks(path, start, end):
+    """Yields byte blocks of whole lines from [start, end)."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        pos = start
+        while pos < end:
+            block = f.read(min(BLOCK_BYTES, end - pos))
+            if pos + len(block) < end and not block.endswith(b'\n'):
+                block += f.readline()
+            pos += len(block)
+            yield block
+
+
+def _scan_range(path, start, end, header, usecols, sep, mask_fn, keep, transform, score_fn=None):
+    """Worker: parses one byte range, returns (kept rows, rows scanned, rows matched)."""
+    rows = 0
+    matched = 0
+    kept = []
+    kept_rows = 0
+    best = None
+    for block in _iter_blocks(path, start, end):
+        chunk = pd.read_csv(
+            io.BytesIO(block),
+            sep=sep,
+            header=None,
+            names=header,
+            usecols=usecols,
+            dtype={c: str for c in usecols if c in hcad_stream.TEXT_COLUMNS},
+            quoting=hcad_stream.quoting_for(sep),
+            encoding_errors='replace',
+        )
+        chunk = hcad_stream.coerce_types(chunk)
+        hits = chunk[mask_fn(chunk)]
+        matched += len(hits)
+        if keep is None:
+            kept.append(hits)
+        elif score_fn is not None:
+            # Numbered from the range's byte offset: every line is at least one byte, so the
+            # numbers keep increasing across ranges and ties still break in file order
+            best = hcad_stream.rank_hits(best, hits, keep, score_fn, first_seq=start + rows)
+        elif kept_rows < keep:
+            hits = hits.head(keep - kept_rows)
+            kept.append(hits)
+            kept_rows += len(hits)
+        rows += len(chunk)
+
+    if score_fn is not None and keep is not None:
+        return best, rows, matched  # ranked across ranges (and transformed) by parallel_scan
+    result = pd.concat(kept) if kept else pd.DataFrame(columns=usecols)
+    if transform is not None:
+        result = transform(result)
+    return result, rows, matched
+
+
+def parallel_scan(path, mask_fn, keep=None, workers=None, columns=None, sep='\t', transform=None,
+                  score_fn=None):
+    """
+    Multi-process version of hcad_stream.scan_hcad (same return shape: (matches, stats)).
+
+    mask_fn, transform and score_fn must be module-level functions so they can be sent to workers.
+    transform (e.g. hcad_mvp.build_offers) runs inside the workers on the rows they keep.
+    With score_fn and keep, each worker keeps its ranges' top `keep` and the overall top `keep`
+    is picked here (transform then runs here, on those rows only).
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    header = hcad_stream.read_header(path, sep=sep)
+    wanted = columns or hcad_stream.HCAD_COLUMNS
+    usecols = [c for c in header if c in wanted]
+    ranges = split_ranges(path, workers * TASKS_PER_WORKER)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_scan_range, path, a, b, header, usecols, sep, mask_fn, keep, transform, score_fn)
+                   for a, b in ranges]
+        parts = [fut.result() for fut in futures]  # range order = file order
+
+    if score_fn is not None and keep is not None:
+        frames = [p[0] for p in parts if p[0] is not None]
+        if frames:
+            matches = hcad_stream.best_rows(pd.concat(frames), keep).drop(columns=hcad_stream.SEQ_COL)
+        else:
+            matches = pd.DataFrame(columns=usecols)
+        if transform is not None:
+            matches = transform(matches)
+    else:
+        frames = [p[0] for p in parts if len(p[0])]
+        matches = pd.concat(frames) if frames else (parts[0][0] if parts else pd.DataFrame(columns=usecols))
+        if keep is not None:
+            matches = matches.head(keep)
+
+    seconds = time.perf_counter() - start
+    rows = sum(p[1] for p in parts)
+    stats = {
+        'rows': rows,
+        'matched': sum(p[2] for p in parts),
+        'seconds': seconds,
+        'rows_per_sec': rows / seconds if seconds else 0.0,
+        'workers': workers,
+    }
+    return matches, stats
+
+
+def scan(path, mask_fn, keep=None, workers=1, sep='\t', score_fn=None):
+    """Serial streaming scan for workers == 1, process pool otherwise."""
+    if workers and workers > 1:
+        return parallel_scan(path, mask_fn, keep=keep, workers=workers, sep=sep, score_fn=score_fn)
+    return hcad_stream.scan_hcad(path, mask_fn, keep=keep, sep=sep, score_fn=score_fn)
+
+
+def benchmark(path, worker_counts=BENCH_WORKERS, mask_fn=hcad_stream.gold_digger_mask, sep='\t'):
+    """Full scans (all matches kept) at each worker count, checked against the serial text scan."""
+    print(f"Scaling benchmark on {path} ({os.path.getsize(path) / 1e6:,.0f} MB, {os.cpu_count()} CPUs)")
+    print(f"{'workers':>7} | {'seconds':>8} | {'rows/s':>12} | {'speedup':>7} | match")
+
+    baseline, stats = hcad_stream.scan_hcad(path, mask_fn, sep=sep, use_cache=False)
+    baseline = baseline.reset_index(drop=True)
+    base_secs = stats['seconds']
+    print(f"{'serial':>7} | {base_secs:>8.2f} | {stats['rows_per_sec']:>12,.0f} | {1.0:>6.1f}x | -")
+
+    for n in worker_counts:
+        matches, stats = parallel_scan(path, mask_fn, workers=n, sep=sep)
+        same = matches.reset_index(drop=True).equals(baseline)
+        print(f"{n:>7} | {stats['seconds']:>8.2f} | {stats['rows_per_sec']:>12,.0f} | "
+              f"{base_secs / stats['seconds']:>6.1f}x | {'OK' if same else 'MISMATCH'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-core HCAD scan: scaling benchmark.")
+    parser.add_argument("input", nargs="?", default="real_acct.txt", help="Tab-delimited real_acct file.")
+    parser.add_argument("--bench", type=int, nargs="+", default=BENCH_WORKERS, metavar="N",
+                        help="Worker counts to benchmark.")
+    args = parser.parse_args()
+    benchmark(args.input, args.bench)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import csv
+import datetime
+import time
+import numpy as np
+import pandas as pd
+
+# --- THE COUNTY STREAMER ---
+# Walks the full HCAD real_acct dump in fixed-size chunks so peak memory stays
+# flat no matter how many accounts the county publishes.
+CHUNK_ROWS = 250_000
+
+# Only the columns the 1980/1500 and state-class filters (and the offer formula) touch
+HCAD_COLUMNS = [
+    'yr_blt', 'bld_ar', 'tot_mkt_val', 'state_class',
+    'site_addr_1', 'site_addr_2', 'site_addr_3', 'yr_impr',
+]
+
+# Fixed dtypes: numbers are coerced after parsing (HCAD has blanks and the odd junk value),
+# text is kept as plain strings so the C parser never has to guess.
+NUMERIC_DTYPES = {
+    'yr_blt': 'float32',
+    'bld_ar': 'float32',
+    'yr_impr': 'float32',
+    'tot_mkt_val': 'float64',
+}
+TEXT_COLUMNS = ['acct', 'state_class', 'site_addr_1', 'site_addr_2', 'site_addr_3']
+
+# Compact mode: low-cardinality text becomes categorical (a few thousand distinct values across
+# 1.6M accounts), whole-number columns become the smallest nullable int that holds them, and
+# the remaining text (acct, street address) stays in Arrow-backed string storage.
+CATEGORY_COLUMNS = ['state_class', 'site_addr_2', 'site_addr_3']
+
+
+def quoting_for(sep):
+    """HCAD tab dumps contain stray quote characters, so quotes are only honoured in real CSVs."""
+    return csv.QUOTE_NONE if sep == '\t' else csv.QUOTE_MINIMAL
+
+
+def read_header(path, sep='\t'):
+    """Returns the column names of a county file without reading any rows."""
+    return list(pd.read_csv(path, sep=sep, nrows=0, quoting=quoting_for(sep),
+                            encoding_errors='replace').columns)
+
+
+def iter_hcad_chunks(path, columns=None, sep='\t', chunksize=CHUNK_ROWS, use_cache=True):
+    """Yields typed DataFrame chunks holding only the requested columns."""
+    wanted = columns or HCAD_COLUMNS
+
+    if use_cache:
+        # Imported here because data_cache builds its Parquet schema from this module
+        import data_cache
+        parquet_path = data_cache.ensure_cache(path, sep=sep)
+        if parquet_path:
+            yield from data_cache.iter_parquet_chunks(parquet_path, wanted, chunksize)
+            return
+
+    header = read_header(path, sep=sep)
+    usecols = [c for c in header if c in wanted]
+
+    reader = pd.read_csv(
+        path,
+        sep=sep,
+        usecols=usecols,
+        dtype={c: str for c in usecols if c in TEXT_COLUMNS},
+        chunksize=chunksize,
+        quoting=quoting_for(sep),
+        encoding_errors='replace',
+    )
+    for chunk in reader:
+        yield coerce_types(chunk)
+
+
+def coerce_types(chunk):
+    """Applies the fixed numeric dtypes to a freshly parsed chunk."""
+    for col, dtype in NUMERIC_DTYPES.items():
+        if col in chunk.columns:
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype(dtype)
+    return chunk
+
+
+def compact_types(chunk):
+    """Shrinks a typed chunk (see CATEGORY_COLUMNS). Filters give the same rows as on the plain chunk."""
+    for col in chunk.columns:
+        values = chunk[col]
+        if col in NUMERIC_DTYPES:
+            whole = values.dropna()
+            if (whole == whole.round()).all():
+                chunk[col] = pd.to_numeric(values.astype('Int64'), downcast='integer')
+        elif col in CATEGORY_COLUMNS:
+            chunk[col] = values.astype('category')
+        else:
+            chunk[col] = values.astype('string[pyarrow]')
+    return chunk
+
+
+def concat_compact(frames):
+    """pd.concat for compact chunks: categoricals are unioned instead of falling back to object."""
+    frames = [f for f in frames if len(f)] or frames[:1]
+    if not frames:
+        return pd.DataFrame()
+    for col in frames[0].columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            categories = pd.api.types.union_categoricals([f[col] for f in frames]).categories
+            for f in frames:
+                f[col] = f[col].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_county(path, columns=None, sep='\t', compact=True, chunksize=CHUNK_ROWS, use_cache=True):
+    """The whole county (only `columns`) as one DataFrame, in compact types unless compact=False."""
+    chunks = iter_hcad_chunks(path, columns=columns, sep=sep, chunksize=chunksize, use_cache=use_cache)
+    if not compact:
+        return pd.concat(chunks, ignore_index=True)
+    return concat_compact([compact_types(chunk) for chunk in chunks])
+
+
+def memory_report(df):
+    """Deep memory per column: DataFrame of dtype and MB, with a TOTAL row."""
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({'dtype': df.dtypes.astype(str), 'MB': usage / 1e6})
+    report.loc['TOTAL'] = ['', usage.sum() / 1e6]
+    return report
+
+
+# --- THE FILTERS (applied per chunk) ---
+
+def gold_digger_mask(df):
+    """Pre-1980 + over 1500 sqft (the hcad_mvp buy box)."""
+    return (df['yr_blt'] < 1980) & (df['bld_ar'] > 1500)
+
+
+def residential_mask(df):
+    """Any 'A' state class (A1 = single family) + over 1500 sqft (the ship_ten buy box)."""
+    return df['state_class'].str.startswith('A', na=False) & (df['bld_ar'] > 1500)
+
+
+# --- THE RANKING (--rank: the best K of the county, not the first K in file order) ---
+# deal_score rates every qualifying account from 0 to 1 as the chunks stream past. The running
+# top K is merged with each chunk's top K and trimmed back to K, like a bounded min-heap fed a
+# chunk at a time. One pass, and memory is K rows plus the chunk being read.
+SCORE_COL = 'deal_score'
+SEQ_COL = '_seq'                      # file position: equal scores keep file order
+RANK_WEIGHTS = {'spread': 0.5, 'age': 0.3, 'size': 0.2}
+RANK_REPAIR_PER_SQFT = 30.0           # the hcad_mvp / ship_ten offer formula
+AGE_SPAN_YEARS = 100                  # a century old or more scores 1 on age
+SIZE_CAP_SQFT = 4000                  # 4,000 sqft or more scores 1 on size
+
+
+def deal_score(df):
+    """
+    0-1 per row: offer-to-value spread (offer / value, relative to the 70% rule), age and size.
+    Accounts with no usable value score -inf (ranked last).
+    """
+    import property_calc
+    value = df['tot_mkt_val'].to_numpy(dtype=float, na_value=np.nan)
+    sqft = df['bld_ar'].to_numpy(dtype=float, na_value=np.nan)
+    year = df['yr_blt'].to_numpy(dtype=float, na_value=np.nan)
+    offer = property_calc.mao_batch(value, np.nan_to_num(sqft) * RANK_REPAIR_PER_SQFT)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spread = np.clip(offer / value / property_calc.TARGET_MARGIN, 0.0, 1.0)
+    age = np.clip((datetime.date.today().year - year) / AGE_SPAN_YEARS, 0.0, 1.0)
+    size = np.clip(sqft / SIZE_CAP_SQFT, 0.0, 1.0)
+    score = (RANK_WEIGHTS['spread'] * np.nan_to_num(spread) + RANK_WEIGHTS['age'] * np.nan_to_num(age)
+             + RANK_WEIGHTS['size'] * np.nan_to_num(size))
+    return np.where(value > 0, score, -np.inf)
+
+
+def best_rows(frame, k):
+    """The k rows of a scored frame with the highest SCORE_COL (ties: lowest SEQ_COL), best first."""
+    scores = frame[SCORE_COL].to_numpy()
+    if len(scores) > k > 0:
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        frame = frame[scores >= kth]  # every row that can still make the cut, ties included
+    return frame.sort_values([SCORE_COL, SEQ_COL], ascending=[False, True], kind='stable').head(k)
+
+
+def rank_hits(best, hits, k, score_fn, first_seq):
+    """
+    Scores `hits` and folds them into the running top k. Hits are numbered first_seq, first_seq+1...
+    in file order; any numbering works as long as later chunks get higher numbers.
+    """
+    if not len(hits):
+        return best
+    hits = hits.assign(**{SCORE_COL: score_fn(hits), SEQ_COL: first_seq + np.arange(len(hits))})
+    hits = best_rows(hits, k)
+    return hits if best is None else best_rows(pd.concat([best, hits]), k)
+
+
+def scan_hcad(path, mask_fn, keep=None, columns=None, sep='\t', chunksize=CHUNK_ROWS, use_cache=True,
+              compact=False, score_fn=None):
+    """
+    Streams the whole county file through mask_fn one chunk at a time.
+
+    Only the first `keep` matching rows are held in memory (all matches if keep is None),
+    so a full-county scan with keep set runs in constant memory. compact=True holds the
+    matches in compact types (worth it when keep is None and most of the county matches).
+    With score_fn (e.g. deal_score) and keep, the `keep` best-scoring matches of the whole file
+    are held instead, best first, with their score in SCORE_COL.
+    Returns (matches, stats) where stats has rows, matched, seconds and rows_per_sec.
+    """
+    start = time.perf_counter()
+    rows = 0
+    matched = 0
+    kept = []
+    kept_rows = 0
+    best = None
+
+    for chunk in iter_hcad_chunks(path, columns=columns, sep=sep, chunksize=chunksize, use_cache=use_cache):
+        if compact:
+            chunk = compact_types(chunk)
+        hits = chunk[mask_fn(chunk)]
+        matched += len(hits)
+
+        if keep is None:
+            kept.append(hits)
+        elif score_fn is not None:
+            best = rank_hits(best, hits, keep, score_fn, first_seq=rows)
+        elif kept_rows < keep:
+            hits = hits.head(keep - kept_rows)
+            kept.append(hits)
+            kept_rows += len(hits)
+        rows += len(chunk)
+
+    seconds = time.perf_counter() - start
+    if best is not None:
+        matches = best.drop(columns=SEQ_COL)
+    elif not kept:
+        matches = pd.DataFrame(columns=columns or HCAD_COLUMNS)
+    else:
+        matches = concat_compact(kept) if compact else pd.concat(kept)
+    stats = {
+        'rows': rows,
+        'matched': matched,
+        'seconds': seconds,
+        'rows_per_sec': rows / seconds if seconds else 0.0,
+    }
+    return matches, stats
+
+
+def print_scan_stats(stats):
+    print(f"Scanned {stats['rows']:,} accounts in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_sec']:,.0f} rows/s). {stats['matched']:,} qualify.")
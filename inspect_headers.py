@@ -1,5 +1,6 @@
 import pandas as pd
 import os
+import xlsx_reader
 
 files = ["ready_for_kind_emails.csv", "1st.xlsx"]
 for f in files:
@@ -7,10 +8,10 @@ for f in files:
         print(f"\n--- Headers for {f} ---")
         try:
             if f.endswith('.csv'):
-                df = pd.read_csv(f, nrows=1)
+                print(list(pd.read_csv(f, nrows=1).columns))
             else:
-                df = pd.read_excel(f, nrows=1)
-            print(list(df.columns))
+                # Header row only, streamed (no need to load the whole workbook)
+                print(xlsx_reader.read_xlsx_header(f))
         except Exception as e:
             print(f"Error reading {f}: {e}")
     else:
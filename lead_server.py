@@ -0,0 +1,534 @@
+import argparse
+import datetime
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+
+import data_cache
+import hcad_stream
+import lead_store
+import property_calc
+
+# --- THE LEAD SERVICE ---
+# A resident local HTTP service: the county file is loaded and indexed ONCE, then every question
+# (where is this address, what passes this buy box, what is the MAO, what do we send the owner)
+# is answered from memory instead of by a one-shot script that reloads the whole file first.
+#
+#   python lead_server.py --source real_acct.txt --port 8770
+#   curl "http://127.0.0.1:8770/lookup?address=4788+Gessner+Ct+77056"
+#   curl "http://127.0.0.1:8770/leads?box=gold&zip=77004,77086&order_by=offer&limit=20"
+#   curl "http://127.0.0.1:8770/underwrite?acct=0000000000003&baths=2&ownership_years=12&tier=2"
+#   curl "http://127.0.0.1:8770/draft?address=4788+Gessner+Ct"
+#
+# The source is polled for changes: a new export is loaded in the background once its size and
+# mtime have held still for one poll, then swapped in whole (requests never see a half-built index,
+# and a failed load keeps serving the previous one). POST /reload forces a reload.
+DEFAULT_SOURCE = lead_store.DEFAULT_SOURCE
+DEFAULT_PORT = 8770
+RELOAD_POLL_SECONDS = 5.0
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 10_000
+FLAT_REPAIR_PER_SQFT = 30.0   # the hcad_mvp / lead_store offer when no bath count is given
+BENCH_REQUESTS = 200
+
+LOAD_COLUMNS = lead_store.LOAD_COLUMNS
+
+# Query parameter -> (lead_store criteria name, type). Bounds are strict, like the store and the masks.
+CRITERIA_PARAMS = {
+    'built_before': ('built_before', int), 'built_from': ('built_from', int),
+    'sqft_over': ('sqft_over', float), 'sqft_under': ('sqft_under', float),
+    'value_over': ('value_over', float), 'value_under': ('value_under', float),
+    'offer_over': ('offer_over', float),
+    'state_class': ('state_classes', list), 'zip': ('zips', list),
+    'limit': ('limit', int), 'order_by': ('order_by', str),
+}
+# Underwriting inputs; anything left out comes from the county record
+UNDERWRITE_PARAMS = {
+    'arv': float, 'sqft': float, 'year_built': int, 'baths': float, 'ownership_years': int, 'tier': int,
+}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _floats(values):
+    return values.to_numpy(dtype=float, na_value=np.nan)
+
+
+class _HashIndex:
+    """Row positions per key, as sorted 64-bit hashes (a few bytes per row instead of a dict)."""
+
+    def __init__(self, keys: pd.Series):
+        from suppression import key_hashes
+        hashes = key_hashes(keys.fillna(""))
+        self.order = np.argsort(hashes, kind='stable')
+        self.hashes = hashes[self.order]
+
+    def find(self, key):
+        from suppression import key_hashes
+        h = key_hashes(pd.Series([key], dtype=object))[0]
+        lo, hi = np.searchsorted(self.hashes, h, side='left'), np.searchsorted(self.hashes, h, side='right')
+        return self.order[lo:hi]  # file order (stable sort); callers confirm the text of each hit
+
+
+def _address_key(parts):
+    return (parts['number'] + " " + parts['street']).str.strip()
+
+
+class CountyIndex:
+    """One load of the county file, with everything the endpoints need precomputed."""
+
+    def __init__(self, source, sep=None):
+        from skip_merge import parse_addresses
+
+        start = time.perf_counter()
+        st = os.stat(source)
+        self.source = source
+        self.signature = (st.st_size, st.st_mtime_ns)
+        self.df = hcad_stream.load_county(source, columns=LOAD_COLUMNS, sep=sep or data_cache.default_sep(source))
+        df = self.df
+
+        self.year = _floats(df['yr_blt'])
+        self.sqft = _floats(df['bld_ar'])
+        self.value = _floats(df['tot_mkt_val'])
+        self.offer = property_calc.mao_batch(self.value, self.sqft * FLAT_REPAIR_PER_SQFT)
+        # Zip and state class are categoricals: filters test each category once, then index by code
+        self.zip_codes, zip_values = pd.factorize(df['site_addr_3'].astype(str).str.strip().str[:5])
+        self.zip_values = pd.Series(zip_values)
+        self.class_codes, class_values = pd.factorize(df['state_class'])
+        self.class_values = pd.Series(class_values, dtype=object)
+
+        self.accts = _HashIndex(df['acct'].astype(object))
+        self.addresses = _HashIndex(_address_key(parse_addresses(df['site_addr_1'].astype(object))))
+
+        self.loaded_at = datetime.datetime.now().isoformat(timespec='seconds')
+        self.load_seconds = time.perf_counter() - start
+
+    def __len__(self):
+        return len(self.df)
+
+    # --- lookups ---
+
+    def by_acct(self, acct):
+        acct = str(acct).strip()
+        rows = self.accts.find(acct)
+        return rows[(self.df['acct'].iloc[rows] == acct).to_numpy()]
+
+    def by_address(self, address, zip_code=None):
+        """Rows whose site address has the same number + street (+ unit and zip when both sides have one)."""
+        from skip_merge import parse_addresses
+
+        wanted = parse_addresses(pd.Series([address]), pd.Series([zip_code]) if zip_code else None).iloc[0]
+        rows = self.addresses.find(f"{wanted['number']} {wanted['street']}".strip())
+        if not len(rows):
+            return rows
+        found = parse_addresses(self.df['site_addr_1'].iloc[rows].astype(object).reset_index(drop=True))
+        keep = ((found['number'] == wanted['number']) & (found['street'] == wanted['street'])).to_numpy()
+        if wanted['unit']:
+            keep = keep & ((found['unit'] == wanted['unit']) | (found['unit'] == "")).to_numpy()
+        if wanted['zip']:
+            keep = keep & (self.zip_values.to_numpy(dtype=object)[self.zip_codes[rows]] == wanted['zip'])
+        return rows[keep]
+
+    # --- the buy box ---
+
+    def filter_rows(self, built_before=None, built_from=None, sqft_over=None, sqft_under=None,
+                    value_over=None, value_under=None, offer_over=None, state_classes=None, zips=None,
+                    limit=DEFAULT_LIMIT, order_by=None):
+        """(total matches, row positions of the first `limit`) for lead_store-style criteria."""
+        mask = np.ones(len(self), dtype=bool)
+        with np.errstate(invalid='ignore'):  # NaN compares False: missing values never match, as in SQL
+            for values, op, bound in [
+                (self.year, np.less, built_before), (self.year, np.greater_equal, built_from),
+                (self.sqft, np.greater, sqft_over), (self.sqft, np.less, sqft_under),
+                (self.value, np.greater, value_over), (self.value, np.less, value_under),
+                (self.offer, np.greater, offer_over),
+            ]:
+                if bound is not None:
+                    mask &= op(values, bound)
+        if state_classes:
+            classes = self.class_values.astype(str)
+            ok = np.zeros(len(classes), dtype=bool)
+            for code in state_classes:
+                ok |= classes.str.startswith(code[:-1]).to_numpy() if code.endswith('*') \
+                    else (classes == code).to_numpy()
+            mask &= np.append(ok, False)[self.class_codes]
+        if zips:
+            ok = self.zip_values.isin([str(z).strip()[:5] for z in zips]).to_numpy()
+            mask &= np.append(ok, False)[self.zip_codes]
+
+        rows = np.flatnonzero(mask)
+        total = len(rows)
+        limit = DEFAULT_LIMIT if limit is None else limit
+        if order_by == 'offer':
+            offers = np.nan_to_num(self.offer[rows], nan=-np.inf)
+            if total > limit > 0:
+                rows = rows[np.argpartition(-offers, limit - 1)[:limit]]
+                offers = np.nan_to_num(self.offer[rows], nan=-np.inf)
+            rows = rows[np.lexsort((rows, -offers))]  # best offer first, file order on ties
+        return total, rows[:limit]
+
+    def records(self, rows):
+        """JSON-ready dicts for row positions (HCAD columns plus the 0.70-rule offer)."""
+        out = self.df.iloc[rows].assign(offer=self.offer[rows].round(2))
+        return json.loads(out.to_json(orient='records'))
+
+
+# --- UNDERWRITING AND DRAFTS (the property_calc / hcad_mvp / ai_narrator rules) ---
+
+def underwrite(arv, sqft, year_built, baths=None, ownership_years=None, tier=None):
+    """
+    MAO for one property. With baths, repairs use property_calc's detailed model (contingency
+    included); without, the flat $30/sqft of hcad_mvp. tier picks the ai_narrator margin.
+    """
+    margin = property_calc.RISK_TIER_MARGINS.get(tier, property_calc.TARGET_MARGIN)
+    if baths is None:
+        repairs, model = sqft * FLAT_REPAIR_PER_SQFT, 'flat'
+    else:
+        repairs, model = property_calc.calculate_detailed_repairs(year_built, sqft, baths), 'detailed'
+    result = {
+        'arv': arv,
+        'sqft': sqft,
+        'year_built': year_built,
+        'repair_model': model,
+        'repairs': round(float(repairs), 2),
+        'margin': margin,
+        'wholesale_fee': property_calc.WHOLESALE_FEE,
+        'mao': round(float(property_calc.mao_batch(arv, repairs, target_margin=margin)), 2),
+    }
+    if ownership_years is not None:
+        score = property_calc.calculate_lead_score(ownership_years)
+        result['lead_score'] = score['score']
+        result['lead_flags'] = score['flags']
+    return result
+
+
+class LeadService:
+    """The current CountyIndex plus the reload watcher and per-endpoint timings."""
+
+    def __init__(self, source=DEFAULT_SOURCE, sep=None, poll=RELOAD_POLL_SECONDS):
+        self.source = source
+        self.sep = sep
+        self.poll = poll
+        self.index = CountyIndex(source, sep)
+        self.reloads = 0
+        self.last_error = None
+        self.lock = threading.Lock()          # timings + swaps
+        self.reload_lock = threading.Lock()   # one load at a time
+        self.timings = {}
+        self._pending = None
+        self._stop = threading.Event()
+
+    def reload(self):
+        """Loads the source into a new index and swaps it in. Returns the new index."""
+        with self.reload_lock:
+            index = CountyIndex(self.source, self.sep)
+            with self.lock:
+                self.index = index
+                self.reloads += 1
+                self.last_error = None
+        print(f"Reloaded {self.source}: {len(index):,} accounts in {index.load_seconds:.1f}s")
+        return index
+
+    def check_source(self):
+        """Reloads when the source has changed and its size/mtime held still since the last poll."""
+        try:
+            st = os.stat(self.source)
+        except FileNotFoundError:
+            self._pending = None  # moved away or mid-replace: keep serving the last load
+            return False
+        signature = (st.st_size, st.st_mtime_ns)
+        if signature == self.index.signature:
+            self._pending = None
+            return False
+        if signature != self._pending:
+            self._pending = signature  # still being written? wait one more poll
+            return False
+        self._pending = None
+        self.reload()
+        return True
+
+    def watch(self):
+        while not self._stop.wait(self.poll):
+            try:
+                self.check_source()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"WARNING: reload of {self.source} failed, still serving the previous load ({self.last_error})")
+
+    def stop(self):
+        self._stop.set()
+
+    def record(self, endpoint, ms):
+        with self.lock:
+            t = self.timings.setdefault(endpoint, {'requests': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            t['requests'] += 1
+            t['total_ms'] += ms
+            t['max_ms'] = max(t['max_ms'], ms)
+
+    def stats(self):
+        with self.lock:
+            return {endpoint: {'requests': t['requests'], 'avg_ms': round(t['total_ms'] / t['requests'], 2),
+                               'max_ms': round(t['max_ms'], 2)} for endpoint, t in self.timings.items()}
+
+    # --- endpoints: params dict in, JSON-able dict out ---
+
+    def health(self, params):
+        index = self.index
+        return {'status': 'ok', 'source': os.path.abspath(index.source), 'rows': len(index),
+                'loaded_at': index.loaded_at, 'load_seconds': round(index.load_seconds, 2),
+                'reloads': self.reloads, 'last_error': self.last_error}
+
+    def _find(self, index, params):
+        """Row positions for acct= or address= (+ zip=)."""
+        if params.get('acct'):
+            return index.by_acct(params['acct'])
+        if params.get('address'):
+            return index.by_address(params['address'], params.get('zip'))
+        raise BadRequest("give acct= or address=")
+
+    def lookup(self, params):
+        index = self.index
+        rows = self._find(index, params)
+        return {'matches': len(rows), 'leads': index.records(rows)}
+
+    def leads(self, params):
+        index = self.index
+        criteria = dict(lead_store.BUY_BOXES[params['box']]) if params.get('box') else {}
+        for param, (name, _) in CRITERIA_PARAMS.items():
+            if params.get(param) is not None:
+                criteria[name] = params[param]
+        criteria['limit'] = min(criteria.get('limit', DEFAULT_LIMIT), MAX_LIMIT)
+        total, rows = index.filter_rows(**criteria)
+        return {'matches': total, 'returned': len(rows), 'criteria': criteria, 'leads': index.records(rows)}
+
+    def _subject(self, index, params):
+        """Underwriting inputs: the county record (when acct/address is given) overridden by params."""
+        inputs = {}
+        rows = np.array([], dtype=np.int64)
+        if params.get('acct') or params.get('address'):
+            rows = self._find(index, params)
+            if not len(rows):
+                raise LookupError("no county record matches")
+            row = rows[0]
+            inputs = {'arv': index.value[row], 'sqft': index.sqft[row], 'year_built': index.year[row]}
+            inputs = {k: (None if np.isnan(v) else (int(v) if k == 'year_built' else float(v)))
+                      for k, v in inputs.items()}
+        inputs.update({k: params[k] for k in UNDERWRITE_PARAMS if params.get(k) is not None})
+        missing = [k for k in ('arv', 'sqft', 'year_built') if inputs.get(k) is None]
+        if missing:
+            raise BadRequest(f"missing {', '.join(missing)} (not in the request or the county record)")
+        return rows[:1], inputs
+
+    def underwrite(self, params):
+        index = self.index
+        rows, inputs = self._subject(index, params)
+        result = underwrite(**inputs)
+        if len(rows):
+            result['lead'] = index.records(rows)[0]
+        return result
+
+    def draft(self, params):
+        """
+        hcad_mvp's offer / reason / outreach message (its flat 0.70 rule: baths and tier are
+        /underwrite-only); narrate=1 adds the ai_narrator justification.
+        """
+        import hcad_mvp
+
+        index = self.index
+        rows, inputs = self._subject(index, params)
+        if not len(rows):
+            raise BadRequest("drafts need acct= or address= (the message quotes the site address)")
+        uw = underwrite(inputs['arv'], inputs['sqft'], inputs['year_built'])
+        record = index.df.iloc[rows].assign(arv=uw['arv'], bld_ar=uw['sqft'], yr_blt=uw['year_built'])
+        result = {'draft': hcad_mvp.build_offers(record).iloc[0].to_dict(), 'underwriting': uw}
+        if str(params.get('narrate', '')).lower() in ('1', 'true', 'yes'):
+            import ai_narrator
+            result['justification'] = ai_narrator.ai_offer_analyst(
+                uw['arv'], uw['repairs'], uw['year_built'], uw['sqft'],
+                inputs.get('ownership_years', 'Unknown'), uw['mao'])
+        return result
+
+
+ENDPOINTS = ['health', 'lookup', 'leads', 'underwrite', 'draft']
+
+
+def parse_params(query, body=None):
+    """Query string (+ JSON body) -> typed params. Lists may be repeated or comma-separated."""
+    raw = {k: v if len(v) > 1 else v[0] for k, v in urllib.parse.parse_qs(query).items()}
+    raw.update(body or {})
+    params = {}
+    types = {**{k: t for k, (_, t) in CRITERIA_PARAMS.items()}, **UNDERWRITE_PARAMS}
+    for key, value in raw.items():
+        kind = types.get(key, str)
+        try:
+            if kind is list:
+                values = value if isinstance(value, list) else [value]
+                params[key] = [v.strip() for item in values for v in str(item).split(",") if v.strip()]
+            elif value in (None, ""):
+                continue
+            elif kind is int:
+                params[key] = int(float(value))
+            else:
+                params[key] = kind(value)
+        except (TypeError, ValueError):
+            raise BadRequest(f"{key}={value!r} is not a valid {kind.__name__}")
+    if params.get('box') and params['box'] not in lead_store.BUY_BOXES:
+        raise BadRequest(f"box must be one of {', '.join(sorted(lead_store.BUY_BOXES))}")
+    if params.get('limit') is not None and not 0 <= params['limit'] <= MAX_LIMIT:
+        raise BadRequest(f"limit must be between 0 and {MAX_LIMIT:,}")
+    if params.get('order_by') not in (None, 'file', 'offer'):
+        raise BadRequest("order_by must be file or offer")
+    return params
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        disable_nagle_algorithm = True  # headers and body go out as two writes: don't wait on the ACK
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, status, body):
+            data = json.dumps(body, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _dispatch(self, body=None):
+            start = time.perf_counter()
+            url = urllib.parse.urlparse(self.path)
+            endpoint = url.path.strip("/")
+            if endpoint == "stats":
+                self._send(200, service.stats())
+                return
+            if endpoint not in ENDPOINTS:
+                self._send(404, {'error': f"unknown endpoint /{endpoint} (try {', '.join(ENDPOINTS + ['stats'])})"})
+                return
+            try:
+                result = getattr(service, endpoint)(parse_params(url.query, body))
+                status = 200
+            except BadRequest as e:
+                result, status = {'error': str(e)}, 400
+            except LookupError as e:
+                result, status = {'error': str(e)}, 404
+            except Exception as e:
+                result, status = {'error': f"{type(e).__name__}: {e}"}, 500
+            ms = (time.perf_counter() - start) * 1000
+            service.record(endpoint, ms)
+            if isinstance(result, dict):
+                result['ms'] = round(ms, 2)
+            self._send(status, result)
+
+        def do_GET(self):
+            self._dispatch()
+
+        def do_POST(self):
+            if self.path.rstrip("/") == "/reload":
+                try:
+                    index = service.reload()
+                    self._send(200, {'status': 'reloaded', 'rows': len(index),
+                                     'load_seconds': round(index.load_seconds, 2)})
+                except Exception as e:
+                    self._send(500, {'error': f"reload failed, still serving the previous load: {e}"})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send(400, {'error': "body must be a JSON object"})
+                return
+            self._dispatch(body if isinstance(body, dict) else None)
+
+    return Handler
+
+
+def serve(source=DEFAULT_SOURCE, port=DEFAULT_PORT, sep=None, poll=RELOAD_POLL_SECONDS, host="127.0.0.1"):
+    """Loads the source, starts the server and the reload watcher in background threads, returns the server."""
+    service = LeadService(source, sep=sep, poll=poll)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    server.service = service
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    if poll:
+        threading.Thread(target=service.watch, daemon=True).start()
+    return server
+
+
+def bench(server, requests=BENCH_REQUESTS):
+    """Times every endpoint over real HTTP against a running server. Returns {endpoint: (p50, p95) ms}."""
+    index = server.service.index
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    picks = np.linspace(0, len(index) - 1, num=min(requests, len(index)), dtype=np.int64)
+    accts = index.df['acct'].iloc[picks].astype(str).tolist()
+    addresses = (index.df['site_addr_1'].iloc[picks].astype(str) + " "
+                 + index.df['site_addr_3'].iloc[picks].astype(str)).tolist()
+    zips = index.zip_values.sample(n=min(len(index.zip_values), requests), replace=True, random_state=0).tolist()
+    calls = {
+        'lookup (acct)': [f"/lookup?acct={a}" for a in accts],
+        'lookup (address)': [f"/lookup?address={urllib.parse.quote(a)}" for a in addresses],
+        'leads (box, limit 100)': [f"/leads?box=gold&zip={z}" for z in zips],
+        'leads (county, top 100 offers)': ["/leads?box=residential&order_by=offer"] * max(1, requests // 10),
+        'underwrite': [f"/underwrite?acct={a}&baths=2&ownership_years=12&tier=2" for a in accts],
+        'draft': [f"/draft?acct={a}" for a in accts],
+    }
+    results = {}
+    for name, paths in calls.items():
+        times = []
+        for path in paths:
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(base + path) as response:
+                    response.read()
+            except urllib.error.HTTPError as e:
+                if e.code >= 500:  # 400/404 (record lacks a field, no match) are answers too
+                    raise RuntimeError(f"{path}: {e.code} {e.read().decode('utf-8', 'replace')}")
+            times.append((time.perf_counter() - start) * 1000)
+        results[name] = (float(np.percentile(times, 50)), float(np.percentile(times, 95)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local lead service: the county file held in memory behind HTTP.")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="County file to load (reloaded when it changes).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--sep", default=None, help="Delimiter (default: tab, or comma for .csv).")
+    parser.add_argument("--poll", type=float, default=RELOAD_POLL_SECONDS,
+                        help="Seconds between checks for a new export (0 = never reload).")
+    parser.add_argument("--bench", type=int, nargs="?", const=BENCH_REQUESTS, metavar="N",
+                        help="Load, time N requests per endpoint, print p50/p95 latency and exit.")
+    args = parser.parse_args()
+
+    server = serve(args.source, 0 if args.bench else args.port, sep=args.sep, poll=0 if args.bench else args.poll)
+    index = server.service.index
+    print(f"Loaded {len(index):,} accounts from {args.source} in {index.load_seconds:.1f}s")
+    if args.bench:
+        print(f"{'endpoint':>32} | {'p50 ms':>7} | {'p95 ms':>7}")
+        for name, (p50, p95) in bench(server, args.bench).items():
+            print(f"{name:>32} | {p50:>7.1f} | {p95:>7.1f}")
+        server.shutdown()
+        return
+
+    print(f"Lead service on http://127.0.0.1:{args.port} (Ctrl+C to stop)")
+    print("  GET /lookup /leads /underwrite /draft /health /stats   POST /reload")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.service.stop()
+        server.shutdown()
+        print(f"Stats: {server.service.stats()}")
+
+
+if __name__ == "__main__":
+    main()
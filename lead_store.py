@@ -0,0 +1,317 @@
+import argparse
+import os
+import sqlite3
+import time
+import pandas as pd
+
+import data_cache
+import hcad_stream
+import property_calc
+
+# --- THE LEAD STORE ---
+# The county file is loaded ONCE into an indexed SQLite table (one row per acct, in file order).
+# Changing the buy box is then a query, not an edit to a hard-coded mask plus a full rescan.
+# The store remembers which source it was built from and rebuilds itself when that file changes.
+STORE_DB = "hcad_leads.sqlite"
+STORE_VERSION = 1
+DEFAULT_SOURCE = "real_acct.txt"
+OUTPUT_FILE = "houston_offers_query.csv"
+
+LOAD_COLUMNS = ['acct'] + hcad_stream.HCAD_COLUMNS
+INDEXED_COLUMNS = ['yr_blt', 'bld_ar', 'tot_mkt_val', 'state_class', 'zip']
+
+# The buy boxes the scripts used to hard-code (hcad_stream.gold_digger_mask / residential_mask)
+BUY_BOXES = {
+    'gold': {'built_before': 1980, 'sqft_over': 1500},
+    'residential': {'state_classes': ['A*'], 'sqft_over': 1500},
+}
+
+SCHEMA = """
+CREATE TABLE leads (
+    acct        TEXT UNIQUE,
+    yr_blt      REAL,
+    bld_ar      REAL,
+    tot_mkt_val REAL,
+    state_class TEXT,
+    site_addr_1 TEXT,
+    site_addr_2 TEXT,
+    site_addr_3 TEXT,
+    yr_impr     REAL,
+    zip         TEXT,
+    offer       REAL
+);
+CREATE TABLE meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _read_meta(conn):
+    try:
+        return dict(conn.execute("SELECT key, value FROM meta").fetchall())
+    except sqlite3.DatabaseError:
+        return {}
+
+
+def store_is_fresh(source, store=STORE_DB):
+    """True if `store` was built (by this version) from the current contents of `source`."""
+    if not os.path.exists(store):
+        return False
+    conn = sqlite3.connect(store)
+    try:
+        meta = _read_meta(conn)
+    finally:
+        conn.close()
+    if meta.get('version') != str(STORE_VERSION) or meta.get('source') != os.path.abspath(source):
+        return False
+    st = os.stat(source)
+    if meta.get('size') != str(st.st_size):
+        return False
+    if meta.get('mtime_ns') == str(st.st_mtime_ns):
+        return True
+    return meta.get('sha1') == data_cache.source_hash(source)
+
+
+def _store_rows(chunk):
+    """Chunk -> rows for the leads table (zip and the 0.70-rule offer are precomputed)."""
+    chunk = chunk.reindex(columns=LOAD_COLUMNS)
+    chunk['zip'] = chunk['site_addr_3'].str.strip().str[:5]
+    chunk['offer'] = property_calc.mao_batch(chunk['tot_mkt_val'], chunk['bld_ar'] * 30)
+    # NaN -> NULL, so SQL comparisons skip missing values exactly like the pandas masks do
+    return chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+
+
+def build_store(source=DEFAULT_SOURCE, store=STORE_DB, sep=None):
+    """Loads `source` into a fresh store (written next to it, then swapped in). Returns the row count."""
+    sep = sep or data_cache.default_sep(source)
+    tmp_store = store + '.tmp'
+    if os.path.exists(tmp_store):
+        os.remove(tmp_store)
+
+    print(f"Loading {source} into {store} (one-time)...")
+    st = os.stat(source)
+    conn = sqlite3.connect(tmp_store)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+        placeholders = ", ".join("?" * (len(LOAD_COLUMNS) + 2))
+        for chunk in hcad_stream.iter_hcad_chunks(source, columns=LOAD_COLUMNS, sep=sep):
+            # Exports repeat the odd acct: the last row wins (as in hcad_delta), also across chunks
+            chunk = chunk.drop_duplicates('acct', keep='last')
+            conn.executemany(f"INSERT OR REPLACE INTO leads VALUES ({placeholders})", _store_rows(chunk))
+        rows = conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+        # Indexes are built after the load, which is much faster than maintaining them per insert
+        for col in INDEXED_COLUMNS:
+            conn.execute(f"CREATE INDEX idx_leads_{col} ON leads ({col})")
+        conn.execute("ANALYZE")
+        conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+            ('version', str(STORE_VERSION)),
+            ('source', os.path.abspath(source)),
+            ('size', str(st.st_size)),
+            ('mtime_ns', str(st.st_mtime_ns)),
+            ('sha1', data_cache.source_hash(source)),
+            ('rows', str(rows)),
+        ])
+        conn.commit()
+    except BaseException:
+        conn.close()
+        os.remove(tmp_store)
+        raise
+    conn.close()
+    os.replace(tmp_store, store)
+    return rows
+
+
+def ensure_store(source=DEFAULT_SOURCE, store=STORE_DB, sep=None):
+    """Returns `store`, (re)building it first if it is missing or `source` has changed."""
+    if not os.path.exists(source):
+        if os.path.exists(store):
+            return store  # source moved away: keep serving the last load
+        raise FileNotFoundError(source)
+    if not store_is_fresh(source, store):
+        build_store(source, store, sep=sep)
+    return store
+
+
+def _class_clause(codes):
+    """'A1' matches exactly, 'A*' matches every class starting with A (as an index range)."""
+    parts = []
+    params = []
+    for code in codes:
+        if code.endswith('*'):
+            prefix = code[:-1]
+            if not prefix:
+                parts.append("state_class IS NOT NULL")
+                continue
+            parts.append("(state_class >= ? AND state_class < ?)")
+            params += [prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)]
+        else:
+            parts.append("state_class = ?")
+            params.append(code)
+    return "(" + " OR ".join(parts) + ")", params
+
+
+def build_query(built_before=None, built_from=None, sqft_over=None, sqft_under=None,
+                value_over=None, value_under=None, offer_over=None, state_classes=None,
+                zips=None, limit=None, order_by=None):
+    """Turns buy-box criteria into (sql, params). Bounds are strict, like the existing masks."""
+    where = []
+    params = []
+    for col, op, value in [
+        ('yr_blt', '<', built_before), ('yr_blt', '>=', built_from),
+        ('bld_ar', '>', sqft_over), ('bld_ar', '<', sqft_under),
+        ('tot_mkt_val', '>', value_over), ('tot_mkt_val', '<', value_under),
+        ('offer', '>', offer_over),
+    ]:
+        if value is not None:
+            where.append(f"{col} {op} ?")
+            params.append(value)
+    if state_classes:
+        clause, class_params = _class_clause(state_classes)
+        where.append(clause)
+        params += class_params
+    if zips:
+        where.append(f"zip IN ({', '.join('?' * len(zips))})")
+        params += [str(z)[:5] for z in zips]
+
+    sql = f"SELECT {', '.join(LOAD_COLUMNS + ['offer'])} FROM leads"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    # Default order is file order, so the first N hits are the same N a scan would return
+    sql += " ORDER BY " + ("offer DESC" if order_by == 'offer' else "rowid")
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return sql, params
+
+
+def query_leads(store=STORE_DB, **criteria):
+    """Raw HCAD rows (same columns/dtypes as hcad_stream chunks, plus offer) matching `criteria`."""
+    sql, params = build_query(**criteria)
+    conn = sqlite3.connect(store)
+    try:
+        df = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+    return _lead_frame(df)
+
+
+def iter_leads(store=STORE_DB, chunksize=hcad_stream.CHUNK_ROWS, **criteria):
+    """query_leads in chunks of at most `chunksize` rows (file order unless order_by says otherwise)."""
+    sql, params = build_query(**criteria)
+    conn = sqlite3.connect(store)
+    try:
+        for df in pd.read_sql_query(sql, conn, params=params, chunksize=chunksize):
+            yield _lead_frame(df)
+    finally:
+        conn.close()
+
+
+def _lead_frame(df):
+    # Text as object, like read_csv(dtype=str): SQL NULL becomes NaN, not the string "None"
+    for col in hcad_stream.TEXT_COLUMNS:
+        df[col] = df[col].astype(object).where(df[col].notna(), float('nan'))
+    return hcad_stream.coerce_types(df)
+
+
+def count_leads(store=STORE_DB, **criteria):
+    """Number of rows matching `criteria` (answered from the indexes)."""
+    criteria.pop('limit', None)
+    sql, params = build_query(**criteria)
+    conn = sqlite3.connect(store)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def store_rows(store=STORE_DB):
+    conn = sqlite3.connect(store)
+    try:
+        return int(_read_meta(conn).get('rows', 0))
+    finally:
+        conn.close()
+
+
+def scan_store(criteria, keep=None, source=DEFAULT_SOURCE, store=STORE_DB, score_fn=None):
+    """
+    Drop-in for hcad_stream.scan_hcad backed by the store: returns (matches, stats).
+    `criteria` is a BUY_BOXES name or a dict of query_leads criteria.
+    With score_fn and keep, every match is streamed and the best `keep` by score are returned.
+    """
+    if isinstance(criteria, str):
+        criteria = BUY_BOXES[criteria]
+    start = time.perf_counter()
+    ensure_store(source, store)
+    if score_fn is not None and keep is not None:
+        best = None
+        matched = 0
+        for chunk in iter_leads(store, **criteria):
+            best = hcad_stream.rank_hits(best, chunk.drop(columns=['offer']), keep, score_fn, first_seq=matched)
+            matched += len(chunk)
+        matches = best.drop(columns=hcad_stream.SEQ_COL) if best is not None \
+            else query_leads(store, limit=0, **criteria).drop(columns=['offer'])
+    else:
+        matches = query_leads(store, limit=keep, **criteria).drop(columns=['offer'])
+        matched = count_leads(store, **criteria)
+    seconds = time.perf_counter() - start
+    rows = store_rows(store)
+    stats = {
+        'rows': rows,
+        'matched': matched,
+        'seconds': seconds,
+        'rows_per_sec': rows / seconds if seconds else 0.0,
+    }
+    return matches, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the indexed HCAD lead store with any buy box.")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="County file the store is loaded from.")
+    parser.add_argument("--store", default=STORE_DB, help="SQLite lead store.")
+    parser.add_argument("--rebuild", action="store_true", help="Reload the store even if the source is unchanged.")
+    parser.add_argument("--box", choices=sorted(BUY_BOXES), help="Start from a named buy box (flags below override it).")
+    parser.add_argument("--built-before", type=int, help="yr_blt < YEAR")
+    parser.add_argument("--built-from", type=int, help="yr_blt >= YEAR")
+    parser.add_argument("--sqft-over", type=float, help="bld_ar > SQFT")
+    parser.add_argument("--sqft-under", type=float, help="bld_ar < SQFT")
+    parser.add_argument("--value-over", type=float, help="tot_mkt_val > VALUE")
+    parser.add_argument("--value-under", type=float, help="tot_mkt_val < VALUE")
+    parser.add_argument("--offer-over", type=float, help="0.70-rule offer > AMOUNT")
+    parser.add_argument("--state-class", dest="state_classes", nargs="+", metavar="CODE",
+                        help="State classes, e.g. A1 or A* for every A class.")
+    parser.add_argument("--zip", dest="zips", nargs="+", metavar="ZIP", help="Site zip codes.")
+    parser.add_argument("--limit", type=int, help="Return at most N leads.")
+    parser.add_argument("--order-by", choices=["file", "offer"], default="file", help="Row order of the result.")
+    parser.add_argument("--output", "-o", default=OUTPUT_FILE, help="Priced leads CSV.")
+    args = parser.parse_args()
+
+    if args.rebuild and os.path.exists(args.source):
+        build_store(args.source, args.store)
+    else:
+        ensure_store(args.source, args.store)
+
+    criteria = dict(BUY_BOXES[args.box]) if args.box else {}
+    for key in ['built_before', 'built_from', 'sqft_over', 'sqft_under', 'value_over', 'value_under',
+                'offer_over', 'state_classes', 'zips', 'limit', 'order_by']:
+        value = getattr(args, key)
+        if value is not None:
+            criteria[key] = value
+
+    start = time.perf_counter()
+    leads = query_leads(args.store, **criteria)
+    seconds = time.perf_counter() - start
+    print(f"{len(leads):,} leads match ({seconds * 1000:.0f} ms from {args.store}).")
+
+    import hcad_mvp  # imported here: hcad_mvp itself uses this module for --store
+    offers = hcad_mvp.build_offers(leads)
+    offers.insert(0, 'acct', leads['acct'].to_numpy())
+    offers.to_csv(args.output, index=False)
+    print(f"SUCCESS: priced leads written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
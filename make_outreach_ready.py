@@ -1,18 +1,37 @@
+import numpy as np
 import pandas as pd
 import argparse
+import glob
 import logging
 import sys
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import data_cache
+import property_calc
+import shard_writer
+import stage_metrics
+import suppression
+import xlsx_reader
 from typing import List, Optional, Dict, Any
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
 logger = logging.getLogger(__name__)
 
+# Offers at or above this get SEND_OFFER, the rest ASK_CONDITION
+SEND_OFFER_MIN = 80000
+# Flat repair model for lists without an offer column: sqft * rate
+FLAT_REPAIR_PER_SQFT = 25.0
+# process_file reads, prices and writes this many rows at a time (memory stays flat for any list size)
+CHUNK_ROWS = 50_000
+
+def configure_logging():
+    """Timestamped INFO logs to stdout. Called by the entry points, never on import."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+
 def pick_col(cols: List[str], candidates: List[str]) -> Optional[str]:
     """Finds the first matching column name from candidates in the actual columns (case-insensitive)."""
     cols_lower = {c.lower().strip(): c for c in cols}
@@ -38,7 +57,7 @@ def clean_phone(x: Any) -> str:
 
 def choose_action(offer_proxy: float) -> str:
     """Determines the action based on the offer amount."""
-    if pd.isna(offer_proxy) or offer_proxy < 80000:
+    if pd.isna(offer_proxy) or offer_proxy < SEND_OFFER_MIN:
         return "ASK_CONDITION"
     return "SEND_OFFER"
 
@@ -60,84 +79,246 @@ def make_message(row: pd.Series) -> str:
                 f"Based on current renovation costs, would you consider an offer around "
                 f"${offer:,.0f}?")
 
-def process_file(input_path: str, output_path: str):
-    logger.info(f"Reading input file: {input_path}")
-    
-    if not os.path.exists(input_path):
-        logger.error(f"Input file not found: {input_path}")
-        sys.exit(1)
+# --- Vectorized versions (same output as the per-row functions above, one pass per column) ---
 
-    try:
-        if input_path.lower().endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(input_path)
-        else:
-            df = pd.read_csv(input_path)
-    except Exception as e:
-        logger.error(f"Failed to read file: {e}")
-        sys.exit(1)
+def clean_phone_series(phones: pd.Series) -> pd.Series:
+    """Column-wise clean_phone."""
+    missing = phones.isna().to_numpy()
+    raw = phones.astype(str).str.strip()
+    digits = raw.str.replace(r"\D", "", regex=True)
 
-    logger.info(f"Columns found: {list(df.columns)}")
-    with open("headers_debug.txt", "w") as f:
-        f.write(str(list(df.columns)))
+    # Handle cases with leading 1 (e.g. 15551234567)
+    leading_one = (digits.str.len() == 11) & digits.str.startswith("1")
+    digits = digits.where(~leading_one, digits.str[1:])
 
+    ten = (digits.str.len() == 10).to_numpy(dtype=bool, na_value=False)
+    formatted = "(" + digits.str[0:3] + ") " + digits.str[3:6] + "-" + digits.str[6:10]
+    result = np.where(ten, formatted.to_numpy(dtype=object), raw.to_numpy(dtype=object))
+    result[missing] = ""
+    return pd.Series(result, index=phones.index, dtype=object)
 
-    # --- Column detection ---
-    owner_col = pick_col(df.columns, [
-        "owner name", "first name", "matched first name", "owner firstname", "owner first name", 
-        "owner_name", "firstname", "first_name", "name"
-    ])
+def choose_action_series(offer_proxy: pd.Series) -> pd.Series:
+    """Column-wise choose_action (NaN compares False, so it lands on ASK_CONDITION)."""
+    offers = offer_proxy.to_numpy(dtype=float, na_value=np.nan)
+    return pd.Series(np.where(offers >= SEND_OFFER_MIN, "SEND_OFFER", "ASK_CONDITION"),
+                     index=offer_proxy.index, dtype=object)
+
+def format_dollars(values: pd.Series) -> pd.Series:
+    """Vectorized f"{x:,.0f}" (np.rint rounds half-to-even on the exact double, like format())."""
+    raw = values.to_numpy(dtype=float, na_value=np.nan)
+    exotic = ~np.isfinite(raw) | (np.abs(raw) >= 1e15)
+    rounded = np.rint(np.where(exotic, 0.0, raw))
+
+    result = pd.Series(np.abs(rounded).astype(np.int64), index=values.index).astype(str)
+    lengths = result.str.len().to_numpy()
+
+    # Insert thousands separators one digit-count at a time (plain slicing, no regex)
+    for n in np.unique(lengths[lengths > 3]):
+        rows = lengths == n
+        part = result[rows]
+        head = n % 3 or 3
+        grouped = part.str[:head]
+        for i in range(head, n, 3):
+            grouped = grouped + "," + part.str[i:i + 3]
+        result[rows] = grouped
+
+    negative = np.signbit(rounded)
+    result[negative] = "-" + result[negative]
+
+    # Values an int64 can't hold (or inf/nan) are rare enough to format one by one
+    for i in np.flatnonzero(exotic):
+        result.iloc[i] = f"{raw[i]:,.0f}"
+    return result
+
+def make_messages(out: pd.DataFrame) -> pd.Series:
+    """Column-wise make_message over Owner_Name, Property_Address, Offer_Proxy and Action."""
+    name = out["Owner_Name"].astype(str).str.strip()
+    name = name.where((name != "") & (name.str.lower() != "nan"), "there")
+    addr = out["Property_Address"].astype(str).str.strip()
+    ask = out["Action"] == "ASK_CONDITION"
+
+    offer_text = pd.Series("", index=out.index)
+    offer_text[~ask] = format_dollars(out.loc[~ask, "Offer_Proxy"])
+
+    ask_msg = ("Hi " + name + ", quick question about " + addr + " — "
+               "is the home currently livable, or would it need a full rehab/teardown? "
+               "That one detail changes the range a lot.")
+    send_msg = ("Hi " + name + ", I’m looking at " + addr + ". "
+                "Based on current renovation costs, would you consider an offer around "
+                "$" + offer_text + "?")
+    return ask_msg.where(ask, send_msg)
+
+EXPORT_COLS = ["Owner_Name", "Property_Address", "Phone", "Offer_Proxy", "Action", "Message_Draft"]
+
+# --- Column detection (header names only, so it can run before the file is loaded) ---
+OWNER_CANDIDATES = [
+    "owner name", "first name", "matched first name", "owner firstname", "owner first name", 
+    "owner_name", "firstname", "first_name", "name"
+]
+ADDRESS_CANDIDATES = [
+    "property address", "address", "site address", "site_address", "prop_addr", "addr", "site_addr_1"
+]
+PHONE_CANDIDATES = [
+    "mobile number", "owner mobile 1", "owner mobile", "phone", "owner phone", 
+    "wireless number", "cell phone", "phone_number", "cell", "mobile",
+    "pager", "landline"
+]
+OFFER_CANDIDATES = [
+    "mao (your offer)", "mao", "offer", "offer proxy", "offer_proxy", "initial offer", "target offer"
+]
+VALUE_CANDIDATES = [
+    "est value", "estimated value", "total assessed value", "assessed value", "market value",
+    "tot_mkt_val", "market_value", "value"
+]
+SQFT_CANDIDATES = [
+    "building sqft", "sqft", "living area", "building sq ft", "bld_ar", "square_feet"
+]
+YEAR_CANDIDATES = [
+    "effective year built", "year built", "yr_blt", "year_built", "yr_impr"
+]
+BATHS_CANDIDATES = [
+    "baths", "bathrooms", "total baths", "bath_count"
+]
+# Part of every profile fingerprint: editing a candidate list re-resolves cached profiles
+DETECTION_RULES = [OWNER_CANDIDATES, ADDRESS_CANDIDATES, PHONE_CANDIDATES, OFFER_CANDIDATES,
+                   VALUE_CANDIDATES, SQFT_CANDIDATES, YEAR_CANDIDATES, BATHS_CANDIDATES]
+PROFILE_ROLES = ["owner", "address", "phone", "offer", "value", "sqft", "year", "baths"]
+
+def detect_columns(columns: List[str]) -> Dict[str, Optional[str]]:
+    """Maps each role (owner, address, phone, offer, value, sqft, year, baths) to a column name or None."""
+    columns = list(columns)
+    owner_col = pick_col(columns, OWNER_CANDIDATES)
     
     # If owner is missing but we have First and Last, we can try to use First Name as a fallback
     if not owner_col:
-        first = pick_col(df.columns, ["first name", "firstname", "first_name"])
-        last = pick_col(df.columns, ["last name", "lastname", "last_name"])
+        first = pick_col(columns, ["first name", "firstname", "first_name"])
+        last = pick_col(columns, ["last name", "lastname", "last_name"])
         if first:
             logger.info(f"Using '{first}' as Owner Name (Last Name: {last})")
             owner_col = first
             
-    address_col = pick_col(df.columns, [
-        "property address", "address", "site address", "site_address", "prop_addr", "addr", "site_addr_1"
-    ])
+    address_col = pick_col(columns, ADDRESS_CANDIDATES)
     
     # Phone candidates
-    phone_candidates = [
-        "mobile number", "owner mobile 1", "owner mobile", "phone", "owner phone", 
-        "wireless number", "cell phone", "phone_number", "cell", "mobile",
-        "pager", "landline"
-    ]
-    pass_phone_col = pick_col(df.columns, phone_candidates)
+    pass_phone_col = pick_col(columns, PHONE_CANDIDATES)
     
     # Fallback to any column containing "phone" or "mobile" if strict match fails
     if not pass_phone_col:
-        potential_phones = [c for c in df.columns if "phone" in c.lower() or "mobile" in c.lower()]
+        potential_phones = [c for c in columns if "phone" in c.lower() or "mobile" in c.lower()]
         if potential_phones:
             pass_phone_col = potential_phones[0]
             logger.info(f"Fuzzy matched phone column: {pass_phone_col}")
             
     # If still no phone, look for "Relative" phones or "PAGER"/"LANDLINE" as a last resort
     if not pass_phone_col:
-         potential_relatives = [c for c in df.columns if ("relative" in c.lower() or "pager" in c.lower() or "landline" in c.lower()) and ("phone" in c.lower() or "mobile" in c.lower() or "landline" in c.lower() or "pager" in c.lower())]
+         potential_relatives = [c for c in columns if ("relative" in c.lower() or "pager" in c.lower() or "landline" in c.lower()) and ("phone" in c.lower() or "mobile" in c.lower() or "landline" in c.lower() or "pager" in c.lower())]
          if potential_relatives:
              pass_phone_col = potential_relatives[0]
              logger.info(f"Using alternate phone column: {pass_phone_col}")
 
-    offer_col = pick_col(df.columns, [
-        "mao (your offer)", "mao", "offer", "offer proxy", "offer_proxy", "initial offer", "target offer"
-    ])
-    value_col = pick_col(df.columns, [
-        "est value", "estimated value", "total assessed value", "assessed value", "market value",
-        "tot_mkt_val", "market_value", "value"
-    ])
-    sqft_col = pick_col(df.columns, [
-        "building sqft", "sqft", "living area", "building sq ft", "bld_ar", "square_feet"
-    ])
+    return {
+        "owner": owner_col,
+        "address": address_col,
+        "phone": pass_phone_col,
+        "offer": pick_col(columns, OFFER_CANDIDATES),
+        "value": pick_col(columns, VALUE_CANDIDATES),
+        "sqft": pick_col(columns, SQFT_CANDIDATES),
+        "year": pick_col(columns, YEAR_CANDIDATES),
+        "baths": pick_col(columns, BATHS_CANDIDATES),
+    }
+
+def read_header(input_path: str) -> List[str]:
+    """Column names of a CSV/Excel file, read from the first row only."""
+    if input_path.lower().endswith('.xlsx'):
+        return xlsx_reader.read_xlsx_header(input_path)
+    if input_path.lower().endswith('.xls'):
+        return [str(c) for c in pd.read_excel(input_path, nrows=0).columns]
+    return [str(c) for c in pd.read_csv(input_path, nrows=0).columns]
+
+def resolve_profile(header: List[str]) -> Dict[str, Optional[str]]:
+    """detect_columns for this header, cached per vendor header layout under .data_cache/profiles."""
+    key = data_cache.fingerprint(header, DETECTION_RULES)
+    profile = data_cache.load_profile(key)
+    if profile is not None:
+        logger.info(f"Using cached column profile {key[:12]}")
+        return profile
+    profile = detect_columns(header)
+    if profile["owner"] and profile["address"]:
+        data_cache.save_profile(key, profile)
+    return profile
+
+def read_input(input_path: str, debug_headers: bool = False, profile: Optional[Dict[str, Optional[str]]] = None) -> pd.DataFrame:
+    """
+    Loads a CSV/Excel lead file (exits on failure, like the rest of this tool).
+    With a profile, only the columns it maps are read.
+    """
+    return next(iter_input(input_path, debug_headers=debug_headers, profile=profile, chunksize=None))
+
+def iter_input(input_path: str, debug_headers: bool = False, profile: Optional[Dict[str, Optional[str]]] = None,
+               chunksize: Optional[int] = CHUNK_ROWS):
+    """read_input in DataFrames of at most `chunksize` rows (None = the whole file as one frame)."""
+    logger.info(f"Reading input file: {input_path}")
+    
+    if not os.path.exists(input_path):
+        logger.error(f"Input file not found: {input_path}")
+        sys.exit(1)
+
+    try:
+        header = read_header(input_path)
+        logger.info(f"Columns found: {header}")
+        if debug_headers:
+            with open("headers_debug.txt", "w") as f:
+                f.write(str(header))
+
+        wanted = set(c for c in profile.values() if c) if profile else None
+        positions = None
+        if input_path.lower().endswith(('.xlsx', '.xls')):
+            if chunksize:
+                chunks = xlsx_reader.iter_xlsx_columns(input_path, columns=wanted, chunksize=chunksize)
+            else:
+                chunks = [xlsx_reader.read_xlsx_columns(input_path, columns=wanted)]
+        elif wanted is None:
+            chunks = pd.read_csv(input_path, chunksize=chunksize)
+        else:
+            # By position, so duplicate header names keep the names pandas gives them (Phone.1...)
+            positions = [i for i, name in enumerate(header) if name in wanted]
+            chunks = pd.read_csv(input_path, usecols=positions, chunksize=chunksize)
+        if not chunksize and not isinstance(chunks, list):
+            chunks = [chunks]
+
+        for n, df in enumerate(chunks):
+            if positions is not None:
+                df.columns = [header[i] for i in positions]
+            if profile and n == 0:
+                logger.info(f"Loaded {len(df.columns)} of {len(header)} columns")
+            yield df
+    except Exception as e:
+        logger.error(f"Failed to read file: {e}")
+        sys.exit(1)
+
+def build_outreach(df: pd.DataFrame, repair_model: str = "flat",
+                   profile: Optional[Dict[str, Optional[str]]] = None, verbose: bool = True) -> pd.DataFrame:
+    """
+    Detects columns (unless a profile is given), prices and drafts messages for a lead table. Returns EXPORT_COLS.
+    verbose=False skips the column-mapping logs (later chunks of a file already logged them).
+    """
+    # --- Column detection ---
+    profile = profile or detect_columns(df.columns)
+    owner_col = profile["owner"]
+    address_col = profile["address"]
+    pass_phone_col = profile["phone"]
+    offer_col = profile["offer"]
+    value_col = profile["value"]
+    sqft_col = profile["sqft"]
+    year_col = profile["year"]
+    baths_col = profile["baths"]
 
     missing = []
     if not owner_col: missing.append("Owner Name")
     if not address_col: missing.append("Address")
     
     # We allow Phone to be missing now
-    if not pass_phone_col:
+    if not pass_phone_col and verbose:
         logger.warning("No phone column found. Outreach list will have empty phone numbers.")
 
     if missing:
@@ -145,67 +326,338 @@ def process_file(input_path: str, output_path: str):
         logger.error(f"Available columns: {list(df.columns)}")
         sys.exit(1)
 
-    logger.info(f"Mapped Columns: Owner='{owner_col}', Address='{address_col}', Phone='{pass_phone_col}'")
+    if verbose:
+        logger.info(f"Mapped Columns: Owner='{owner_col}', Address='{address_col}', Phone='{pass_phone_col}'")
 
     out = df.copy()
 
-    # --- Build Offer_Proxy ---
-    if offer_col:
-        logger.info(f"Using existing Offer column: {offer_col}")
-        out["Offer_Proxy"] = pd.to_numeric(out[offer_col], errors="coerce")
-    else:
-        if not value_col:
-            logger.error("No Offer/MAO column AND no Value Proxy column found. Cannot calculate offer.")
-            sys.exit(1)
+    with stage_metrics.step("price"):
+        # --- Build Offer_Proxy ---
+        if offer_col:
+            if verbose:
+                logger.info(f"Using existing Offer column: {offer_col}")
+            out["Offer_Proxy"] = pd.to_numeric(out[offer_col], errors="coerce")
+        else:
+            if not value_col:
+                logger.error("No Offer/MAO column AND no Value Proxy column found. Cannot calculate offer.")
+                sys.exit(1)
             
-        logger.info(f"Calculating Offer from Value column: {value_col}")
-        value_proxy = pd.to_numeric(out[value_col], errors="coerce").fillna(0)
+            if verbose:
+                logger.info(f"Calculating Offer from Value column: {value_col}")
+            value_proxy = pd.to_numeric(out[value_col], errors="coerce").fillna(0)
 
-        if sqft_col:
-            sqft = pd.to_numeric(out[sqft_col], errors="coerce").fillna(0)
-            repairs = sqft * 25.0
-        else:
-            repairs = value_proxy * 0.30
+            if sqft_col and repair_model == "detailed":
+                # property_calc's COST_MATRIX model; lists without baths get a 2-bath assumption
+                if verbose:
+                    logger.info(f"Using detailed repair model (Year='{year_col}', Baths='{baths_col}')")
+                sqft = pd.to_numeric(out[sqft_col], errors="coerce").fillna(0)
+                year = pd.to_numeric(out[year_col], errors="coerce") if year_col else np.nan
+                baths = pd.to_numeric(out[baths_col], errors="coerce").fillna(2.0) if baths_col else 2.0
+                repairs = property_calc.calculate_detailed_repairs_batch(year, sqft, baths)
+            elif sqft_col:
+                sqft = pd.to_numeric(out[sqft_col], errors="coerce").fillna(0)
+                repairs = sqft * FLAT_REPAIR_PER_SQFT
+            else:
+                repairs = value_proxy * 0.30
 
-        out["Offer_Proxy"] = (value_proxy * 0.70) - repairs - 10000
+            out["Offer_Proxy"] = property_calc.mao_batch(value_proxy, repairs)
 
-    # --- Action & Message ---
-    out["Action"] = out["Offer_Proxy"].apply(choose_action)
-    out["Owner_Name"] = out[owner_col].fillna("").astype(str).str.strip()
-    out["Property_Address"] = out[address_col].fillna("").astype(str).str.strip()
+    with stage_metrics.step("draft"):
+        # --- Action & Message ---
+        out["Action"] = choose_action_series(out["Offer_Proxy"])
+        out["Owner_Name"] = out[owner_col].fillna("").astype(str).str.strip()
+        out["Property_Address"] = out[address_col].fillna("").astype(str).str.strip()
     
-    if pass_phone_col:
-        out["Phone"] = out[pass_phone_col].apply(clean_phone)
-    else:
-        out["Phone"] = ""
+        if pass_phone_col:
+            out["Phone"] = clean_phone_series(out[pass_phone_col])
+        else:
+            out["Phone"] = ""
     
-    out["Message_Draft"] = out.apply(make_message, axis=1)
+        out["Message_Draft"] = make_messages(out)
+
+    return out[EXPORT_COLS]
 
+def print_preview(out: pd.DataFrame):
+    print("\n--- Preview (Top 5) ---")
+    print(out[EXPORT_COLS].head(5).to_string(index=False))
+    print("-----------------------\n")
+
+def write_outreach(out: pd.DataFrame, output_path: str):
     # --- Export ---
-    export_cols = ["Owner_Name", "Property_Address", "Phone", "Offer_Proxy", "Action", "Message_Draft"]
-    
     try:
-        out[export_cols].to_csv(output_path, index=False)
+        out[EXPORT_COLS].to_csv(output_path, index=False)
         logger.info(f"Successfully saved {len(out)} rows to: {output_path}")
         
         # Preview
-        print("\n--- Preview (Top 5) ---")
-        print(out[export_cols].head(5).to_string(index=False))
-        print("-----------------------\n")
+        print_preview(out)
         
     except Exception as e:
         logger.error(f"Failed to write output file: {e}")
         sys.exit(1)
 
+def apply_suppression(out: pd.DataFrame, suppression_db: Optional[str], seen: Optional[set] = None, known=None):
+    """
+    Splits a chunk into (kept, suppressed) against the index (None: duplicates only); `seen` carries
+    keys across chunks and `known` is the index's hash set (suppression.load_known), loaded once per run.
+    """
+    kept, suppressed = suppression.suppress(out, suppression_db, seen=seen, known=known)
+    for reason, n in suppressed['Suppressed_Reason'].value_counts().items():
+        stage_metrics.dropped(f"suppressed_{reason.lower()}", n)
+    return kept, suppressed
+
+# --shard-by names -> output columns ("zip" comes from a zip column, else the end of the address)
+SHARD_KEYS = {"action": "Action", "zip": "Zip5"}
+ZIP_CANDIDATES = ["zip", "zip code", "zipcode", "zip_code", "property zip", "site_zip", "site_addr_3"]
+
+INPUT_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+def detect_file(input_path: str, want_zip: bool = False):
+    """(profile, zip column) for one file, from its header row (profile is None if the file is missing)."""
+    header = read_header(input_path) if os.path.exists(input_path) else None
+    profile = resolve_profile(header) if header is not None else None
+    zip_col = None
+    if want_zip and profile:
+        zip_col = pick_col(header, ZIP_CANDIDATES)
+        if zip_col:
+            profile = {**profile, "zip": zip_col}
+    return profile, zip_col
+
+def draft_chunks(input_path: str, profile, zip_col: Optional[str] = None, want_zip: bool = False,
+                 repair_model: str = "flat", debug_headers: bool = False, chunk_rows: Optional[int] = CHUNK_ROWS,
+                 source: Optional[str] = None):
+    """(rows read, drafted chunk) per chunk of one file; Zip5 is added when want_zip, Source when given."""
+    chunks = iter_input(input_path, debug_headers=debug_headers, profile=profile, chunksize=chunk_rows)
+    first = True
+    while True:
+        with stage_metrics.step("read"):
+            df = next(chunks, None)
+        if df is None:
+            return
+        out = build_outreach(df, repair_model=repair_model, profile=profile, verbose=first)
+        first = False
+        if want_zip:
+            out["Zip5"] = shard_writer.zip5(df[zip_col] if zip_col else out["Property_Address"])
+        if source is not None:
+            out["Source"] = source
+        yield len(df), out
+
+def write_stream(chunks, output_path: str, columns: List[str] = EXPORT_COLS, suppression_db: Optional[str] = None,
+                 dedupe: bool = False, shard_rows: Optional[int] = None, shard_by: Optional[List[str]] = None,
+                 compress: bool = False):
+    """
+    Suppresses/dedupes and writes (rows read, drafted chunk) pairs as they arrive (see shard_writer
+    for shard_rows / shard_by / compress). Dropped rows go to <output>_suppressed.csv with a reason.
+    """
+    key_cols = [SHARD_KEYS[k] for k in shard_by or []]
+    writer = shard_writer.ShardWriter(output_path, columns, max_rows=shard_rows, shard_by=key_cols,
+                                      compress=compress)
+    # Only created if a row actually gets suppressed
+    suppressed_path = shard_writer.split_output(output_path)[0] + "_suppressed.csv"
+    suppressed_writer = shard_writer.ShardWriter(suppressed_path, columns + ["Suppressed_Reason"],
+                                                 write_empty=False)
+    seen, contacted, reasons = set(), {}, {}
+    known = suppression.load_known(suppression_db) if suppression_db else None
+    n_in = n_out = 0
+    preview = []
+
+    with writer, suppressed_writer:
+        for rows, out in chunks:
+            n_in += rows
+            if suppression_db or dedupe:
+                with stage_metrics.step("suppress" if suppression_db else "dedupe"):
+                    out, suppressed = apply_suppression(out, suppression_db, seen, known)
+                    if suppression_db:
+                        contacted.update(dict.fromkeys(suppression.contact_keys(out)))
+                suppressed_writer.write(suppressed)
+                for reason, n in suppressed['Suppressed_Reason'].value_counts().items():
+                    reasons[reason] = reasons.get(reason, 0) + int(n)
+            n_out += len(out)
+            if sum(len(p) for p in preview) < 5:
+                preview.append(out.head(5))
+            with stage_metrics.step("write"):
+                writer.write(out)
+    stage_metrics.rows_in(n_in)
+    stage_metrics.rows_out(n_out)
+
+    if suppression_db or dedupe:
+        what = f"Suppression ({suppression_db})" if suppression_db else "Dedupe"
+        logger.info(f"{what}: kept {n_out}, suppressed {suppressed_writer.rows} {reasons}")
+        if suppressed_writer.rows:
+            logger.info(f"Suppressed rows saved to: {suppressed_path}")
+    if writer.manifest:
+        logger.info(f"Successfully saved {n_out} rows to {len(writer.shards)} file(s), "
+                    f"listed in {shard_writer.manifest_path(output_path)}")
+    else:
+        logger.info(f"Successfully saved {n_out} rows to: {output_path}")
+    print_preview(pd.concat(preview) if preview else pd.DataFrame(columns=EXPORT_COLS))
+
+    if suppression_db:
+        # Exported = contacted: later lists will skip these phones and addresses
+        with stage_metrics.step("record_suppression"):
+            added = suppression.record_keys(pd.Series(list(contacted), dtype=object), suppression_db,
+                                            campaign=os.path.basename(output_path))
+        logger.info(f"Recorded {added} new phones/addresses in {suppression_db}")
+
+def process_file(input_path: str, output_path: str, repair_model: str = "flat", debug_headers: bool = False,
+                 suppression_db: Optional[str] = None, shard_rows: Optional[int] = None,
+                 shard_by: Optional[List[str]] = None, compress: bool = False, chunk_rows: int = CHUNK_ROWS):
+    """
+    Streams input_path through build_outreach chunk_rows rows at a time. Each chunk is written as
+    soon as it is drafted (see shard_writer for shard_rows / shard_by / compress), so memory stays
+    flat however long the list is.
+    """
+    shard_by = shard_by or []
+    with stage_metrics.stage("outreach", input=input_path):
+        # Resolve the column mapping from the header row, then load only those columns
+        with stage_metrics.step("detect"):
+            profile, zip_col = detect_file(input_path, want_zip="zip" in shard_by)
+        chunks = draft_chunks(input_path, profile, zip_col, want_zip="zip" in shard_by, repair_model=repair_model,
+                              debug_headers=debug_headers, chunk_rows=chunk_rows)
+        write_stream(chunks, output_path, suppression_db=suppression_db, shard_rows=shard_rows,
+                     shard_by=shard_by, compress=compress)
+
+def expand_inputs(inputs: List[str], exclude: List[str] = ()) -> List[str]:
+    """
+    Lead files for a list of paths, directories and glob patterns (directories give every
+    CSV/Excel file in them). Sorted per entry; `exclude` (e.g. output_files()) is left out.
+    """
+    skip = {os.path.abspath(p) for p in exclude}
+    paths = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            found = [os.path.join(entry, name) for name in os.listdir(entry)]
+        elif glob.has_magic(entry):
+            found = glob.glob(entry)
+        else:
+            paths.append(entry)
+            continue
+        paths.extend(sorted(p for p in found if os.path.isfile(p) and p.lower().endswith(INPUT_EXTENSIONS)
+                            and not os.path.basename(p).startswith(('~$', '.'))))
+    unique = dict.fromkeys(p for p in paths if os.path.abspath(p) not in skip)
+    return list(unique)
+
+def output_files(output_path: str) -> List[str]:
+    """
+    Every file an export to output_path writes: the output itself, <output>_suppressed.csv and
+    the shards listed in its manifest. None of them may be read back as vendor leads.
+    """
+    base = shard_writer.split_output(output_path)[0]
+    files = [output_path, base + "_suppressed.csv"]
+    manifest = shard_writer.load_manifest(shard_writer.manifest_path(output_path))
+    if manifest:
+        folder = os.path.dirname(shard_writer.manifest_path(output_path))
+        files.extend(os.path.join(folder, shard['file']) for shard in manifest.get('shards', []))
+    return files
+
+def _draft_file(task):
+    """One whole file drafted in a worker process: (rows read, EXPORT_COLS + Source [+ Zip5])."""
+    input_path, profile, zip_col, want_zip, repair_model = task
+    drafted = list(draft_chunks(input_path, profile, zip_col, want_zip=want_zip, repair_model=repair_model,
+                                chunk_rows=None, source=os.path.basename(input_path)))
+    return sum(n for n, _ in drafted), pd.concat([out for _, out in drafted], ignore_index=True)
+
+def _bounded_map(pool, fn, tasks, window: int):
+    """
+    pool.map in input order, but with at most `window` tasks submitted ahead of the one being
+    consumed: pool.map submits everything up front, so finished frames would pile up in this process.
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(fn, task))
+        if len(pending) > window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def process_files(input_paths: List[str], output_path: str, repair_model: str = "flat",
+                  suppression_db: Optional[str] = None, shard_rows: Optional[int] = None,
+                  shard_by: Optional[List[str]] = None, compress: bool = False, workers: Optional[int] = None):
+    """
+    Many vendor files into one outreach output. Columns are resolved per file from its header,
+    files are read and drafted `workers` at a time in a process pool, and the results are merged
+    in input order with a Source column. A phone or address seen in an earlier row or file is
+    dropped as a duplicate (against the suppression index too, with suppression_db).
+    """
+    shard_by = shard_by or []
+    want_zip = "zip" in shard_by
+    workers = max(1, min(workers or os.cpu_count() or 1, len(input_paths)))
+    with stage_metrics.stage("outreach", input=input_paths, workers=workers):
+        tasks = []
+        with stage_metrics.step("detect"):
+            # In this process: profiles are cached on disk, and workers should not race to write them
+            for path in input_paths:
+                if not os.path.exists(path):
+                    logger.error(f"Input file not found: {path}")
+                    sys.exit(1)
+                profile, zip_col = detect_file(path, want_zip=want_zip)
+                tasks.append((path, profile, zip_col, want_zip, repair_model))
+        logger.info(f"Processing {len(tasks)} files with {workers} worker(s)")
+
+        def drafted(results):
+            results = iter(results)
+            for path in input_paths:
+                with stage_metrics.step("load"):
+                    rows, out = next(results)
+                logger.info(f"{os.path.basename(path)}: {rows} rows")
+                yield rows, out
+
+        columns = EXPORT_COLS + ["Source"]
+        if workers == 1:
+            write_stream(drafted(map(_draft_file, tasks)), output_path, columns, suppression_db=suppression_db,
+                         dedupe=True, shard_rows=shard_rows, shard_by=shard_by, compress=compress)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            write_stream(drafted(_bounded_map(pool, _draft_file, tasks, workers)), output_path, columns,
+                         suppression_db=suppression_db, dedupe=True, shard_rows=shard_rows, shard_by=shard_by,
+                         compress=compress)
+
 def main():
     parser = argparse.ArgumentParser(description="Prepare real estate leads for outreach (SMS/RVM).")
-    parser.add_argument("--input", "-i", required=False, default="ready_for_kind_emails.csv", help="Path to the input CSV/Excel file.")
-    parser.add_argument("--output", "-o", required=False, default="outreach_ready.csv", help="Path to the output CSV file.")
+    parser.add_argument("--input", "-i", nargs="+", default=["ready_for_kind_emails.csv"],
+                        help="Input CSV/Excel file(s), folder(s) or glob pattern(s). More than one file is merged "
+                             "into one deduped output with a Source column.")
+    parser.add_argument("--output", "-o", required=False, default="outreach_ready.csv",
+                        help="Path to the output CSV file (.csv.gz to compress).")
+    parser.add_argument("--debug-headers", action="store_true", help="Also write the input's headers to headers_debug.txt.")
+    parser.add_argument("--repair-model", choices=["flat", "detailed"], default="flat",
+                        help="Repairs when no offer column exists: flat $25/sqft, or property_calc's COST_MATRIX model.")
+    parser.add_argument("--suppress", nargs="?", const=suppression.SUPPRESSION_DB, default=None, metavar="INDEX",
+                        help=f"Skip phones/addresses already contacted and record this export "
+                             f"(default index: {suppression.SUPPRESSION_DB}).")
+    parser.add_argument("--shard-rows", type=int, metavar="N",
+                        help="At most N rows per output file (the SMS/RVM upload cap); adds a manifest.")
+    parser.add_argument("--shard-by", nargs="+", choices=sorted(SHARD_KEYS),
+                        help="One set of output files per Action and/or zip; adds a manifest.")
+    parser.add_argument("--gzip", action="store_true", help="Gzip every output file; adds a manifest.")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Rows read and drafted at a time.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Files loaded at once when there are several inputs (default: one per CPU).")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Also write cProfile/tracemalloc hot spots to {stage_metrics.PROFILE_FILE}.")
+    parser.add_argument("--metrics", nargs="?", const=stage_metrics.METRICS_FILE, default=None, metavar="PATH",
+                        help=f"Append per-stage timings, row counts and peak memory to PATH "
+                             f"(default: {stage_metrics.METRICS_FILE}; or set ${stage_metrics.METRICS_ENV}).")
     
     args = parser.parse_args()
+    stage_metrics.enable_metrics(args.metrics)
+    configure_logging()
     
     print(f"--- Real Estate Outreach Prep Tool ---")
-    process_file(args.input, args.output)
+    stage_metrics.enable_profile(args.profile)
+    inputs = expand_inputs(args.input, exclude=output_files(args.output))
+    if not inputs:
+        # Also when the only inputs are this export's own files
+        logger.error(f"No CSV/Excel input files found in: {' '.join(args.input)} "
+                     f"(the output, its shards and its _suppressed file are never inputs)")
+        sys.exit(1)
+    multi = len(inputs) > 1 or any(os.path.isdir(p) or glob.has_magic(p) for p in args.input)
+    if not multi:
+        process_file(inputs[0], args.output, repair_model=args.repair_model, debug_headers=args.debug_headers,
+                     suppression_db=args.suppress, shard_rows=args.shard_rows, shard_by=args.shard_by,
+                     compress=args.gzip, chunk_rows=args.chunk_rows)
+        return
+    process_files(inputs, args.output, repair_model=args.repair_model, suppression_db=args.suppress,
+                  shard_rows=args.shard_rows, shard_by=args.shard_by, compress=args.gzip, workers=args.workers)
 
 if __name__ == "__main__":
     main()
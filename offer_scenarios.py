@@ -0,0 +1,142 @@
+import argparse
+import itertools
+import time
+import numpy as np
+import pandas as pd
+
+import make_outreach_ready
+import property_calc
+
+# --- THE SCENARIO ENGINE ---
+# How does a campaign change if the margin is 65% instead of 70%, repairs run $35/sqft, or the
+# fee drops to $5k? Instead of re-running the pipeline once per assumption, the lead table is
+# read once and every scenario is priced at the same time:
+#
+#   MAO[lead, scenario] = value * margin - sqft * repair_per_sqft * contingency - fee
+#
+# (the flat-repair rule make_outreach_ready uses when a list has no offer column). The lead x
+# scenario matrix is computed with NumPy broadcasting over blocks of leads, and each scenario's
+# SEND_OFFER / ASK_CONDITION counts and offer totals are accumulated as it goes.
+DEFAULT_MARGINS = [0.60, 0.65, 0.70, 0.75, 0.80]   # spans the ai_narrator risk tiers
+DEFAULT_REPAIR_RATES = [20.0, 25.0, 30.0, 35.0, 40.0]
+DEFAULT_CONTINGENCIES = [1.00, 1.10, 1.15, 1.25]
+DEFAULT_FEES = [5000.0, 10000.0, 15000.0]
+LEAD_BLOCK = 50_000
+# The raw vendor list: the scrub and outreach exports drop the value and sqft columns
+DEFAULT_INPUT = "1st.xlsx"
+OUTPUT_FILE = "scenario_summary.csv"
+
+# Where today's scripts sit on the grid
+CURRENT_RULES = {
+    'outreach': (property_calc.TARGET_MARGIN, make_outreach_ready.FLAT_REPAIR_PER_SQFT, 1.0,
+                 property_calc.WHOLESALE_FEE),
+    'scrub/hcad': (property_calc.TARGET_MARGIN, 30.0, 1.0, property_calc.WHOLESALE_FEE),
+}
+SCENARIO_COLS = ['margin', 'repair_per_sqft', 'contingency', 'fee']
+
+
+def scenario_grid(margins=DEFAULT_MARGINS, repair_rates=DEFAULT_REPAIR_RATES,
+                  contingencies=DEFAULT_CONTINGENCIES, fees=DEFAULT_FEES) -> pd.DataFrame:
+    """Every combination of the four grids, one scenario per row (tagged with the script it matches)."""
+    grid = pd.DataFrame(list(itertools.product(margins, repair_rates, contingencies, fees)),
+                        columns=SCENARIO_COLS, dtype=float)
+    grid['current'] = ''
+    for name, rule in CURRENT_RULES.items():
+        match = np.all(np.isclose(grid[SCENARIO_COLS].to_numpy(), rule), axis=1)
+        grid.loc[match, 'current'] = name
+    return grid
+
+
+def lead_inputs(df, profile=None):
+    """(value, sqft) arrays from a lead table, filled like make_outreach_ready's flat model."""
+    profile = profile or make_outreach_ready.detect_columns(df.columns)
+    if not profile['value'] or not profile['sqft']:
+        raise ValueError("Scenarios need a value and a sqft column "
+                         f"(found value={profile['value']!r}, sqft={profile['sqft']!r}).")
+    value = pd.to_numeric(df[profile['value']], errors='coerce').fillna(0).to_numpy(dtype=float)
+    sqft = pd.to_numeric(df[profile['sqft']], errors='coerce').fillna(0).to_numpy(dtype=float)
+    return value, sqft
+
+
+def mao_matrix(value, sqft, scenarios) -> np.ndarray:
+    """The full lead x scenario MAO matrix (n_leads * n_scenarios floats: use run_scenarios for big lists)."""
+    margin = scenarios['margin'].to_numpy()[None, :]
+    repair = (scenarios['repair_per_sqft'] * scenarios['contingency']).to_numpy()[None, :]
+    fee = scenarios['fee'].to_numpy()[None, :]
+    return np.asarray(value, dtype=float)[:, None] * margin - np.asarray(sqft, dtype=float)[:, None] * repair - fee
+
+
+def run_scenarios(value, sqft, scenarios, send_min=make_outreach_ready.SEND_OFFER_MIN, matrix_path=None,
+                  block=LEAD_BLOCK) -> pd.DataFrame:
+    """
+    Prices every lead under every scenario in one pass over the leads. Returns `scenarios` with
+    send_offer / ask_condition counts, send_pct, and the total and average SEND_OFFER offer.
+    matrix_path also saves the lead x scenario MAO matrix as a float32 .npy file.
+    """
+    n, s = len(value), len(scenarios)
+    send = np.zeros(s, dtype=np.int64)
+    offered = np.zeros(s)
+    matrix = None
+    if matrix_path:
+        matrix = np.lib.format.open_memmap(matrix_path, mode='w+', dtype=np.float32, shape=(n, s))
+
+    for start in range(0, n, block):
+        mao = mao_matrix(value[start:start + block], sqft[start:start + block], scenarios)
+        hit = mao >= send_min
+        send += hit.sum(axis=0)
+        offered += np.where(hit, mao, 0.0).sum(axis=0)
+        if matrix is not None:
+            matrix[start:start + block] = mao
+    if matrix is not None:
+        matrix.flush()
+
+    summary = scenarios.copy()
+    summary['send_offer'] = send
+    summary['ask_condition'] = n - send
+    summary['send_pct'] = np.round(100.0 * send / n, 2) if n else 0.0
+    summary['total_offer'] = np.round(offered, 2)
+    summary['avg_offer'] = np.round(np.divide(offered, send, out=np.zeros(s), where=send > 0), 2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offer sensitivity: price a lead list under a grid of assumptions.")
+    parser.add_argument("--input", "-i", default=DEFAULT_INPUT, help="Lead list (CSV/Excel) with value and sqft.")
+    parser.add_argument("--output", "-o", default=OUTPUT_FILE, help="Per-scenario summary CSV.")
+    parser.add_argument("--margins", type=float, nargs="+", default=DEFAULT_MARGINS)
+    parser.add_argument("--repair-rates", type=float, nargs="+", default=DEFAULT_REPAIR_RATES, help="Repairs, $ per sqft.")
+    parser.add_argument("--contingencies", type=float, nargs="+", default=DEFAULT_CONTINGENCIES,
+                        help="Repair multipliers (1.15 = 15%% buffer).")
+    parser.add_argument("--fees", type=float, nargs="+", default=DEFAULT_FEES)
+    parser.add_argument("--send-min", type=float, default=make_outreach_ready.SEND_OFFER_MIN,
+                        help="Offers at or above this are SEND_OFFER.")
+    parser.add_argument("--matrix", metavar="NPY", help="Also save the lead x scenario MAO matrix (float32).")
+    args = parser.parse_args()
+
+    try:
+        header = make_outreach_ready.read_header(args.input)
+        profile = make_outreach_ready.resolve_profile(header)
+        df = make_outreach_ready.read_input(args.input, profile=profile)
+        value, sqft = lead_inputs(df, profile)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"ERROR: {args.input}: {e}")
+    scenarios = scenario_grid(args.margins, args.repair_rates, args.contingencies, args.fees)
+
+    start = time.perf_counter()
+    summary = run_scenarios(value, sqft, scenarios, send_min=args.send_min, matrix_path=args.matrix)
+    seconds = time.perf_counter() - start
+    summary.to_csv(args.output, index_label='scenario')
+
+    print(f"{len(value):,} leads x {len(scenarios):,} scenarios priced in {seconds:.2f}s -> {args.output}")
+    shown = summary.sort_values('send_offer', ascending=False)
+    print(shown.head(5).to_string())
+    current = summary[summary['current'] != '']
+    if len(current):
+        print("\nToday's rules:")
+        print(current.to_string())
+    if args.matrix:
+        print(f"MAO matrix saved to {args.matrix} ({len(value):,} x {len(scenarios):,}, float32)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,10 @@
 # mao_tool.py (V0.4: ZERO-COST AVM with Construction Cost & Lead Score)
+import argparse
+from typing import TYPE_CHECKING
+
+# numpy is imported inside the batch functions: the single-property calculator needs none of it
+if TYPE_CHECKING:
+    import numpy as np
 
 # --- 1. CONSTANTS (Your Proprietary Data/The Cost Matrix) ---
 # ADJUST THESE COSTS BASED ON YOUR SPECIFIC HOUSTON-AREA EXPERIENCE!
@@ -10,6 +16,20 @@ COST_MATRIX = {
     "PER_SQFT_COSMETIC": 10.00,    # For paint, flooring, trim
 }
 
+# Offer rules (MAO = ARV * margin - repairs - fee). offer_scenarios.py sweeps these.
+TARGET_MARGIN = 0.70
+WHOLESALE_FEE = 10000.00
+REPAIR_CONTINGENCY = 1.15                        # on top of the detailed repair total
+RISK_TIER_MARGINS = {1: 0.80, 2: 0.70, 3: 0.60}  # hot / stable / risky markets (ai_narrator tiers)
+
+# Lead-score flags as bits, so a whole list's flags fit in one integer array
+FLAG_LONG_OWNERSHIP = 1  # >= 10 years
+FLAG_HIGH_EQUITY = 2     # >= 15 years
+FLAG_LABELS = {
+    FLAG_LONG_OWNERSHIP: "Long Ownership (>10 Yrs)",
+    FLAG_HIGH_EQUITY: "High Equity (Likely Paid Off)",
+}
+
 # --- 2. CORE LOGIC FUNCTIONS ---
 
 def calculate_detailed_repairs(year_built: int, sqft: int, baths: float) -> float:
@@ -30,7 +50,7 @@ def calculate_detailed_repairs(year_built: int, sqft: int, baths: float) -> floa
     total_cost += COST_MATRIX["PER_SQFT_COSMETIC"] * sqft
     
     # 4. Final Contingency 
-    total_cost *= 1.15 
+    total_cost *= REPAIR_CONTINGENCY
     
     return total_cost
 
@@ -53,7 +73,7 @@ def calculate_lead_score(ownership_years: int) -> dict:
     return {"score": score, "flags": flags}
 
 
-def mao_calculator(arv: float, repairs: float, wholesale_fee: float = 10000.00, target_margin: float = 0.70) -> str:
+def mao_calculator(arv: float, repairs: float, wholesale_fee: float = WHOLESALE_FEE, target_margin: float = TARGET_MARGIN) -> str:
     """
     Calculates the Maximum Allowable Offer (MAO).
     """
@@ -65,6 +85,60 @@ def mao_calculator(arv: float, repairs: float, wholesale_fee: float = 10000.00,
         return f"Error during calculation: {e}"
 
 
+# --- 2b. BATCH UNDERWRITING (whole lists, one vectorized pass) ---
+# Same rules as the single-property functions above, applied to columns of N properties.
+# Missing values (NaN) behave like the scalar comparisons: no age trigger, no score.
+
+def calculate_detailed_repairs_batch(year_built, sqft, baths) -> "np.ndarray":
+    """Array version of calculate_detailed_repairs."""
+    import numpy as np
+    year_built = np.asarray(year_built, dtype=float)
+    sqft = np.asarray(sqft, dtype=float)
+    baths = np.asarray(baths, dtype=float)
+
+    total_cost = np.where(year_built < 1980,
+                          COST_MATRIX["ROOF_REPLACEMENT"] + COST_MATRIX["HVAC_REPLACEMENT"], 0.0)
+    total_cost = total_cost + COST_MATRIX["FULL_KITCHEN_RENO"]
+    total_cost = total_cost + COST_MATRIX["PER_BATHROOM_RENO"] * baths
+    total_cost = total_cost + COST_MATRIX["PER_SQFT_COSMETIC"] * sqft
+    return total_cost * REPAIR_CONTINGENCY
+
+
+def calculate_lead_score_batch(ownership_years) -> tuple:
+    """Array version of calculate_lead_score. Returns (score, flags bitmask)."""
+    import numpy as np
+    ownership_years = np.asarray(ownership_years, dtype=float)
+    flags = np.where(ownership_years >= 10, FLAG_LONG_OWNERSHIP, 0)
+    flags = flags | np.where(ownership_years >= 15, FLAG_HIGH_EQUITY, 0)
+    score = (flags & FLAG_LONG_OWNERSHIP > 0).astype(np.int8) + (flags & FLAG_HIGH_EQUITY > 0).astype(np.int8)
+    return score, flags.astype(np.int8)
+
+
+def mao_batch(arv, repairs, wholesale_fee: float = WHOLESALE_FEE, target_margin: float = TARGET_MARGIN) -> "np.ndarray":
+    """Numeric MAO for every property: (ARV * margin) - repairs - fee."""
+    import numpy as np
+    arv = np.asarray(arv, dtype=float)
+    repairs = np.asarray(repairs, dtype=float)
+    return (arv * target_margin) - repairs - wholesale_fee
+
+
+def underwrite_batch(year_built, sqft, baths, ownership_years, arv,
+                     wholesale_fee: float = WHOLESALE_FEE, target_margin: float = TARGET_MARGIN) -> dict:
+    """
+    Runs the detailed repair model, lead score and MAO over N properties at once.
+    Returns numeric arrays: repairs, score, flags (FLAG_* bits) and mao.
+    """
+    repairs = calculate_detailed_repairs_batch(year_built, sqft, baths)
+    score, flags = calculate_lead_score_batch(ownership_years)
+    mao = mao_batch(arv, repairs, wholesale_fee=wholesale_fee, target_margin=target_margin)
+    return {"repairs": repairs, "score": score, "flags": flags, "mao": mao}
+
+
+def flag_labels(flags: int) -> list:
+    """Turns one flags bitmask back into the human-readable flag list."""
+    return [label for bit, label in FLAG_LABELS.items() if flags & bit]
+
+
 def get_free_property_data_manual(address: str) -> dict:
     """
     Simulates API call by asking the user to manually enter data 
@@ -92,9 +166,14 @@ def get_free_property_data_manual(address: str) -> dict:
         # Return a structure with defaults to prevent crashing
         return {"arv": 0.0, "repairs": 0.0, "lead_score": 0, "lead_flags": []}
 
+    return property_data(arv, year, sqft, baths, owner_years)
+
+
+def property_data(arv: float, year_built: int, sqft: int, baths: float, ownership_years: int) -> dict:
+    """ARV, repairs and lead score for one property (what the manual lookup step returns)."""
     # CALCULATE REPAIRS & SCORE
-    repairs = calculate_detailed_repairs(year, sqft, baths)
-    score_data = calculate_lead_score(owner_years)
+    repairs = calculate_detailed_repairs(year_built, sqft, baths)
+    score_data = calculate_lead_score(ownership_years)
          
     return {
         "arv": arv, 
@@ -104,14 +183,16 @@ def get_free_property_data_manual(address: str) -> dict:
     }
 
 # --- 3. MAIN EXECUTION FLOW ---
-def qualify_lead_free(address: str):
+def qualify_lead_free(address: str, data: dict = None):
+    """Prints the MAO and lead score for `address` (asks for the county data unless `data` is given)."""
     print("\n--- ZERO-COST AVM LEAD QUALIFIER V0.4 ---")
-    property_data = get_free_property_data_manual(address)
+    if data is None:
+        data = get_free_property_data_manual(address)
     
-    live_arv = property_data.get("arv", 0.0)
-    estimated_repairs = property_data.get("repairs", 0.0)
-    lead_score = property_data.get("lead_score", 0)
-    lead_flags = property_data.get("lead_flags", [])
+    live_arv = data.get("arv", 0.0)
+    estimated_repairs = data.get("repairs", 0.0)
+    lead_score = data.get("lead_score", 0)
+    lead_flags = data.get("lead_flags", [])
 
     if live_arv > 0:
         print(f"\n--- MAO CALCULATION ---")
@@ -137,5 +218,21 @@ def qualify_lead_free(address: str):
         print("MAO calculation failed due to invalid data.")
         
 # Example Usage (This starts the program):
-target_address = "123 Main St, Houston, TX" 
-qualify_lead_free(target_address)
\ No newline at end of file
+# python property_calc.py "123 Main St, Houston, TX" --arv 250000 --year-built 1955 --sqft 1500 --baths 2.5 --ownership-years 12
+# (leave any flag out to be asked for all five values instead)
+def main():
+    parser = argparse.ArgumentParser(description="Zero-cost AVM: repairs, MAO and lead score for one property.")
+    parser.add_argument("address", nargs="?", default="123 Main St, Houston, TX")
+    parser.add_argument("--arv", type=float, help="County assessed value (ARV proxy).")
+    parser.add_argument("--year-built", type=int)
+    parser.add_argument("--sqft", type=int)
+    parser.add_argument("--baths", type=float)
+    parser.add_argument("--ownership-years", type=int)
+    args = parser.parse_args()
+
+    values = [args.arv, args.year_built, args.sqft, args.baths, args.ownership_years]
+    data = property_data(*values) if all(v is not None for v in values) else None
+    qualify_lead_free(args.address, data)
+
+if __name__ == "__main__":
+    main()
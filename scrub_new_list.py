@@ -1,35 +1,131 @@
+import argparse
+import contextlib
 import pandas as pd
+import arv_index
+import data_cache
+import property_calc
+import shard_writer
+import stage_metrics
 
 # --- THE EXCEL-DIRECT INNOVATION SCRUBBER ---
 INPUT_FILE = "1st.xlsx" 
 OUTPUT_FILE = "ready_for_kind_emails.csv"
+EXPORT_COLS = ['First Name', 'Last Name', 'Address', 'City', 'State', 'Zip', 'MAO']
+NEEDED_COLS = ['Effective Year Built', 'Building Sqft', 'Est Value'] + EXPORT_COLS[:-1]
 
-def attack():
-    print(f"Attacking {INPUT_FILE} directly...")
-    try:
-        # 1. Read the Excel file directly (No CSV conversion needed)
-        df = pd.read_excel(INPUT_FILE)
-        
-        # 2. Standardize numbers for your Appraisal logic
-        df['Effective Year Built'] = pd.to_numeric(df['Effective Year Built'], errors='coerce')
-        df['Building Sqft'] = pd.to_numeric(df['Building Sqft'], errors='coerce')
-        df['Est Value'] = pd.to_numeric(df['Est Value'], errors='coerce')
-
-        # 3. Apply the "Gold Digger" Logic: Pre-1980 + Over 1500 Sqft
-        gold = df[(df['Effective Year Built'] < 1980) & (df['Building Sqft'] > 1500)].copy()
-
-        # 4. Underwrite the MAO: (Value * 0.7) - (Sqft * 30) - 10k Fee
+# "flat" = Sqft * 30 repairs. "detailed" = property_calc's COST_MATRIX model
+# (vendor lists have no baths / ownership length, so DEFAULT_BATHS and no score are assumed)
+REPAIR_MODEL = "flat"
+DEFAULT_BATHS = 2.0
+# "assessed" = Est Value is the ARV. "comps" = arv_index.py's comps estimate from the county
+# file (ARV_SOURCE); leads it cannot price keep Est Value
+ARV_MODEL = "assessed"
+ARV_SOURCE = "real_acct.txt"
+# The list is scrubbed and written this many rows at a time (memory stays flat for any list size)
+CHUNK_ROWS = 250_000
+# --shard-by names -> key columns added for the writer ("Zip5" = the 5-digit part of Zip)
+SHARD_KEYS = {'zip': 'Zip5'}
+
+def scrub(df, arv_idx=None):
+    """Steps 2-4 on an already-loaded list: returns the export-ready gold deals."""
+    # 2. Standardize numbers for your Appraisal logic
+    df['Effective Year Built'] = pd.to_numeric(df['Effective Year Built'], errors='coerce')
+    df['Building Sqft'] = pd.to_numeric(df['Building Sqft'], errors='coerce')
+    df['Est Value'] = pd.to_numeric(df['Est Value'], errors='coerce')
+
+    # 3. Apply the "Gold Digger" Logic: Pre-1980 + Over 1500 Sqft
+    with stage_metrics.step("filter"):
+        pre_1980 = df['Effective Year Built'] < 1980
+        big = df['Building Sqft'] > 1500
+        stage_metrics.dropped('built_1980_or_later', (~pre_1980).sum())
+        stage_metrics.dropped('1500_sqft_or_less', (pre_1980 & ~big).sum())
+        gold = df[pre_1980 & big].copy()
+
+    with stage_metrics.step("price"):
+        # 4. Underwrite the MAO: (Value * 0.7) - Repairs - 10k Fee
         # MAO = (ARV * 0.70) - Repairs - Fee
-        gold['MAO'] = (gold['Est Value'] * 0.70) - (gold['Building Sqft'] * 30) - 10000
+        arv = gold['Est Value']
+        if ARV_MODEL == "comps":
+            arv = arv_index.arv_for(gold, 'Zip', 'Building Sqft', 'Effective Year Built',
+                                    fallback_col='Est Value', source=ARV_SOURCE, index=arv_idx)
+        if REPAIR_MODEL == "detailed":
+            gold['MAO'] = property_calc.underwrite_batch(
+                gold['Effective Year Built'], gold['Building Sqft'], DEFAULT_BATHS, float('nan'), arv
+            )['mao']
+        else:
+            gold['MAO'] = property_calc.mao_batch(arv, gold['Building Sqft'] * 30)
 
-        # 5. Export for your 6,935 Kind Credits
-        cols = ['First Name', 'Last Name', 'Address', 'City', 'State', 'Zip', 'MAO']
-        gold[cols].to_csv(OUTPUT_FILE, index=False)
-        print(f"Success! {len(gold)} high-probability deals ready in {OUTPUT_FILE}")
+    return gold[EXPORT_COLS].reset_index(drop=True)
+
+def attack(input_file=INPUT_FILE, output_file=OUTPUT_FILE, shard_rows=None, shard_by=None, compress=False,
+           collect=True, chunk_rows=CHUNK_ROWS):
+    """
+    Scrubs input_file chunk by chunk, streaming the gold deals to output_file (see shard_writer for
+    shard_rows / shard_by / compress). Returns the gold deals (None on failure). Pass
+    output_file=None to skip the CSV, collect=False to keep nothing in memory (returns an empty frame).
+    """
+    print(f"Attacking {input_file} directly...")
+    try:
+        with stage_metrics.stage("scrub", input=input_file):
+            arv_idx = arv_index.load_index(ARV_SOURCE) if ARV_MODEL == "comps" else None
+            writer = None
+            if output_file:
+                writer = shard_writer.ShardWriter(output_file, EXPORT_COLS, max_rows=shard_rows,
+                                                  shard_by=[SHARD_KEYS[k] for k in shard_by or []],
+                                                  compress=compress)
+            kept = []
+            n_in = n_out = 0
+            # 1. Read the Excel file directly (No CSV conversion needed)
+            # The columnar cache turns repeat runs into a Parquet read of just the columns we use
+            chunks = data_cache.iter_table(input_file, columns=NEEDED_COLS, chunksize=chunk_rows)
+            with writer or contextlib.nullcontext():
+                while True:
+                    with stage_metrics.step("read"):
+                        df = next(chunks, None)
+                    if df is None:
+                        break
+                    n_in += len(df)
+                    gold = scrub(df, arv_idx)
+                    n_out += len(gold)
+                    if collect:
+                        kept.append(gold)
+                    # 5. Export for your 6,935 Kind Credits
+                    if writer:
+                        with stage_metrics.step("write"):
+                            writer.write(gold.assign(Zip5=shard_writer.zip5(gold['Zip'])) if shard_by else gold)
+            stage_metrics.rows_in(n_in)
+            stage_metrics.rows_out(n_out)
+
+            if writer and writer.manifest:
+                print(f"Success! {n_out} high-probability deals ready in {len(writer.shards)} file(s), "
+                      f"listed in {shard_writer.manifest_path(output_file)}")
+            elif writer:
+                print(f"Success! {n_out} high-probability deals ready in {output_file}")
+            else:
+                print(f"Success! {n_out} high-probability deals ready.")
+        if not kept:
+            return pd.DataFrame(columns=EXPORT_COLS)
+        return pd.concat(kept, ignore_index=True) if len(kept) > 1 else kept[0]
 
     except Exception as e:
         print(f"Error: {e}")
-        print(f"TIP: Ensure '{INPUT_FILE}' is in C:\\Users\\lirving3661")
+        print(f"TIP: Ensure '{input_file}' is in C:\\Users\\lirving3661")
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrub a vendor list to pre-1980, >1500 sqft deals with a MAO.")
+    parser.add_argument("--input", "-i", default=INPUT_FILE, help="Vendor list (Excel or CSV).")
+    parser.add_argument("--output", "-o", default=OUTPUT_FILE, help="Output CSV (.csv.gz to compress).")
+    parser.add_argument("--shard-rows", type=int, metavar="N", help="At most N rows per output file.")
+    parser.add_argument("--shard-by", nargs="+", choices=sorted(SHARD_KEYS), help="One set of files per value.")
+    parser.add_argument("--gzip", action="store_true", help="Gzip every output file.")
+    parser.add_argument("--metrics", nargs="?", const=stage_metrics.METRICS_FILE, default=None, metavar="PATH",
+                        help=f"Append per-stage timings, row counts and peak memory to PATH "
+                             f"(default: {stage_metrics.METRICS_FILE}; or set ${stage_metrics.METRICS_ENV}).")
+    args = parser.parse_args()
+    stage_metrics.enable_metrics(args.metrics)
+    attack(args.input, args.output, shard_rows=args.shard_rows, shard_by=args.shard_by, compress=args.gzip,
+           collect=False)
 
 if __name__ == "__main__":
-    attack()
+    main()
@@ -0,0 +1,301 @@
+import argparse
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import re
+import pandas as pd
+
+# --- THE SHARDED OUTPUT WRITER ---
+# Exports are written chunk by chunk as they are produced instead of as one frame at the end.
+# Rows can be split into shards of at most `max_rows` rows (the SMS/RVM platform's upload cap
+# per file) and/or into one set of shards per key value (Action, zip), each optionally gzipped.
+# Memory is one chunk plus one open file per key, whatever the size of the list.
+#
+# Shards are written under .tmp names and renamed when the writer closes, so a failed run never
+# leaves a half-written export. Sharded or compressed output also gets a manifest
+# (<name>.manifest.json) with each shard's key, row count, size and the sha256 of its bytes on disk:
+#
+#   python shard_writer.py outreach_ready.manifest.json      # verify the shards before uploading
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+BLANK_KEY = "blank"
+ZIP_PATTERN = r"(\d{5})(?:-?\d{4})?$"
+GZIP_LEVEL = 6  # gzip's own default: level 9 doubles the write time for a few % smaller files
+
+
+def split_output(path):
+    """(base, extension, gzipped) of an output path: 'out.csv.gz' -> ('out', '.csv', True)."""
+    gzipped = path.lower().endswith('.gz')
+    if gzipped:
+        path = path[:-3]
+    base, ext = os.path.splitext(path)
+    return base, ext or '.csv', gzipped
+
+
+def manifest_path(output):
+    return split_output(output)[0] + MANIFEST_SUFFIX
+
+
+def key_label(value):
+    """File-name-safe text for one key value (NaN and blanks -> 'blank')."""
+    if value is None or (isinstance(value, float) and value != value):
+        return BLANK_KEY
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    label = re.sub(r"[^A-Za-z0-9_-]+", "_", str(value).strip()).strip("_")
+    return label or BLANK_KEY
+
+
+def zip5(values: pd.Series) -> pd.Series:
+    """5-digit ZIP per row from a zip column or the end of an address ('' when there is none)."""
+    text = values.astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+    return text.str.extract(ZIP_PATTERN, expand=False).fillna("").where(values.notna(), "")
+
+
+class _Shard:
+    """One output file being written: raw bytes are hashed and counted on their way to disk."""
+
+    def __init__(self, path, key, compress):
+        self.path = path
+        self.tmp = path + ".tmp"
+        self.key = key
+        self.rows = 0
+        self.bytes = 0
+        self.sha256 = hashlib.sha256()
+        self.raw = open(self.tmp, 'wb')
+        # mtime=0 keeps the gzip bytes (and so the checksum) identical for identical rows
+        self.gz = gzip.GzipFile(filename=os.path.basename(path)[:-3], mode='wb', fileobj=self,
+                                compresslevel=GZIP_LEVEL, mtime=0) \
+            if compress else None
+
+    def write(self, data):
+        # Also the file object GzipFile writes its compressed bytes to
+        self.sha256.update(data)
+        self.bytes += len(data)
+        return self.raw.write(data)
+
+    def flush(self):
+        self.raw.flush()
+
+    def write_rows(self, rows, header):
+        data = rows.to_csv(None, header=header, index=False).encode('utf-8')
+        (self.gz or self).write(data)
+
+    def finish(self):
+        """Closes the file; it stays under its .tmp name until publish()."""
+        if self.gz:
+            self.gz.close()
+        self.raw.close()
+
+    def publish(self):
+        os.replace(self.tmp, self.path)
+
+    def discard(self):
+        self.raw.close()
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
+
+
+class ShardWriter:
+    """
+    Streams DataFrame chunks to `output`:
+      - max_rows: start a new shard every max_rows rows (name.part0001.csv, name.part0002.csv...)
+      - shard_by: columns whose values pick the shard (name.SEND_OFFER.csv, name.SEND_OFFER.77004.csv...)
+      - compress: gzip every shard (also implied by an output ending in .gz)
+    Only `columns` are written; shard_by columns may be extra columns of the chunk.
+    With none of the three the result is exactly chunk.to_csv(output) of all rows, and no manifest.
+    write_empty=False writes no file at all when no rows came in (instead of a header-only file).
+    Use as a context manager: an exception discards every shard written so far.
+    """
+
+    def __init__(self, output, columns, max_rows=None, shard_by=None, compress=False, write_empty=True):
+        self.base, self.ext, gzipped = split_output(output)
+        self.output = output
+        self.columns = list(columns)
+        self.max_rows = max_rows or None
+        self.shard_by = list(shard_by or [])
+        self.compress = compress or gzipped
+        self.write_empty = write_empty
+        self.manifest = self.max_rows is not None or bool(self.shard_by) or self.compress
+        self.rows = 0
+        self.shards = []     # manifest entries, filled by close()
+        self._open = {}      # key -> _Shard being written
+        self._parts = {}     # key -> shards started so far
+        self._labels = {}    # file label -> key (two values that sanitize alike get told apart)
+        self._done = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def _label(self, key):
+        if not key:
+            return ""
+        label = ".".join(key_label(v) for v in key)
+        taken = self._labels.setdefault(label, key)
+        n = 1
+        while taken != key:
+            n += 1
+            taken = self._labels.setdefault(f"{label}_{n}", key)
+        return label if n == 1 else f"{label}_{n}"
+
+    def _shard_path(self, key):
+        part = self._parts[key] = self._parts.get(key, 0) + 1
+        name = self.base
+        label = self._label(key)
+        if label:
+            name += "." + label
+        if self.max_rows:
+            name += f".part{part:04d}"
+        return name + self.ext + (".gz" if self.compress else "")
+
+    def _shard(self, key):
+        shard = self._open.get(key)
+        if shard is None:
+            shard = self._open[key] = _Shard(self._shard_path(key), key, self.compress)
+        return shard
+
+    def _finish(self, key):
+        shard = self._open.pop(key)
+        shard.finish()
+        self._done.append(shard)
+
+    def _write_rows(self, key, rows):
+        while len(rows):
+            shard = self._shard(key)
+            room = self.max_rows - shard.rows if self.max_rows else len(rows)
+            piece = rows.iloc[:room]
+            shard.write_rows(piece, header=shard.rows == 0)
+            shard.rows += len(piece)
+            self.rows += len(piece)
+            rows = rows.iloc[room:]
+            if self.max_rows and shard.rows >= self.max_rows:
+                self._finish(key)
+
+    def write(self, chunk: pd.DataFrame):
+        """Appends a chunk (row order is kept within every shard)."""
+        body = chunk[self.columns]
+        if not self.shard_by:
+            self._write_rows((), body)
+            return
+        keys = [chunk[c] for c in self.shard_by]
+        for key, rows in body.groupby(keys, sort=False, dropna=False):
+            self._write_rows(tuple(key), rows)
+
+    def close(self):
+        """Renames every shard into place and writes the manifest. Returns the manifest dict."""
+        if not self._open and not self._done and self.write_empty:
+            self._shard(()).write_rows(pd.DataFrame(columns=self.columns), header=True)  # header-only file
+        for key in list(self._open):
+            self._finish(key)
+        # Full shards were closed as the run went, but nothing is renamed into place until now
+        for shard in self._done:
+            shard.publish()
+
+        self.shards = [{
+            'file': os.path.basename(s.path),
+            'key': dict(zip(self.shard_by, (str(v) for v in s.key))),
+            'rows': s.rows,
+            'bytes': s.bytes,
+            'sha256': s.sha256.hexdigest(),
+        } for s in self._done]
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'output': self.output,
+            'columns': self.columns,
+            'max_rows': self.max_rows,
+            'shard_by': self.shard_by,
+            'compress': self.compress,
+            'rows': self.rows,
+            'shards': self.shards,
+        }
+        if self.manifest and self.shards:
+            path = manifest_path(self.output)
+            _remove_stale(path, {s['file'] for s in self.shards})
+            with open(path + ".tmp", 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(path + ".tmp", path)
+        return manifest
+
+    def abort(self):
+        """Deletes every shard of this run, open or full; the previous export stays as it was."""
+        for shard in list(self._open.values()) + self._done:
+            shard.discard()
+        self._open.clear()
+        self._done.clear()
+
+
+def _remove_stale(path, keep):
+    """Deletes shards listed by the previous manifest at `path` that this run did not rewrite."""
+    previous = load_manifest(path) if os.path.exists(path) else None
+    if not previous:
+        return
+    folder = os.path.dirname(path)
+    for shard in previous.get('shards', []):
+        if shard['file'] not in keep:
+            stale = os.path.join(folder, shard['file'])
+            if os.path.exists(stale):
+                os.remove(stale)
+
+
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def verify_manifest(path):
+    """Re-hashes every shard listed in a manifest. Returns a list of problems (empty = all good)."""
+    manifest = load_manifest(path)
+    if manifest is None:
+        return [f"{path}: missing or unreadable"]
+    folder = os.path.dirname(path)
+    problems = []
+    for shard in manifest['shards']:
+        shard_path = os.path.join(folder, shard['file'])
+        if not os.path.exists(shard_path):
+            problems.append(f"{shard['file']}: missing")
+            continue
+        digest = hashlib.sha256()
+        with open(shard_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        if digest.hexdigest() != shard['sha256']:
+            problems.append(f"{shard['file']}: checksum mismatch")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify the shards listed in an export manifest.")
+    parser.add_argument("manifest", help="A <name>.manifest.json written next to sharded/gzipped output.")
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.manifest)
+    if manifest is None:
+        print(f"ERROR: Could not read {args.manifest}")
+        raise SystemExit(1)
+    for shard in manifest['shards']:
+        key = " ".join(f"{k}={v}" for k, v in shard['key'].items())
+        print(f"{shard['file']:<48} {shard['rows']:>10,} rows {shard['bytes']:>14,} bytes  {key}")
+    print(f"{len(manifest['shards'])} shard(s), {manifest['rows']:,} rows")
+    problems = verify_manifest(args.manifest)
+    for problem in problems:
+        print(f"BAD: {problem}")
+    if problems:
+        raise SystemExit(1)
+    print("All checksums match.")
+
+
+if __name__ == "__main__":
+    main()
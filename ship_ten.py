@@ -1,46 +1,86 @@
+import argparse
 import pandas as pd
+import hcad_parallel
+import hcad_stream
+import stage_metrics
 
-def ship_ten():
+def ship_ten(workers=1, use_store=False, arv="assessed", rank=False):
     print("--- 🚀 SPRINT: GENERATING 10 HOUSTON DRAFTS ---")
     
-    # 1. READ RAW DATA (Using the .txt extension we verified)
-    try:
-        df = pd.read_csv('real_acct.txt', sep='\t', nrows=10000, low_memory=False)
-    except Exception as e:
-        print(f"❌ ERROR: {e}")
-        return
-
-    # 2. FILTER FOR RESIDENTIAL
-    # 'A1' is Single Family in Houston. We'll grab any 'A' class.
-    res_mask = (df['state_class'].str.startswith('A', na=False)) & (df['bld_ar'] > 1500)
-    top_ten = df[res_mask].head(10).copy()
-
-    results = []
-
-    for _, row in top_ten.iterrows():
-        # DATA MAPPING
-        addr = f"{row['site_addr_1']}, Houston, TX {row['site_addr_3']}"
-        val = float(row['tot_mkt_val'])
-        sqft = float(row['bld_ar'])
-        year = int(row['yr_impr']) if pd.notnull(row['yr_impr']) else "Older"
-
-        # THE OFFER FORMULA (0.70 Rule)
-        offer = (val * 0.70) - (sqft * 30) - 10000
-
-        results.append({
-            'Address': addr,
-            'Offer': f"${offer:,.0f}",
-            'Reason': f"Built/Improved: {year} | Size: {sqft:,.0f} sqft. Offer accounts for system updates.",
-            'Outreach': f"Hi, I'm a local investor. I saw your property at {addr}. I could potentially offer around ${offer:,.0f} as-is. Open to a chat?"
-        })
-
-    # 3. SAVE THE OUTPUT
-    output_file = "houston_10_drafts.csv"
-    pd.DataFrame(results).to_csv(output_file, index=False)
-    
+    with stage_metrics.stage("ship_ten", workers=workers, store=use_store, arv=arv, rank=rank) as metrics:
+        # 1. STREAM RAW DATA (Using the .txt extension we verified)
+        # 2. FILTER FOR RESIDENTIAL, chunk by chunk across the whole county
+        # 'A1' is Single Family in Houston. We'll grab any 'A' class.
+        # (--store answers the same buy box from the indexed lead store instead)
+        # (--rank keeps the 10 best deals of the whole county, scored by hcad_stream.deal_score)
+        score_fn = hcad_stream.deal_score if rank else None
+        try:
+            with stage_metrics.step("scan"):
+                if use_store:
+                    import lead_store  # imported on use: spawned --workers re-import this script
+                    top_ten, stats = lead_store.scan_store('residential', keep=10, source='real_acct.txt',
+                                                          score_fn=score_fn)
+                else:
+                    top_ten, stats = hcad_parallel.scan('real_acct.txt', hcad_stream.residential_mask, keep=10,
+                                                        workers=workers, score_fn=score_fn)
+        except Exception as e:
+            print(f"❌ ERROR: {e}")
+            metrics['error'] = str(e)
+            return
+        hcad_stream.print_scan_stats(stats)
+        stage_metrics.rows_in(stats['rows'])
+        stage_metrics.dropped('buy_box', stats['rows'] - stats['matched'])
+        stage_metrics.dropped('keep_limit', stats['matched'] - len(top_ten))
+
+        # --arv comps: ARV from nearby comparable accounts instead of the assessed value
+        if arv == "comps":
+            with stage_metrics.step("arv"):
+                import arv_index
+                top_ten['arv'] = arv_index.arv_for(top_ten, 'site_addr_3', 'bld_ar', 'yr_blt',
+                                                   fallback_col='tot_mkt_val', source='real_acct.txt')
+
+        results = []
+
+        for _, row in top_ten.iterrows():
+            # DATA MAPPING
+            addr = f"{row['site_addr_1']}, Houston, TX {row['site_addr_3']}"
+            val = float(row['arv'] if 'arv' in row.index else row['tot_mkt_val'])
+            sqft = float(row['bld_ar'])
+            year = int(row['yr_impr']) if pd.notnull(row['yr_impr']) else "Older"
+
+            # THE OFFER FORMULA (0.70 Rule)
+            offer = (val * 0.70) - (sqft * 30) - 10000
+
+            results.append({
+                'Address': addr,
+                'Offer': f"${offer:,.0f}",
+                'Reason': f"Built/Improved: {year} | Size: {sqft:,.0f} sqft. Offer accounts for system updates.",
+                'Outreach': f"Hi, I'm a local investor. I saw your property at {addr}. I could potentially offer around ${offer:,.0f} as-is. Open to a chat?"
+            })
+
+        # 3. SAVE THE OUTPUT
+        output_file = "houston_10_drafts.csv"
+        pd.DataFrame(results).to_csv(output_file, index=False)
+        stage_metrics.rows_out(len(results))
+
     print(f"\n✅ SUCCESS! Target Reached.")
     print(f"📄 File created: {output_file}")
     print("Next Step: Open this file and verify the first 10 leads.")
 
 if __name__ == "__main__":
-    ship_ten()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Sprint: 10 Houston drafts from the county file.")
+    parser.add_argument("--workers", type=int, default=1, help="Processes to scan the file with.")
+    parser.add_argument("--store", action="store_true", help="Query the indexed lead store instead of scanning.")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Also write cProfile/tracemalloc hot spots to {stage_metrics.PROFILE_FILE}.")
+    parser.add_argument("--arv", choices=["assessed", "comps"], default="assessed",
+                        help="ARV for the offer: tot_mkt_val, or the comps index (arv_index.py).")
+    parser.add_argument("--rank", action="store_true",
+                        help="Keep the 10 best-scoring deals of the whole county instead of the first 10 found.")
+    parser.add_argument("--metrics", nargs="?", const=stage_metrics.METRICS_FILE, default=None, metavar="PATH",
+                        help=f"Append per-stage timings, row counts and peak memory to PATH "
+                             f"(default: {stage_metrics.METRICS_FILE}; or set ${stage_metrics.METRICS_ENV}).")
+    args = parser.parse_args()
+    stage_metrics.enable_metrics(args.metrics)
+    stage_metrics.enable_profile(args.profile)
+    ship_ten(workers=args.workers, use_store=args.store, arv=args.arv, rank=args.rank)
\ No newline at end of file
@@ -0,0 +1,309 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+
+import make_outreach_ready
+import stage_metrics
+import suppression
+
+# --- THE SKIP-TRACE MERGE-BACK ---
+# skip_prep.py sends the tracer "site_addr_1, Houston, TX". What comes back is the same property
+# in the tracer's own spelling: "STREET" for "ST", an "APT 4" or "#4" on the end, a city, "TX" and
+# a zip+4. This puts the phones back on our leads without comparing every pair of addresses:
+#
+#   1. Normalize both sides into street number, street name (USPS abbreviations), unit and zip.
+#   2. Exact pass: join on number + street + unit (confidence 1.0).
+#   3. Fuzzy pass for the leads still unmatched: an index of street-name trigrams blocked on
+#      street number + zip (the number alone when one side has no zip). Candidate pairs are only
+#      the rows that share a block and a trigram, scored by trigram overlap (Dice) and marked down
+#      when the units disagree.
+#
+# Every step is a join or a groupby over the rows, so the cost grows with the list instead of
+# with the number of pairs. Each lead keeps its best-scoring traced row and gets match_confidence
+# (0-1) and match_method (exact / fuzzy / blank).
+LEADS_FILE = "hot_deals_ready_for_zapier.csv"
+OUTPUT_FILE = "skip_traced_leads.csv"
+MIN_CONFIDENCE = 0.6
+UNIT_MISMATCH = 0.5   # both sides name a unit and they differ: probably the apartment next door
+UNIT_MISSING = 0.9    # only one side names a unit
+GRAM = 3
+
+# Trailing city names the tracers add (Harris County mailing cities), stripped with state and zip
+CITIES = [
+    "HOUSTON", "HOU", "KATY", "SPRING", "HUMBLE", "CYPRESS", "TOMBALL", "PASADENA", "BAYTOWN", "BELLAIRE",
+    "PEARLAND", "KINGWOOD", "CHANNELVIEW", "LA PORTE", "SOUTH HOUSTON", "JERSEY VILLAGE", "WEBSTER",
+    "FRIENDSWOOD", "SEABROOK", "DEER PARK", "GALENA PARK", "JACINTO CITY", "HOCKLEY", "WALLER", "CROSBY",
+    "HUFFMAN", "MAGNOLIA", "ATASCOCITA", "KLEIN", "SUGAR LAND", "MISSOURI CITY", "STAFFORD",
+]
+# number, street, unit, then the city / state / zip tail, in one anchored pass
+ADDRESS_PATTERN = (
+    r"^(?:(?P<number>\d+[A-Z]?)\b ?)?(?P<street>[^ ]*(?: [^ ]+)*?)"
+    r"(?: (?:APT|APARTMENT|UNIT|STE|SUITE|BLDG|LOT|RM|ROOM|#) ?(?P<unit>[A-Z0-9]+))?"
+    rf"(?: (?:{'|'.join(CITIES)}))?(?: (?:TX|TEXAS))?(?: (?P<zip>\d{{5}})(?: \d{{4}})?)?$"
+)
+# On top of suppression.ADDRESS_WORDS (applied to whole words of the street name)
+STREET_WORDS = {
+    **suppression.ADDRESS_WORDS,
+    'COVE': 'CV', 'SQUARE': 'SQ', 'CROSSING': 'XING', 'EXPRESSWAY': 'EXPY', 'POINT': 'PT', 'RIDGE': 'RDG',
+    'HOLLOW': 'HOLW', 'MEADOW': 'MDW', 'MEADOWS': 'MDWS', 'SPRINGS': 'SPGS', 'CREEK': 'CRK', 'LANDING': 'LNDG',
+    'FIRST': '1ST', 'SECOND': '2ND', 'THIRD': '3RD', 'FOURTH': '4TH', 'FIFTH': '5TH', 'SIXTH': '6TH',
+    'SEVENTH': '7TH', 'EIGHTH': '8TH', 'NINTH': '9TH', 'TENTH': '10TH',
+}
+PARTS = ['number', 'street', 'unit', 'zip']
+
+
+def _street_names(rest: pd.Series) -> pd.Series:
+    """STREET_WORDS over every distinct street name once (a list has far fewer streets than rows)."""
+    codes, uniques = pd.factorize(rest)
+    names = np.array([" ".join(STREET_WORDS.get(w, w) for w in s.split()) for s in uniques], dtype=object)
+    return pd.Series(names[codes] if len(names) else np.array([], dtype=object), index=rest.index)
+
+
+def parse_addresses(addresses: pd.Series, zips: pd.Series = None) -> pd.DataFrame:
+    """
+    number / street / unit / zip per address ('' where a part is missing). A zip column, when
+    given, wins over a zip at the end of the address.
+    """
+    text = addresses.fillna("").astype(str).str.upper().str.replace("#", " # ", regex=False)
+    text = text.str.replace(r"[^A-Z0-9# ]+", " ", regex=True).str.replace(r"\s+", " ", regex=True).str.strip()
+
+    parts = text.str.extract(ADDRESS_PATTERN).fillna("")
+
+    zip_code = parts['zip']
+    if zips is not None:
+        from shard_writer import zip5
+        given = zip5(zips)
+        zip_code = given.where(given != "", zip_code)
+    return pd.DataFrame({'number': parts['number'], 'street': _street_names(parts['street']),
+                         'unit': parts['unit'], 'zip': zip_code}, index=addresses.index)
+
+
+def _unit_factor(a: pd.Series, b: pd.Series) -> np.ndarray:
+    a, b = a.to_numpy(dtype=object), b.to_numpy(dtype=object)
+    both = (a != "") & (b != "")
+    return np.where(both & (a != b), UNIT_MISMATCH, np.where(both | ((a == "") & (b == "")), 1.0, UNIT_MISSING))
+
+
+def _zip_ok(a: pd.Series, b: pd.Series) -> np.ndarray:
+    a, b = a.to_numpy(dtype=object), b.to_numpy(dtype=object)
+    return (a == "") | (b == "") | (a == b)
+
+
+def exact_matches(leads: pd.DataFrame, traced: pd.DataFrame) -> pd.DataFrame:
+    """(lead, traced, confidence) for identical number + street + unit with compatible zips."""
+    key = PARTS[:3]
+    lhs = leads[leads['number'] != ""]
+    pairs = lhs.reset_index(names='lead').merge(traced.reset_index(names='traced'), on=key, suffixes=('', '_t'))
+    pairs = pairs[_zip_ok(pairs['zip'], pairs['zip_t'])]
+    return pairs[['lead', 'traced']].assign(confidence=1.0)
+
+
+def _grams(parts: pd.DataFrame, id_name: str) -> pd.DataFrame:
+    """One row per (row id, street trigram) with the row's number and zip; n_<id> = trigrams in its street."""
+    codes, uniques = pd.factorize(parts['street'])
+    gram_sets = [sorted({f" {s} "[i:i + GRAM] for i in range(len(s))}) for s in uniques]
+    counts = np.array([len(g) for g in gram_sets], dtype=np.int64)
+    flat = np.array([g for grams in gram_sets for g in grams], dtype=object)
+    starts = np.cumsum(counts) - counts
+
+    per_row = counts[codes]
+    rows = np.repeat(np.arange(len(parts)), per_row)
+    offsets = np.arange(per_row.sum()) - np.repeat(np.cumsum(per_row) - per_row, per_row)
+    return pd.DataFrame({
+        id_name: parts.index.to_numpy()[rows],
+        'number': parts['number'].to_numpy()[rows],
+        'zip': parts['zip'].to_numpy()[rows],
+        'gram': flat[np.repeat(starts[codes], per_row) + offsets],
+        'n_' + id_name: per_row[rows],
+    })
+
+
+def _shared_grams(lead_grams: pd.DataFrame, traced_grams: pd.DataFrame) -> pd.DataFrame:
+    """
+    Trigram hits between rows in the same block: (number, zip) when both zips are known, the number
+    alone when either is missing (a known zip on both sides that differs is another property).
+    """
+    lead_zip = lead_grams['zip'] != ""
+    traced_zip = traced_grams['zip'] != ""
+    blocks = [
+        lead_grams[lead_zip].merge(traced_grams[traced_zip], on=['number', 'zip', 'gram']),
+        lead_grams.drop(columns='zip').merge(traced_grams[~traced_zip].drop(columns='zip'), on=['number', 'gram']),
+        lead_grams[~lead_zip].drop(columns='zip').merge(traced_grams[traced_zip].drop(columns='zip'),
+                                                        on=['number', 'gram']),
+    ]
+    return pd.concat([b[['lead', 'traced', 'n_lead', 'n_traced']] for b in blocks], ignore_index=True)
+
+
+def fuzzy_matches(leads: pd.DataFrame, traced: pd.DataFrame, min_confidence=MIN_CONFIDENCE) -> pd.DataFrame:
+    """(lead, traced, confidence) via the blocked trigram index (see the header)."""
+    leads = leads[(leads['number'] != "") & (leads['street'] != "")]
+    traced = traced[(traced['number'] != "") & (traced['street'] != "")]
+    if not len(leads) or not len(traced):
+        return pd.DataFrame({'lead': [], 'traced': [], 'confidence': []})
+
+    shared = _shared_grams(_grams(leads, 'lead'), _grams(traced, 'traced'))
+    pairs = shared.groupby(['lead', 'traced'], sort=False).agg(
+        shared=('n_lead', 'size'), n_lead=('n_lead', 'first'), n_traced=('n_traced', 'first')).reset_index()
+    pairs['confidence'] = 2.0 * pairs['shared'] / (pairs['n_lead'] + pairs['n_traced'])
+    pairs = pairs[pairs['confidence'] >= min_confidence].reset_index(drop=True)
+
+    units = _unit_factor(leads['unit'].reindex(pairs['lead']).reset_index(drop=True),
+                         traced['unit'].reindex(pairs['traced']).reset_index(drop=True))
+    pairs['confidence'] *= units
+    return pairs.loc[pairs['confidence'] >= min_confidence, ['lead', 'traced', 'confidence']]
+
+
+def match_addresses(lead_addresses, traced_addresses, lead_zips=None, traced_zips=None,
+                    min_confidence=MIN_CONFIDENCE) -> pd.DataFrame:
+    """
+    Best traced row per lead: a frame indexed like lead_addresses with `traced` (index label of the
+    traced row, NaN if none), `match_confidence` and `match_method`.
+    """
+    with stage_metrics.step("normalize"):
+        leads = parse_addresses(lead_addresses, lead_zips)
+        traced = parse_addresses(traced_addresses, traced_zips)
+    with stage_metrics.step("exact"):
+        exact = exact_matches(leads, traced).assign(method='exact')
+    with stage_metrics.step("fuzzy"):
+        # A traced row that matched exactly is that lead's answer, not a candidate for another one
+        fuzzy = fuzzy_matches(leads[~leads.index.isin(exact['lead'])], traced[~traced.index.isin(exact['traced'])],
+                              min_confidence).assign(method='fuzzy')
+
+    best = pd.concat([exact, fuzzy], ignore_index=True)
+    best = best.sort_values(['confidence', 'traced'], ascending=[False, True], kind='stable')
+    best = best.drop_duplicates('lead').set_index('lead')
+    result = pd.DataFrame(index=lead_addresses.index)
+    result['traced'] = best['traced'].reindex(result.index)
+    result['match_confidence'] = best['confidence'].round(3).reindex(result.index)
+    result['match_method'] = best['method'].reindex(result.index).fillna("")
+    return result
+
+
+def merge_back(leads: pd.DataFrame, traced: pd.DataFrame, lead_address, traced_address, lead_zip=None,
+               traced_zip=None, min_confidence=MIN_CONFIDENCE) -> pd.DataFrame:
+    """Leads (same rows, same order) plus every traced column, match_confidence and match_method."""
+    leads = leads.reset_index(drop=True)
+    traced = traced.reset_index(drop=True)
+    match = match_addresses(leads[lead_address], traced[traced_address],
+                            leads[lead_zip] if lead_zip else None, traced[traced_zip] if traced_zip else None,
+                            min_confidence=min_confidence)
+    picked = traced.reindex(match['traced'].to_numpy()).reset_index(drop=True)
+    picked.columns = [f"{c}_traced" if c in leads.columns else c for c in picked.columns]
+    out = pd.concat([leads, picked], axis=1)
+    out['match_confidence'] = match['match_confidence'].to_numpy()
+    out['match_method'] = match['match_method'].to_numpy()
+    return out
+
+
+def _column(columns, given, candidates, role, required=True):
+    if given:
+        if given not in columns:
+            raise ValueError(f"No '{given}' column (have {list(columns)})")
+        return given
+    found = make_outreach_ready.pick_col(list(columns), candidates)
+    if required and not found:
+        raise ValueError(f"Could not find the {role} column in {list(columns)}; name it with --*-{role}")
+    return found
+
+
+def run_merge(traced_file, leads_file=LEADS_FILE, output_file=OUTPUT_FILE, lead_address=None, lead_zip=None,
+              traced_address=None, traced_zip=None, min_confidence=MIN_CONFIDENCE):
+    with stage_metrics.stage("skip_merge", input=traced_file):
+        with stage_metrics.step("read"):
+            leads = pd.read_csv(leads_file, dtype=str, keep_default_na=False)
+            traced = pd.read_csv(traced_file, dtype=str, keep_default_na=False)
+        stage_metrics.rows_in(len(leads))
+        lead_address = _column(leads.columns, lead_address, make_outreach_ready.ADDRESS_CANDIDATES, 'address')
+        traced_address = _column(traced.columns, traced_address, make_outreach_ready.ADDRESS_CANDIDATES, 'address')
+        lead_zip = _column(leads.columns, lead_zip, make_outreach_ready.ZIP_CANDIDATES, 'zip', required=False)
+        traced_zip = _column(traced.columns, traced_zip, make_outreach_ready.ZIP_CANDIDATES, 'zip', required=False)
+        print(f"Matching {len(traced):,} traced rows ('{traced_address}', zip '{traced_zip}') onto "
+              f"{len(leads):,} leads ('{lead_address}', zip '{lead_zip}')...")
+
+        out = merge_back(leads, traced, lead_address, traced_address, lead_zip, traced_zip, min_confidence)
+        methods = out['match_method'].value_counts()
+        stage_metrics.dropped('unmatched', (out['match_method'] == "").sum())
+        with stage_metrics.step("write"):
+            out.to_csv(output_file, index=False)
+        stage_metrics.rows_out(len(out))
+
+    print(f"Exact: {methods.get('exact', 0):,}  Fuzzy: {methods.get('fuzzy', 0):,}  "
+          f"Unmatched: {methods.get('', 0):,}  ->  {output_file}")
+    return out
+
+
+# --- BENCH: synthetic leads and a tracer-style rewrite of them ---
+def _traced_rewrite(leads, seed=0):
+    """The leads' addresses as a tracer might send them back, with the true lead row in `true_lead`."""
+    rng = np.random.default_rng(seed)
+    n = len(leads)
+    addr = leads['site_addr_1'].astype(str)
+    spelled = addr.str.replace(r" ST$", " STREET", regex=True).str.replace(r" DR$", " DRIVE", regex=True)
+    addr = addr.where(rng.random(n) < 0.5, spelled)
+    typo = rng.random(n) < 0.15   # one dropped letter in the street name
+    pos = addr.str.len().to_numpy() - rng.integers(2, 6, n)
+    addr = pd.Series([a[:p] + a[p + 1:] if t else a for a, p, t in zip(addr, pos, typo)], index=leads.index)
+    unit = rng.random(n) < 0.1
+    addr = addr.where(~unit, addr + " APT " + pd.Series(rng.integers(1, 40, n).astype(str), index=leads.index))
+    plus4 = pd.Series(rng.integers(1000, 9999, n).astype(str), index=leads.index)
+    zips = leads['site_addr_3'].astype(str)
+    full = addr + ", Houston, TX " + zips.where(rng.random(n) < 0.5, zips + "-" + plus4)
+    traced = pd.DataFrame({'Property Address': full, 'Mobile Number': rng.integers(2_000_000_000, 9_999_999_999, n)
+                           .astype(str), 'true_lead': np.arange(n)})
+    keep = rng.random(n) < 0.9   # tracers miss some
+    return traced[keep].sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def bench(n):
+    import synth_data
+    leads = synth_data.hcad_chunk(n, seed=7)[['acct', 'site_addr_1', 'site_addr_3', 'tot_mkt_val']]
+    traced = _traced_rewrite(leads)
+    start = time.perf_counter()
+    out = merge_back(leads, traced, 'site_addr_1', 'Property Address', lead_zip='site_addr_3')
+    seconds = time.perf_counter() - start
+    matched = out['match_method'] != ""
+    correct = (out['true_lead'].astype(float) == np.arange(len(out))) & matched
+    exact_only = out['match_method'] == "exact"
+    print(f"{n:,} leads, {len(traced):,} traced rows: {seconds:.2f}s")
+    print(f"  exact join alone matched {exact_only.sum() / len(traced):.1%} of traced rows")
+    print(f"  with fuzzy pass matched  {matched.sum() / len(traced):.1%} "
+          f"(precision {correct.sum() / max(matched.sum(), 1):.2%})")
+    print(out.loc[out['match_method'] == "fuzzy", ['site_addr_1', 'Property Address', 'match_confidence']]
+          .head(5).to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge a returned skip-trace file back onto the leads by address.")
+    parser.add_argument("traced", nargs="?", help="The skip tracer's results (CSV).")
+    parser.add_argument("--leads", default=LEADS_FILE, help="Lead table the trace was made from.")
+    parser.add_argument("--output", "-o", default=OUTPUT_FILE)
+    parser.add_argument("--lead-address", help="Address column in the leads (default: detected).")
+    parser.add_argument("--lead-zip", help="Zip column in the leads (default: detected, else the address).")
+    parser.add_argument("--traced-address", help="Address column in the traced file (default: detected).")
+    parser.add_argument("--traced-zip", help="Zip column in the traced file (default: detected, else the address).")
+    parser.add_argument("--min-confidence", type=float, default=MIN_CONFIDENCE,
+                        help="Fuzzy matches scoring below this are left unmatched.")
+    parser.add_argument("--bench", type=int, metavar="N", help="Time and score the merge on N synthetic leads.")
+    parser.add_argument("--metrics", nargs="?", const=stage_metrics.METRICS_FILE, default=None, metavar="PATH",
+                        help=f"Append per-stage timings, row counts and peak memory to PATH "
+                             f"(default: {stage_metrics.METRICS_FILE}; or set ${stage_metrics.METRICS_ENV}).")
+    args = parser.parse_args()
+    stage_metrics.enable_metrics(args.metrics)
+
+    if args.bench:
+        bench(args.bench)
+        return
+    if not args.traced or not os.path.exists(args.traced):
+        parser.error("give the traced file to merge (or --bench N)")
+    try:
+        run_merge(args.traced, args.leads, args.output, args.lead_address, args.lead_zip,
+                  args.traced_address, args.traced_zip, args.min_confidence)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,54 @@
+import argparse
+import os
 import pandas as pd
+import stage_metrics
+import suppression
 
 # --- THE SKIP-TRACE PREPARER V1.0 ---
 INPUT_FILE = "hot_deals_ready_for_zapier.csv"
 OUTPUT_FILE = "ready_for_skip_trace.csv"
+# Properties already contacted in a past campaign are not worth paying to skip trace again
+SUPPRESSION_DB = suppression.SUPPRESSION_DB
 
-def prep():
+def prep(input_file=INPUT_FILE, output_file=OUTPUT_FILE):
     print("🧹 Grooming 1,303 leads for the skip tracer...")
     try:
-        df = pd.read_csv(INPUT_FILE)
+        with stage_metrics.stage("skip_prep", input=input_file):
+            with stage_metrics.step("read"):
+                df = pd.read_csv(input_file)
+            stage_metrics.rows_in(len(df))
 
-        # 1. Standardize Address: Add 'Houston, TX' to ensure accuracy
-        df['site_addr_1'] = df['site_addr_1'] + ", Houston, TX"
+            if os.path.exists(SUPPRESSION_DB):
+                with stage_metrics.step("suppress"):
+                    # Only the index: repeats within hot deals are the tracer's input as-is
+                    df, skipped = suppression.suppress(df, SUPPRESSION_DB, address_col='site_addr_1', dedupe=False)
+                stage_metrics.dropped('already_contacted', len(skipped))
+                print(f"🚫 Skipped {len(skipped)} already-contacted properties ({SUPPRESSION_DB}).")
 
-        # 2. Keep only what the skip tracer needs (Privacy & Speed)
-        # Most tracers just need: Address, City, State, Zip
-        # Since we added Houston, TX above, we just send the full address column
-        upload_df = df[['site_addr_1', 'tot_mkt_val', 'MAO']].copy()
-        
-        # 3. Export
-        upload_df.to_csv(OUTPUT_FILE, index=False)
-        print(f"✅ Success! Your 'ready_for_skip_trace.csv' is in your user folder.")
+            # 1. Standardize Address: Add 'Houston, TX' to ensure accuracy
+            df['site_addr_1'] = df['site_addr_1'] + ", Houston, TX"
+
+            # 2. Keep only what the skip tracer needs (Privacy & Speed)
+            # Most tracers just need: Address, City, State, Zip
+            # Since we added Houston, TX above, we just send the full address column
+            upload_df = df[['site_addr_1', 'tot_mkt_val', 'MAO']].copy()
+            
+            # 3. Export
+            with stage_metrics.step("write"):
+                upload_df.to_csv(output_file, index=False)
+            stage_metrics.rows_out(len(upload_df))
+        print(f"✅ Success! Your '{output_file}' is in your user folder.")
 
     except Exception as e:
         print(f"❌ Error: {e}")
 
-prep()
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trim hot deals to what the skip tracer needs.")
+    parser.add_argument("--input", "-i", default=INPUT_FILE)
+    parser.add_argument("--output", "-o", default=OUTPUT_FILE)
+    parser.add_argument("--metrics", nargs="?", const=stage_metrics.METRICS_FILE, default=None, metavar="PATH",
+                        help=f"Append per-stage timings, row counts and peak memory to PATH "
+                             f"(default: {stage_metrics.METRICS_FILE}; or set ${stage_metrics.METRICS_ENV}).")
+    args = parser.parse_args()
+    stage_metrics.enable_metrics(args.metrics)
+    prep(args.input, args.output)
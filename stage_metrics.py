@@ -0,0 +1,189 @@
+import datetime
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# --- STAGE METRICS ---
+# When asked to (--metrics [PATH] on each tool, or the STAGE_METRICS environment variable),
+# every stage (scrub, outreach, hcad_mvp, ship_ten, skip_prep, the pipeline) appends one JSON
+# record to the metrics file (METRICS_FILE by default): wall time, rows in/out, rows dropped per filter, time per step
+# (read / filter / price / draft / write) and peak RSS. Code inside a stage reports through
+# the module-level helpers (step, rows_in, rows_out, dropped), which do nothing outside one.
+#
+# With profiling on (--profile), the outermost stage also runs under cProfile + tracemalloc
+# and its hot spots are appended to PROFILE_FILE (raw stats go to stage_<name>.prof).
+METRICS_FILE = "stage_metrics.jsonl"
+METRICS_ENV = "STAGE_METRICS"  # a path, or "1" for METRICS_FILE
+PROFILE_FILE = "stage_profile.txt"
+PROFILE_TOP_FUNCTIONS = 30
+PROFILE_TOP_ALLOCATIONS = 20
+
+_open_stages = []
+_profile = False
+_metrics_path = None
+
+
+def enable_profile(on=True):
+    global _profile
+    _profile = on
+
+
+def enable_metrics(path=None):
+    """
+    Turns on the metrics file: `path`, else $STAGE_METRICS, else off. Tools call this with
+    their --metrics value, so a run records nothing unless one of the two is set.
+    """
+    global _metrics_path
+    path = path or os.environ.get(METRICS_ENV) or None
+    _metrics_path = METRICS_FILE if path == "1" else path
+
+
+# Per-stage peak memory: on Linux the high-water mark can be reset (clear_refs "5"), so each
+# stage reports its own peak. Elsewhere the process-wide ru_maxrss is reported, and on Windows
+# (no resource module) nothing: peak_rss_mb is None.
+def _current_peak_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _reset_peak():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _fold_peak():
+    """Pushes the high-water mark since the last reset into every open stage."""
+    peak = _current_peak_mb()
+    if peak is None:
+        return
+    for rec in _open_stages:
+        rec['peak_rss_mb'] = max(rec['peak_rss_mb'], peak)
+
+
+@contextmanager
+def stage(name, **fields):
+    """Measures one stage and appends its record to the metrics file, if on. Yields the record dict."""
+    _fold_peak()
+    rec = {
+        'stage': name,
+        'parent': _open_stages[-1]['stage'] if _open_stages else None,
+        'started_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'rows_in': None,
+        'rows_out': None,
+        'dropped': {},
+        'steps': {},
+        'peak_rss_mb': 0.0,
+    }
+    rec.update(fields)
+    _open_stages.append(rec)
+    _reset_peak()
+
+    profiler = None
+    if _profile and len(_open_stages) == 1:
+        import cProfile
+        import tracemalloc
+        profiler = cProfile.Profile()
+        tracemalloc.start()
+        profiler.enable()
+
+    start = time.perf_counter()
+    rec['ok'] = False
+    try:
+        yield rec
+        rec['ok'] = 'error' not in rec  # callers that catch their own errors set rec['error']
+    finally:
+        rec['seconds'] = round(time.perf_counter() - start, 4)
+        if profiler is not None:
+            profiler.disable()
+            _write_profile(name, profiler)
+        _fold_peak()
+        _open_stages.pop()
+        rec['peak_rss_mb'] = round(rec['peak_rss_mb'], 1) if _current_peak_mb() is not None else None
+        _append(rec)
+
+
+@contextmanager
+def step(name):
+    """Times a named step of the current stage (repeated steps add up)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if _open_stages:
+            steps = _open_stages[-1]['steps']
+            steps[name] = round(steps.get(name, 0.0) + time.perf_counter() - start, 4)
+
+
+def rows_in(n):
+    if _open_stages:
+        _open_stages[-1]['rows_in'] = int(n)
+
+
+def rows_out(n):
+    if _open_stages:
+        _open_stages[-1]['rows_out'] = int(n)
+
+
+def dropped(filter_name, n):
+    """Rows removed by one filter of the current stage (adds up across chunks)."""
+    if _open_stages:
+        drops = _open_stages[-1]['dropped']
+        drops[filter_name] = drops.get(filter_name, 0) + int(n)
+
+
+def _append(rec):
+    if _metrics_path is None:
+        return
+    try:
+        with open(_metrics_path, 'a') as f:
+            f.write(json.dumps(rec, default=str) + '\n')
+    except OSError:
+        pass  # metrics must never break a run
+
+
+def _write_profile(name, profiler):
+    import io
+    import pstats
+    import tracemalloc
+
+    snapshot = tracemalloc.take_snapshot()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    profiler.dump_stats(f"stage_{name}.prof")
+
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+    with open(PROFILE_FILE, 'a') as f:
+        f.write(f"===== {name} ({datetime.datetime.now().isoformat(timespec='seconds')}) =====\n")
+        f.write(f"--- cProfile: top {PROFILE_TOP_FUNCTIONS} by cumulative time (raw: stage_{name}.prof) ---\n")
+        f.write(text.getvalue())
+        f.write(f"--- tracemalloc: peak traced {traced_peak / 1e6:,.1f} MB; "
+                f"top {PROFILE_TOP_ALLOCATIONS} allocation sites still held at stage end ---\n")
+        for stat in snapshot.statistics('lineno')[:PROFILE_TOP_ALLOCATIONS]:
+            f.write(f"{stat}\n")
+        f.write("\n")
+    print(f"Profile for stage '{name}' appended to {PROFILE_FILE}")
+
+
+def load_metrics(path=METRICS_FILE):
+    """All records in a metrics file (for ad-hoc analysis)."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,138 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- LOCAL CHAT-COMPLETIONS STUB ---
+# Mimics the OpenAI /v1/chat/completions endpoint so ai_narrator's batch mode can be
+# exercised offline: injected latency, random 429s (with Retry-After) and 5xx errors.
+#
+#   python stub_chat_server.py --port 8765 --latency 0.5 --rate-limit-rate 0.1 --error-rate 0.05
+#   python ai_narrator.py --batch leads.csv --base-url http://127.0.0.1:8765/v1
+
+
+class StubState:
+    def __init__(self, latency, jitter, error_rate, rate_limit_rate, retry_after, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "ok": 0, "429": 0, "500": 0}
+
+    def roll(self):
+        with self.lock:
+            self.counts["requests"] += 1
+            r = self.random.random()
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        if r < self.rate_limit_rate:
+            return delay, 429
+        if r < self.rate_limit_rate + self.error_rate:
+            return delay, 500
+        return delay, 200
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, status, body, headers=None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/stats"):
+                with state.lock:
+                    self._send(200, dict(state.counts))
+            else:
+                self._send(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send(404, {"error": {"message": "not found"}})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+
+            delay, status = state.roll()
+            time.sleep(delay)
+            if status == 429:
+                state.count("429")
+                self._send(429, {"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_error"}},
+                           {"Retry-After": str(state.retry_after)})
+                return
+            if status == 500:
+                state.count("500")
+                self._send(500, {"error": {"message": "Internal error (stub)", "type": "server_error"}})
+                return
+
+            state.count("ok")
+            prompt = payload.get("messages", [{}])[-1].get("content", "")
+            content = (f"[stub justification for a {len(prompt)}-char prompt] "
+                       "This analysis is generated via The Royce Protocol. Professional inspection required.")
+            self._send(200, {
+                "id": f"chatcmpl-stub-{state.counts['requests']}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 40,
+                          "total_tokens": len(prompt) // 4 + 40},
+            })
+
+    return Handler
+
+
+def serve(port=8765, latency=0.5, jitter=0.2, error_rate=0.0, rate_limit_rate=0.0, retry_after=1, seed=None):
+    """Starts the stub in a background thread and returns the server (call .shutdown() to stop)."""
+    state = StubState(latency, jitter, error_rate, rate_limit_rate, retry_after, seed)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub of the chat-completions endpoint.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean seconds per response.")
+    parser.add_argument("--jitter", type=float, default=0.2, help="+/- seconds added to the latency.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction answered with 429.")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s.")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency, args.jitter, args.error_rate, args.rate_limit_rate,
+                   args.retry_after, args.seed)
+    print(f"Stub chat-completions server on http://127.0.0.1:{args.port}/v1 (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Stats: {server.state.counts}")
+
+
+if __name__ == "__main__":
+    main()
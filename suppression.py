@@ -0,0 +1,233 @@
+import argparse
+import datetime
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+
+# --- THE SUPPRESSION INDEX ---
+# Every phone and property we have already contacted, across all campaigns and vendor lists.
+# Keys are normalized (phones to 10 digits like clean_phone, addresses to an uppercase
+# abbreviated form) and stored in SQLite. Filtering a new list is one vectorized pass:
+# its keys are hashed to int64 and checked against the in-memory hash set, and only the hits
+# are confirmed against the exact keys in the store (so a hash collision can never suppress a lead).
+SUPPRESSION_DB = "suppression.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    key          TEXT PRIMARY KEY,
+    key_hash     INTEGER NOT NULL,
+    kind         TEXT NOT NULL,
+    campaign     TEXT,
+    contacted_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_contacts_hash ON contacts (key_hash);
+"""
+
+# Applied word by word after punctuation is stripped (USPS-style abbreviations)
+ADDRESS_WORDS = {
+    'STREET': 'ST', 'AVENUE': 'AVE', 'AV': 'AVE', 'DRIVE': 'DR', 'ROAD': 'RD', 'LANE': 'LN',
+    'BOULEVARD': 'BLVD', 'COURT': 'CT', 'CIRCLE': 'CIR', 'PLACE': 'PL', 'PARKWAY': 'PKWY',
+    'HIGHWAY': 'HWY', 'TERRACE': 'TER', 'TRAIL': 'TRL', 'FREEWAY': 'FWY',
+    'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+    'APARTMENT': 'APT', 'SUITE': 'STE',
+}
+# City/state/zip are not part of the key: "123 Main St" and "123 MAIN ST, Houston, TX 77004" match
+CITY_STATE_ZIP = r"( (HOUSTON|HOU))?( (TX|TEXAS))?( \d{5}( ?\d{4})?)?$"
+
+
+def phone_keys(phones: pd.Series) -> pd.Series:
+    """Normalized 10-digit phone per row ('' when there is no usable number)."""
+    digits = phones.astype(str).str.replace(r"\D", "", regex=True)
+    digits = digits.where(~((digits.str.len() == 11) & digits.str.startswith("1")), digits.str[1:])
+    ten = (digits.str.len() == 10) & phones.notna()
+    return ("P:" + digits).where(ten, "")
+
+
+def address_keys(addresses: pd.Series) -> pd.Series:
+    """Normalized street address per row ('' when blank)."""
+    text = addresses.astype(str).str.upper().str.split(",").str[0]
+    text = text.str.replace(r"[^A-Z0-9]+", " ", regex=True).str.strip()
+    text = text.str.replace(CITY_STATE_ZIP, "", regex=True)
+    for word, abbr in ADDRESS_WORDS.items():
+        text = text.str.replace(rf"\b{word}\b", abbr, regex=True)
+    usable = (text != "") & (text != "NAN") & addresses.notna()
+    return ("A:" + text).where(usable, "")
+
+
+def key_hashes(keys: pd.Series) -> np.ndarray:
+    """64-bit hash per key (signed, which is what SQLite stores)."""
+    return pd.util.hash_array(keys.to_numpy(dtype=object)).view('int64')
+
+
+def open_index(path=SUPPRESSION_DB):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def load_hash_set(conn) -> np.ndarray:
+    """Sorted array of every stored key hash (8 bytes per contact)."""
+    hashes = np.fromiter((h for (h,) in conn.execute("SELECT key_hash FROM contacts")), dtype='int64')
+    hashes.sort()
+    return hashes
+
+
+def _confirmed(conn, candidates):
+    """Exact check: the subset of candidate keys that really are in the store."""
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS candidates (key TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM candidates")
+    conn.executemany("INSERT OR IGNORE INTO candidates (key) VALUES (?)", ((k,) for k in candidates))
+    return {k for (k,) in conn.execute("SELECT c.key FROM candidates c JOIN contacts s ON s.key = c.key")}
+
+
+def _lookup(conn, known, keys):
+    """Boolean mask: key present in the store (hash-set pass, exact check on the hits)."""
+    present = keys.ne("").to_numpy() & np.isin(key_hashes(keys), known)
+    if present.any():
+        candidates = pd.Series(keys[present].to_numpy(dtype=object), dtype=object)
+        confirmed = _confirmed(conn, candidates.unique())
+        present[present] = candidates.isin(confirmed).to_numpy()
+    return present
+
+
+def load_known(index_path=SUPPRESSION_DB) -> np.ndarray:
+    """load_hash_set for an index path: load it once per run and pass it to every suppress() call."""
+    conn = open_index(index_path)
+    try:
+        return load_hash_set(conn)
+    finally:
+        conn.close()
+
+
+def suppress(out: pd.DataFrame, index_path=SUPPRESSION_DB, phone_col="Phone", address_col="Property_Address",
+             seen=None, known=None, dedupe=True):
+    """
+    Splits an outreach table into (kept, suppressed). A row is suppressed when its phone or
+    address was contacted in an earlier campaign, or already appears earlier in this file.
+    `suppressed` carries a Suppressed_Reason column. With index_path=None only the duplicates
+    are dropped (merging several lists without an index); with dedupe=False only the index is
+    checked and repeats within the file are kept.
+    For a file processed in chunks, pass the same `seen` set with every chunk: it collects the
+    keys of earlier chunks so repeats across chunks count as duplicates too, and the same
+    `known` (load_known) so the index's hash set is not reloaded for every chunk.
+    """
+    phones = phone_keys(out[phone_col]) if phone_col in out.columns else pd.Series("", index=out.index)
+    addrs = address_keys(out[address_col]) if address_col in out.columns else pd.Series("", index=out.index)
+
+    phone_hit = addr_hit = np.zeros(len(out), dtype=bool)
+    if index_path is not None:
+        conn = open_index(index_path)
+        try:
+            if known is None:
+                known = load_hash_set(conn)
+            phone_hit = _lookup(conn, known, phones)
+            addr_hit = _lookup(conn, known, addrs)
+        finally:
+            conn.close()
+
+    # Vendor lists overlap inside a single file too: keep the first row per phone / address
+    phone_dup = phones.duplicated() & phones.ne("") & dedupe
+    addr_dup = addrs.duplicated() & addrs.ne("") & dedupe
+    if seen is not None and dedupe:
+        phone_dup |= phones.isin(seen)
+        addr_dup |= addrs.isin(seen)
+        seen.update(phones[phones.ne("")])
+        seen.update(addrs[addrs.ne("")])
+    phone_dup = phone_dup.to_numpy()
+    addr_dup = addr_dup.to_numpy()
+
+    reason = np.select(
+        [phone_hit, addr_hit, phone_dup, addr_dup],
+        ["PHONE_CONTACTED", "ADDRESS_CONTACTED", "PHONE_DUPLICATE", "ADDRESS_DUPLICATE"],
+        default="",
+    )
+    hit = reason != ""
+    suppressed = out[hit].copy()
+    suppressed["Suppressed_Reason"] = reason[hit]
+    return out[~hit], suppressed
+
+
+def record(out: pd.DataFrame, index_path=SUPPRESSION_DB, campaign=None,
+           phone_col="Phone", address_col="Property_Address"):
+    """Adds every phone and address in `out` to the index (first contact wins). Returns keys added."""
+    return record_keys(contact_keys(out, phone_col, address_col), index_path, campaign)
+
+
+def contact_keys(out: pd.DataFrame, phone_col="Phone", address_col="Property_Address") -> pd.Series:
+    """The distinct, non-blank phone and address keys of an outreach table."""
+    keys = []
+    if phone_col in out.columns:
+        keys.append(phone_keys(out[phone_col]))
+    if address_col in out.columns:
+        keys.append(address_keys(out[address_col]))
+    if not keys:
+        return pd.Series([], dtype=object)
+    keys = pd.concat(keys, ignore_index=True)
+    return keys[keys.ne("")].drop_duplicates()
+
+
+def record_keys(keys: pd.Series, index_path=SUPPRESSION_DB, campaign=None):
+    """Adds already-normalized keys (see contact_keys) to the index. Returns keys added."""
+    if not len(keys):
+        return 0
+    now = datetime.datetime.now().isoformat(timespec='seconds')
+
+    conn = open_index(index_path)
+    try:
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO contacts (key, key_hash, kind, campaign, contacted_at) VALUES (?, ?, ?, ?, ?)",
+            zip(keys.tolist(), key_hashes(keys).tolist(),
+                np.where(keys.str.startswith("P:"), "phone", "address").tolist(),
+                [campaign] * len(keys), [now] * len(keys)),
+        )
+        conn.commit()
+        return conn.total_changes - before
+    finally:
+        conn.close()
+
+
+def index_stats(index_path=SUPPRESSION_DB):
+    conn = open_index(index_path)
+    try:
+        return dict(conn.execute("SELECT kind, COUNT(*) FROM contacts GROUP BY kind").fetchall())
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-campaign suppression index for phones and addresses.")
+    parser.add_argument("--index", default=SUPPRESSION_DB, help="SQLite suppression index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("add", help="Record a list that was already sent (e.g. past campaigns).")
+    add.add_argument("files", nargs="+", help="Outreach CSVs (Phone / Property_Address columns).")
+    add.add_argument("--phone-col", default="Phone")
+    add.add_argument("--address-col", default="Property_Address")
+
+    check = sub.add_parser("filter", help="Drop already-contacted rows from a list.")
+    check.add_argument("input")
+    check.add_argument("output")
+    check.add_argument("--phone-col", default="Phone")
+    check.add_argument("--address-col", default="Property_Address")
+
+    sub.add_parser("stats", help="Count the suppressed phones and addresses.")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        for path in args.files:
+            df = pd.read_csv(path, dtype=str)
+            added = record(df, args.index, campaign=os.path.basename(path),
+                           phone_col=args.phone_col, address_col=args.address_col)
+            print(f"{path}: {added:,} new keys recorded.")
+    elif args.command == "filter":
+        df = pd.read_csv(args.input, dtype=str)
+        kept, suppressed = suppress(df, args.index, phone_col=args.phone_col, address_col=args.address_col)
+        kept.to_csv(args.output, index=False)
+        print(f"Kept {len(kept):,} rows, suppressed {len(suppressed):,} -> {args.output}")
+    print(f"Index {args.index}: {index_stats(args.index)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+# --- SYNTHETIC TEST DATA ---
+# Deterministic stand-ins for the private inputs (real_acct, 1st.xlsx, vendor CSVs), so every
+# stage can be run and timed anywhere. Same (rows, seed) -> byte-identical files.
+WRITE_CHUNK_ROWS = 100_000
+EXCEL_MAX_ROWS = 1_048_575  # sheet limit minus the header row
+
+# A realistic-width real_acct: the columns the scripts read plus the usual HCAD filler
+HCAD_FILLER = [
+    'yr', 'mailto', 'mail_addr_1', 'mail_addr_2', 'mail_city', 'mail_state', 'mail_zip',
+    'str_pfx', 'str_num', 'str', 'str_sfx', 'str_unit', 'school_dist', 'map_facet', 'key_map',
+    'Neighborhood_Code', 'Neighborhood_Grp', 'Market_Area_1', 'Market_Area_1_Dscr', 'econ_area',
+    'center_code', 'land_ar', 'acreage', 'land_val', 'bld_val', 'x_features_val', 'ag_val',
+    'assessed_val', 'tot_appr_val', 'prior_land_val', 'prior_tot_mkt_val', 'new_own_dt', 'lgl_1', 'lgl_2',
+]
+HCAD_HEADER = ['acct', 'yr_blt', 'bld_ar', 'tot_mkt_val', 'state_class',
+               'site_addr_1', 'site_addr_2', 'site_addr_3', 'yr_impr'] + HCAD_FILLER
+
+STATE_CLASSES = ['A1', 'A2', 'B1', 'B2', 'C1', 'F1', 'X1', 'XV']
+STATE_CLASS_WEIGHTS = [0.62, 0.04, 0.06, 0.02, 0.12, 0.08, 0.04, 0.02]
+STREETS = ['MAIN', 'WESTHEIMER', 'BELLAIRE', 'KIRBY', 'RICHMOND', 'SHEPHERD', 'ALMEDA', 'MONTROSE',
+           'GESSNER', 'FONDREN', 'HILLCROFT', 'AIRLINE', 'TIDWELL', 'CULLEN', 'WAYSIDE', 'OAK']
+SUFFIXES = ['ST', 'DR', 'RD', 'LN', 'AVE', 'BLVD', 'CT', 'WAY']
+FIRST_NAMES = ['JOHN', 'MARY', 'JAMES', 'PATRICIA', 'ROBERT', 'LINDA', 'MICHAEL', 'BARBARA',
+               'JOSE', 'MARIA', 'DAVID', 'NGUYEN', 'LINH', 'AHMED', 'GRACE', '']
+LAST_NAMES = ['SMITH', 'JOHNSON', 'GARCIA', 'NGUYEN', 'WILLIAMS', 'BROWN', 'JONES', 'MARTINEZ',
+              'DAVIS', 'LOPEZ', 'WILSON', 'TRAN', 'PATEL', 'O\'NEIL']
+
+# The HCAD files keyed by acct that real_acct does not carry (see hcad_join.py)
+RELATED_HEADERS = {
+    'owners': ['acct', 'ln_num', 'name', 'aka', 'pct_own'],
+    'deeds': ['acct', 'dos', 'clerk_yr', 'clerk_id', 'deed_id'],
+    'building_res': ['acct', 'property_use_cd', 'bld_num', 'impr_tp', 'date_erected', 'im_sq_ft',
+                     'full_bath', 'half_bath'],
+}
+
+# Vendor export layouts, each using header spellings pick_col / detect_columns recognize.
+# Roles: first, last, owner, address, city, state, zip, phone, value, sqft, year, baths
+VENDOR_LAYOUTS = {
+    # What scrub_new_list.py expects (1st.xlsx)
+    'propstream': {
+        'first': 'First Name', 'last': 'Last Name', 'address': 'Address', 'city': 'City', 'state': 'State',
+        'zip': 'Zip', 'year': 'Effective Year Built', 'sqft': 'Building Sqft', 'value': 'Est Value',
+        'phone': 'Mobile Number',
+    },
+    'batchleads': {
+        'owner': 'Owner Name', 'address': 'Property Address', 'city': 'Property City', 'zip': 'Property Zip',
+        'phone': 'Owner Phone', 'value': 'Market Value', 'sqft': 'Living Area', 'year': 'Year Built',
+        'baths': 'Bathrooms',
+    },
+    'hcad': {
+        'owner': 'owner_name', 'address': 'site_addr_1', 'zip': 'site_addr_3', 'phone': 'phone_number',
+        'value': 'tot_mkt_val', 'sqft': 'bld_ar', 'year': 'yr_blt',
+    },
+}
+
+
+def _rng(seed, offset):
+    """One generator per chunk, so chunked output never depends on the chunk size used to read it."""
+    return np.random.default_rng([seed, offset])
+
+
+def _addresses(rng, n):
+    nums = rng.integers(100, 19999, n).astype(str)
+    streets = rng.choice(STREETS, n)
+    suffixes = rng.choice(SUFFIXES, n)
+    return pd.Series(nums).str.cat([pd.Series(streets), pd.Series(suffixes)], sep=' ')
+
+
+def _property_fields(rng, n):
+    """Year built, sqft, market value and zip with roughly county-like distributions."""
+    yr_blt = rng.integers(1900, 2024, n).astype(float)
+    yr_blt[rng.random(n) < 0.03] = np.nan                          # blanks
+    bld_ar = np.round(rng.lognormal(7.5, 0.4, n))
+    bld_ar[rng.random(n) < 0.01] = 0                               # land / no building
+    value = np.round(rng.lognormal(12.3, 0.7, n), -2)
+    zips = rng.integers(77002, 77099, n).astype(str)
+    return yr_blt, bld_ar, value, zips
+
+
+def hcad_chunk(rows, seed=0, offset=0):
+    """`rows` HCAD-shaped accounts, numbered from `offset`."""
+    rng = _rng(seed, offset)
+    yr_blt, bld_ar, value, zips = _property_fields(rng, rows)
+    yr_impr = yr_blt + rng.integers(0, 40, rows)
+    df = pd.DataFrame({
+        'acct': [f"{offset + i:013d}" for i in range(rows)],
+        'yr_blt': yr_blt,
+        'bld_ar': bld_ar,
+        'tot_mkt_val': value,
+        'state_class': rng.choice(STATE_CLASSES, rows, p=STATE_CLASS_WEIGHTS),
+        'site_addr_1': _addresses(rng, rows),
+        'site_addr_2': 'HOUSTON',
+        'site_addr_3': zips,
+        'yr_impr': yr_impr,
+    })
+    # Real dumps carry the odd junk value in numeric columns
+    junk = rng.random(rows) < 0.001
+    df['bld_ar'] = df['bld_ar'].astype('int64').astype(str).where(~junk, 'N/A')
+    for i, col in enumerate(HCAD_FILLER):
+        df[col] = rng.integers(0, 10_000, rows) if i % 2 else 'X'
+    return df[HCAD_HEADER]
+
+
+def write_hcad(path, rows, seed=0):
+    """Tab-delimited real_acct-style file, written in chunks (1.6M rows is fine)."""
+    for offset in range(0, rows, WRITE_CHUNK_ROWS):
+        chunk = hcad_chunk(min(WRITE_CHUNK_ROWS, rows - offset), seed, offset)
+        chunk.to_csv(path, sep='\t', index=False, mode='w' if offset == 0 else 'a',
+                     header=offset == 0, float_format='%.0f')
+    return path
+
+
+def related_chunk(kind, rows, seed=0, offset=0):
+    """Rows of owners / deeds / building_res for the accounts hcad_chunk numbers from `offset`.
+
+    Like the real files, some accounts are missing and some have several rows (co-owners,
+    repeat sales, extra buildings); rows for one account are adjacent.
+    """
+    rng = _rng(seed + 2 + list(RELATED_HEADERS).index(kind), offset)
+    per_acct = {'owners': [0.02, 0.78, 0.2], 'deeds': [0.1, 0.5, 0.3, 0.1], 'building_res': [0.06, 0.9, 0.04]}[kind]
+    counts = rng.choice(len(per_acct), rows, p=per_acct)
+    accts = np.repeat(np.arange(offset, offset + rows), counts)
+    line = np.arange(len(accts)) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+    n = len(accts)
+    columns = {'acct': [f"{a:013d}" for a in accts]}
+    if kind == 'owners':
+        columns['ln_num'] = line
+        columns['name'] = np.char.add(np.char.add(rng.choice(LAST_NAMES, n), ' '), rng.choice(FIRST_NAMES, n))
+        columns['aka'] = ''
+        columns['pct_own'] = np.where(np.repeat(counts, counts) > 1, 50.0, 100.0)
+    elif kind == 'deeds':
+        days = rng.integers(0, 365 * 45, n)
+        columns['dos'] = (np.datetime64('1980-01-01') + days.astype('timedelta64[D]')).astype(str)
+        columns['clerk_yr'] = columns['dos'].astype('U4')
+        columns['clerk_id'] = rng.integers(100_000, 999_999, n)
+        columns['deed_id'] = line
+    else:
+        columns['property_use_cd'] = 'A1'
+        columns['bld_num'] = line
+        columns['impr_tp'] = 1001
+        columns['date_erected'] = rng.integers(1900, 2024, n)
+        columns['im_sq_ft'] = np.round(rng.lognormal(7.5, 0.4, n))
+        columns['full_bath'] = rng.choice([1, 2, 3], n, p=[0.3, 0.55, 0.15])
+        columns['half_bath'] = rng.choice([0, 1], n, p=[0.6, 0.4])
+    return pd.DataFrame(columns)[RELATED_HEADERS[kind]]
+
+
+def write_related(path, kind, rows, seed=0):
+    """Tab-delimited owners.txt / deeds.txt / building_res.txt for the first `rows` accounts."""
+    for offset in range(0, rows, WRITE_CHUNK_ROWS):
+        chunk = related_chunk(kind, min(WRITE_CHUNK_ROWS, rows - offset), seed, offset)
+        chunk.to_csv(path, sep='\t', index=False, mode='w' if offset == 0 else 'a', header=offset == 0)
+    return path
+
+
+def vendor_chunk(rows, layout='propstream', width=0, seed=0, offset=0):
+    """`rows` vendor-list leads in `layout`, padded with filler columns up to `width` columns."""
+    rng = _rng(seed + 1, offset)
+    yr_blt, bld_ar, value, zips = _property_fields(rng, rows)
+    first = rng.choice(FIRST_NAMES, rows)
+    last = rng.choice(LAST_NAMES, rows)
+    phones = rng.integers(2_000_000_000, 9_999_999_999, rows).astype(str)
+    phone_fmt = rng.integers(0, 4, rows)
+    phones = np.where(phone_fmt == 1, [f"({p[:3]}) {p[3:6]}-{p[6:]}" for p in phones], phones)
+    phones = np.where(phone_fmt == 2, np.char.add('1', phones.astype(str)), phones)
+    phones = np.where(phone_fmt == 3, '', phones)                  # no number found
+
+    roles = {
+        'first': first, 'last': last, 'owner': np.char.add(np.char.add(first, ' '), last),
+        'address': _addresses(rng, rows).to_numpy(), 'city': 'HOUSTON', 'state': 'TX', 'zip': zips,
+        'phone': phones, 'value': value, 'sqft': bld_ar, 'year': yr_blt,
+        'baths': rng.choice([1.0, 1.5, 2.0, 2.5, 3.0, np.nan], rows),
+    }
+    columns = {name: roles[role] for role, name in VENDOR_LAYOUTS[layout].items()}
+    df = pd.DataFrame(columns, index=range(rows))
+    for i in range(max(0, width - len(df.columns))):
+        df[f"Vendor Field {i + 1}"] = rng.integers(0, 1000, rows) if i % 3 else 'n/a'
+    return df
+
+
+def write_vendor(path, rows, layout='propstream', width=0, seed=0):
+    """Vendor list as .csv (chunked) or .xlsx (capped at the Excel row limit)."""
+    if str(path).lower().endswith('.xlsx'):
+        if rows > EXCEL_MAX_ROWS:
+            print(f"NOTE: {path} capped at {EXCEL_MAX_ROWS:,} rows (Excel sheet limit).")
+            rows = EXCEL_MAX_ROWS
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        for offset in range(0, rows, WRITE_CHUNK_ROWS):
+            chunk = vendor_chunk(min(WRITE_CHUNK_ROWS, rows - offset), layout, width, seed, offset)
+            if offset == 0:
+                ws.append(list(chunk.columns))
+            for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None):
+                ws.append(row)
+        wb.save(path)
+        return path
+
+    for offset in range(0, rows, WRITE_CHUNK_ROWS):
+        chunk = vendor_chunk(min(WRITE_CHUNK_ROWS, rows - offset), layout, width, seed, offset)
+        chunk.to_csv(path, index=False, mode='w' if offset == 0 else 'a', header=offset == 0)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic synthetic HCAD / vendor inputs.")
+    parser.add_argument("kind", choices=["hcad", "vendor"] + list(RELATED_HEADERS))
+    parser.add_argument("output", help="Output path (.txt for HCAD files; .csv or .xlsx for vendor lists).")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--layout", choices=sorted(VENDOR_LAYOUTS), default="propstream")
+    parser.add_argument("--width", type=int, default=0, help="Pad vendor lists with filler columns up to N.")
+    args = parser.parse_args()
+
+    if args.kind == "hcad":
+        write_hcad(args.output, args.rows, args.seed)
+    elif args.kind in RELATED_HEADERS:
+        write_related(args.output, args.kind, args.rows, args.seed)
+    else:
+        write_vendor(args.output, args.rows, args.layout, args.width, args.seed)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output) / 1e6:,.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
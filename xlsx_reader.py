@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+# --- THE FAST EXCEL LOADER ---
+# pd.read_excel builds openpyxl's full workbook object model before pandas sees a single value.
+# Here the sheet is streamed in read-only mode, one row tuple at a time, and only the requested
+# columns are kept. The kept values go through pandas' own TextParser (what read_excel uses),
+# so NA handling and type inference come out exactly as before.
+ERROR_CODES = {'#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A'}
+
+
+def _open_sheet(path, sheet=None):
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    ws = wb[sheet] if sheet is not None else wb.worksheets[0]
+    return wb, ws
+
+
+def _header_names(raw):
+    """Same naming pandas uses: 'Unnamed: n' for blanks, '.1', '.2'... for duplicates."""
+    names = []
+    seen = {}
+    for i, h in enumerate(raw):
+        name = h if h is not None else f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _cell(value):
+    """Mirrors pandas' openpyxl cell conversion (blank -> '', error -> NaN, integral float -> int)."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value in ERROR_CODES:
+        return np.nan
+    return value
+
+
+def read_xlsx_header(path, sheet=None):
+    """Column names of the first row, without reading the rest of the sheet."""
+    wb, ws = _open_sheet(path, sheet)
+    try:
+        first = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        return _header_names(first)
+    finally:
+        wb.close()
+
+
+def read_xlsx_columns(path, columns=None, sheet=None, numeric=()):
+    """
+    Streams an .xlsx and returns a DataFrame holding only `columns` (all if None).
+    Columns listed in `numeric` are coerced to float arrays (bad cells -> NaN).
+    Legacy .xls files go through pandas, which is the only reader for them.
+    """
+    if str(path).lower().endswith('.xls'):
+        df = pd.read_excel(path, sheet_name=sheet or 0,
+                           usecols=(lambda c: c in columns) if columns else None)
+        for col in numeric:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+        return df
+
+    names, data = list(_iter_rows(path, columns, sheet, chunksize=None))[0]
+    return _frame(data, names, numeric)
+
+
+def iter_xlsx_columns(path, columns=None, sheet=None, numeric=(), chunksize=100_000):
+    """
+    read_xlsx_columns in DataFrames of at most `chunksize` rows, for sheets too big to hold at once.
+    Types are inferred per chunk, as pd.read_csv(chunksize=...) does.
+    """
+    if str(path).lower().endswith('.xls'):
+        df = read_xlsx_columns(path, columns=columns, sheet=sheet, numeric=numeric)
+        for start in range(0, max(len(df), 1), chunksize):
+            yield df.iloc[start:start + chunksize]
+        return
+
+    for names, rows in _iter_rows(path, columns, sheet, chunksize=chunksize):
+        yield _frame(rows, names, numeric)
+
+
+def _iter_rows(path, columns, sheet, chunksize):
+    """Yields (names, rows) lists of converted cells, chunksize rows at a time (None = all at once)."""
+    wb, ws = _open_sheet(path, sheet)
+    try:
+        rows = ws.iter_rows(values_only=True)
+        header = _header_names(next(rows, ()))
+        keep = [i for i, name in enumerate(header) if columns is None or name in columns]
+        names = [header[i] for i in keep]
+
+        data = []
+        blanks = []
+        sent = False
+        for row in rows:
+            width = len(row)
+            values = [_cell(row[i]) if i < width else "" for i in keep]
+            if not any(v is not None for v in row):
+                # Trailing blank rows are trimmed, blank rows in the middle are kept (as pandas does)
+                blanks.append(values)
+                continue
+            data.extend(blanks)
+            blanks = []
+            data.append(values)
+            while chunksize and len(data) >= chunksize:
+                yield names, data[:chunksize]
+                data = data[chunksize:]
+                sent = True
+        if data or not sent:
+            yield names, data
+    finally:
+        wb.close()
+
+
+def _frame(data, names, numeric):
+    if not data:
+        return pd.DataFrame(columns=names)
+
+    from pandas.io.parsers import TextParser
+    df = TextParser(data, names=names, header=None, skip_blank_lines=False).read()
+    for col in numeric:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df